@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of py_deps.cache module."""
+import pytest
+from py_deps import cache
+
+KEY = ('p0', '1.0')
+SERIALIZERS = pytest.mark.parametrize('serializer', [None, 'binary'])
+
+
+@SERIALIZERS
+def test_pickle_store(benchmark, tmp_path, traced_chain, serializer):
+    """Benchmark storing to Pickle backend."""
+    benchmark.group = 'Pickle.store_data'
+    container = cache.backend(cache_name=str(tmp_path / 'py-deps.pickle'),
+                              serializer=serializer)
+    benchmark(container.store_data, KEY, traced_chain)
+
+
+@SERIALIZERS
+def test_pickle_read(benchmark, tmp_path, traced_chain, serializer):
+    """Benchmark loading and reading Pickle backend."""
+    benchmark.group = 'Pickle.read_data'
+    kwargs = dict(cache_name=str(tmp_path / 'py-deps.pickle'),
+                  serializer=serializer)
+    cache.backend(**kwargs).store_data(KEY, traced_chain)
+    result = benchmark(lambda: cache.backend(**kwargs).read_data(KEY))
+    assert result[0].name == 'p0'
+
+
+@SERIALIZERS
+def test_memcached_store(benchmark, memcached, traced_chain, serializer):
+    """Benchmark storing to Memcached backend."""
+    benchmark.group = 'Memcached.store_data'
+    container = cache.backend(servers=['127.0.0.1:11211'],
+                              serializer=serializer)
+    benchmark(container.store_data, KEY, traced_chain)
+
+
+@SERIALIZERS
+def test_memcached_read(benchmark, memcached, traced_chain, serializer):
+    """Benchmark reading Memcached backend."""
+    benchmark.group = 'Memcached.read_data'
+    container = cache.backend(servers=['127.0.0.1:11211'],
+                              serializer=serializer)
+    container.store_data(KEY, traced_chain)
+    result = benchmark(container.read_data, KEY)
+    assert result[0].name == 'p0'
+
+
+def test_memcached_read_many(benchmark, memcached, traced_chain):
+    """Benchmark reading 100 packages from Memcached backend."""
+    benchmark.group = 'Memcached.read_many'
+    container = cache.backend(servers=['127.0.0.1:11211'],
+                              serializer='binary')
+    keys = [(f'p{i}', '1.0') for i in range(100)]
+    container.store_many({key: traced_chain for key in keys})
+    result = benchmark(container.read_many, keys)
+    assert len(result) == 100
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of py_deps.deps module."""
+from py_deps import deps
+
+
+def test_create_nodes(benchmark, index):
+    """Benchmark tracing the dependencies."""
+    benchmark.group = 'create_nodes'
+    nodes = benchmark(deps.create_nodes, ['p0'])
+    assert nodes[0].name == 'p0'
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""Benchmarks of py_deps.graph module."""
+from py_deps import graph
+
+
+def test_linkdraw(benchmark, package):
+    """Benchmark generating Linkdraw data."""
+    benchmark.group = 'Linkdraw.generate_data'
+    data = benchmark(lambda: graph.Linkdraw(package).generate_data())
+    assert data['nodes'][0]['name'] == 'p0'
+
+
+def test_networkx(benchmark, package):
+    """Benchmark generating NetworkX graph."""
+    benchmark.group = 'Networkx.generate_data'
+    data = benchmark(lambda: graph.Networkx(package).generate_data())
+    assert 'p0' in data
+
+
+def test_pretty_print(benchmark, package):
+    """Benchmark pretty print."""
+    benchmark.group = 'pretty_print'
+    lines = benchmark(graph.pretty_print, package.traced_chain)
+    assert lines[0].startswith('p0 -> ')
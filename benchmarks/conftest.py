@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""Fixtures of py-deps benchmarks.
+
+The benchmarks run offline. Instead of a package index, synthetic
+dependency graphs are served by a stand-in of
+``pip._internal.commands.show.search_packages_info``, and Memcached
+by a stand-in of ``pylibmc.Client``.
+"""
+import pickle
+import types
+import pytest
+from mock import patch
+from py_deps import deps
+
+#: (shape, number of packages)
+CASES = [('chain', 10), ('chain', 50), ('chain', 150),
+         ('fan', 10), ('fan', 100), ('fan', 1000),
+         ('diamond', 4), ('diamond', 16), ('diamond', 28)]
+
+
+def chain(size):
+    """Return metadata of p0 -> p1 -> ... -> p(size - 1)."""
+    return {f'p{i}': [f'p{i + 1}'] if i < size - 1 else []
+            for i in range(size)}
+
+
+def fan(size):
+    """Return metadata of p0 -> [p1, ..., p(size - 1)]."""
+    metadata = {f'p{i}': [] for i in range(1, size)}
+    metadata['p0'] = [f'p{i}' for i in range(1, size)]
+    return metadata
+
+
+def diamond(size):
+    """Return metadata of stacked diamonds, p0 -> [a0, b0] -> p1 -> ...
+
+    The number of packages is ``size`` but the traced chain is
+    a tree, so that it has about ``2 ** (size / 3)`` nodes.
+    """
+    metadata = {}
+    levels = size // 3
+    for i in range(levels):
+        metadata[f'p{i}'] = [f'a{i}', f'b{i}']
+        metadata[f'a{i}'] = [f'p{i + 1}']
+        metadata[f'b{i}'] = [f'p{i + 1}']
+    metadata[f'p{levels}'] = []
+    return metadata
+
+
+SHAPES = dict(chain=chain, fan=fan, diamond=diamond)
+
+
+def stand_in_index(metadata):
+    """Return stand-in of ``search_packages_info`` serving metadata."""
+    def search_packages_info(names):
+        for name in names:
+            yield {'name': name,
+                   'version': '1.0',
+                   'home-page': f'https://example.org/{name}',
+                   'requires': metadata[name]}
+    return search_packages_info
+
+
+class StandInClient:
+    """Stand-in of ``pylibmc.Client``, serializing as pylibmc does."""
+
+    def __init__(self, servers, **kwargs):
+        """Initialize."""
+        self.servers = servers
+        self.behaviors = {}
+        self.data = {}
+
+    def set_multi(self, mapping):
+        """Set values."""
+        for key, value in mapping.items():
+            self.data[key] = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        return []
+
+    def get_multi(self, keys):
+        """Get values."""
+        return {key: pickle.loads(self.data[key])
+                for key in keys if key in self.data}
+
+    def get(self, key):
+        """Get value."""
+        return self.get_multi([key]).get(key)
+
+    def gets(self, key):
+        """Get value and CAS identifier."""
+        return self.get(key), 1
+
+    def add(self, key, value):
+        """Add value."""
+        self.set_multi({key: value})
+        return True
+
+    def cas(self, key, value, cas_id):
+        """Set value with CAS identifier."""
+        self.set_multi({key: value})
+        return True
+
+
+@pytest.fixture(params=CASES, ids=[f'{shape}-{size}' for shape, size in CASES])
+def metadata(request):
+    """Metadata of synthetic dependency graph."""
+    shape, size = request.param
+    return SHAPES[shape](size)
+
+
+@pytest.fixture
+def index(metadata):
+    """Serve the synthetic graph as installed packages."""
+    with patch('py_deps.deps.search_packages_info',
+               stand_in_index(metadata)):
+        yield metadata
+
+
+@pytest.fixture
+def traced_chain(index):
+    """Traced chain of the synthetic graph."""
+    return deps.create_nodes(['p0'])
+
+
+@pytest.fixture
+def package(traced_chain):
+    """Package like object of the synthetic graph."""
+    return types.SimpleNamespace(name='p0', version='1.0',
+                                 traced_chain=traced_chain)
+
+
+@pytest.fixture
+def memcached():
+    """Replace ``pylibmc`` with the stand-in."""
+    module = types.SimpleNamespace(Client=StandInClient)
+    with patch('py_deps.cache.pylibmc', module, create=True):
+        yield module
@@ -57,6 +57,15 @@ Search packages from PyPI.::
       'summary': 'Compute a dependency graph between active Python eggs.',
       'version': '0.5'}]
 
+Search the local name index of :class:`py_deps.index.NameIndex` instead,
+built from the simple repository API of PyPI. The names are normalized
+as PEP 503, and the names starting with the text come first.::
+
+    $ py-deps index names.txt
+    $ python
+    >>> search('deps', index='names.txt')
+    [{'name': 'deps'}, {'name': 'deps-rs'}, ..., {'name': 'py-deps'}, ...]
+
 Show latest version
 -------------------
 
@@ -67,6 +76,23 @@ Retrieve latest package from PyPI.::
     >>> latest_version('deps')
     '0.1.0'
 
+Index metadata mirror
+---------------------
+
+Mirror the releases, the latest version and ``Requires-Dist`` of
+the packages to a SQLite database with :class:`py_deps.mirror.Mirror`,
+and answer the latest versions, search and the metadata only
+resolution without the network. The mirror is synchronized
+incrementally with the change log serials of PyPI.::
+
+    $ py-deps mirror mirror.db sync deps py-deps requests
+    $ py-deps mirror mirror.db sync
+    $ py-deps mirror mirror.db latest deps py-deps requests
+    $ python
+    >>> latest_version('deps', mirror='mirror.db')
+    '0.1.0'
+    >>> Package('requests', resolver='mirror', mirror='mirror.db')
+
 
 Initialize
 ----------
@@ -104,6 +130,21 @@ Use ``update_force`` argument. (default: ``False``)::
     >>> pkg = Package('py-deps', update_force=True)
 
 
+Limits the cache file
+~~~~~~~~~~~~~~~~~~~~~
+
+Use ``max_entries``, ``max_bytes`` and ``ttl`` arguments.
+The least recently used entries are evicted in default,
+use ``policy='lfu'`` to evict the least frequently used entries.::
+
+    >>> pkg = Package('py-deps', max_entries=10000, ttl=30 * 86400)
+
+Drop the expired, unreadable and evicted entries offline
+with ``compact`` command.::
+
+    $ py-deps --cache-name py-deps.pickle --max-bytes 100000000 compact
+
+
 Changes the cache backend to Memcached
 ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 
@@ -118,6 +159,184 @@ Use ``servers`` argument. The argment syntax follows pylibmc.Client.::
 
     >>> pkg = Package('py-deps', servers=['127.0.0.1:11211'])
 
+Keep recently used values in process with ``near_cache_size`` and
+``near_cache_ttl`` arguments.::
+
+    >>> pkg = Package('py-deps', servers=['127.0.0.1:11211'],
+    ...               near_cache_size=1024, near_cache_ttl=300)
+
+
+Changes the cache backend to Redis
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Installing redis-py.::
+
+    (venv)$ pip install redis
+
+Use ``redis_url`` argument, and ``ttl`` argument to expire
+the entries on the server.::
+
+    >>> pkg = Package('py-deps', redis_url='redis://localhost:6379/0',
+    ...               ttl=86400)
+
+Update a cached entry atomically among concurrent writers
+with ``update_data`` method of :class:`py_deps.cache.Redis`.
+
+
+Chains the caches
+~~~~~~~~~~~~~~~~~
+
+Use ``tiered`` argument to look up the in-process memory, the Pickle
+file and the Memcached or Redis backend in order. Found entries are
+promoted to the faster tiers. ``memory_bytes`` bounds the memory tier.::
+
+    >>> pkg = Package('py-deps', servers=['127.0.0.1:11211'],
+    ...               tiered=True, memory_bytes=256 * 1024 * 1024)
+
+
+Shares a cache snapshot among processes
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Use ``snapshot`` argument to look up a read-only snapshot file mapped
+in memory and shared by the worker processes, instead of loading
+the Pickle file in every process. ``snapshot`` command publishes
+the entries of the cache to the file, replaced atomically, and
+the workers map the new file within a second.::
+
+    $ py-deps snapshot /dev/shm/py-deps.snapshot
+    $ py-deps --snapshot /dev/shm/py-deps.snapshot http --workers 4
+
+Alone, the trees resolved while serving are written to the in-process
+memory only, and lost when the process exits. Give ``tiered``,
+``servers`` or ``redis_url`` as well to keep them and publish them
+with the next snapshot.::
+
+    $ py-deps --snapshot /dev/shm/py-deps.snapshot --tiered http
+
+
+Changes the serializer of cached values
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Use ``serializer`` argument. ``binary`` stores the traced chains
+in a compact JSON format without pickle, readable by any Python
+version, and ``compression`` compresses
+the values larger than ``compress_threshold`` bytes.
+The values cached without serializer remain readable.::
+
+    >>> pkg = Package('py-deps', serializer='binary', compression='zlib')
+
+Pickle and marshal values of Memcached and Redis are refused unless
+``allow_pickle`` argument, or ``--allow-pickle`` option, is given,
+since anyone writing to the shared cache may craft them.
+
+
+Reuses the downloaded packages
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Use ``wheelhouse`` argument to keep the wheels built by pip in the
+directory, and reuse them in the next resolutions. The files are stored
+by the SHA-256 digest, and ``wheelhouse_bytes`` bounds the total size.
+Use ``offline`` argument to install from the wheelhouse only.::
+
+    >>> pkg = Package('py-deps', wheelhouse='/var/cache/py-deps/wheels',
+    ...               wheelhouse_bytes=2 * 1024 ** 3)
+    >>> pkg = Package('py-deps', wheelhouse='/var/cache/py-deps/wheels',
+    ...               offline=True, update_force=True)
+
+
+Changes the install directories
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+pip installs the packages to the directories leased from the pool
+on ``/dev/shm`` in default, and emptied after the resolution. Cache hits
+lease no directory. Use ``envpool`` argument to change the parent
+directory.::
+
+    >>> pkg = Package('py-deps', envpool='/var/tmp')
+
+
+Resolves without installing
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Use ``resolver='report'`` argument to read the resolution result of pip
+(``pip install --dry-run --report``) instead of installing the packages.
+Requires pip 22.2 or later.::
+
+    >>> pkg = Package('py-deps', resolver='report')
+
+
+Caches the failures
+~~~~~~~~~~~~~~~~~~~
+
+Packages not found or failed to install raise
+:class:`py_deps.exceptions.NotFound` or
+:class:`py_deps.exceptions.BrokenPackage`, and the failures are cached
+for ``failure_ttl`` seconds (default: 3600) to fail fast.
+``update_force`` resolves again. Network failures are not cached.::
+
+    >>> pkg = Package('no-such-package', failure_ttl=86400)
+    Traceback (most recent call last):
+    ...
+    py_deps.exceptions.NotFound: ERROR: No matching distribution found ...
+
+``search`` and ``latest_version`` given a ``cache`` keep the names not
+found on PyPI the same way, and return them empty without requests.::
+
+    >>> from py_deps.cache import Pickle
+    >>> latest_version('no-such-package', cache=Pickle('py-deps.pickle'))
+    ''
+
+
+Bound resolution
+----------------
+
+Bound the tree with ``max_depth``, ``exclude`` and ``stub``, and the
+resolution with ``deadline`` seconds. See :mod:`py_deps.bounds`.
+When pip does not finish by the deadline, the partial tree is returned
+with ``incomplete``, and cached apart from the complete tree.::
+
+    >>> pkg = Package('py-deps', stub=['setuptools', 'pip'], deadline=300)
+    >>> pkg.incomplete
+    False
+
+Or, from command line.::
+
+    $ py-deps resolve py-deps --max-depth 2 --stub setuptools pip \
+        --deadline 300
+
+
+Installed packages
+------------------
+
+Resolve the packages already installed in an environment, such as
+a virtualenv or the site-packages of a container image, without pip,
+with :class:`py_deps.environment.Environment`. The metadata are read
+in one pass, and the trees of the top level packages are stored to
+the cache.::
+
+    >>> from py_deps.cache import backend
+    >>> from py_deps.environment import Environment
+    >>> env = Environment(['/opt/venv'])
+    >>> env.store(backend())
+    >>> data = env.draw('linkdraw')
+
+Or, from command line.::
+
+    $ py-deps scan /opt/venv --type dot
+
+
+Compare versions
+----------------
+
+Compare the dependencies of two traced chains with
+:func:`py_deps.diff.diff`. Identical subtrees are skipped by the hashes.::
+
+    >>> from py_deps import diff
+    >>> diff.diff(Package('py-deps', '0.5.4').traced_chain,
+    ...           Package('py-deps', '0.5.5').traced_chain)
+    Diff(added=[], removed=[], changed=[('networkx', '2.3', '2.4'), ...],
+         added_edges=[], removed_edges=[])
+
 
 Generate rendering data
 -----------------------
@@ -126,6 +345,9 @@ Supports follows currently.
 
 * pretty print
 * Linkdraw
+* NetworkX
+* Graphviz DOT
+* blockdiag
 
 Pretty print
 ~~~~~~~~~~~~
@@ -190,6 +412,43 @@ See also `How to use linkdraw
 <https://github.com/mtoshi/linkdraw/wiki#how-to-use-linkdraw>`_.
 
 
+Graphviz DOT and blockdiag
+~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+Generates the text in one pass of the tree, without networkx.::
+
+    >>> print(pkg.draw('dot'))
+    digraph "py-deps" {
+      "py-deps" [label="py-deps\n0.5.5", URL="https://github.com/mkouhei/py-deps", color="#d1e0fa"];
+      "py-deps" -> "networkx";
+    (snip)
+    }
+    >>> print(pkg.draw('blockdiag'))
+    blockdiag {
+      "py-deps" [label = "py-deps\n0.5.5", href = "https://github.com/mkouhei/py-deps", color = "#d1e0fa"];
+      "py-deps" -> "networkx";
+    (snip)
+    }
+
+
+Union of packages
+~~~~~~~~~~~~~~~~~
+
+Use :class:`py_deps.deps.Requirements` to render the packages of
+a requirements set as one graph. The packages are added as resolved,
+and the shared nodes are rendered once.::
+
+    >>> from py_deps.deps import Requirements
+    >>> requirements = Requirements('my-service')
+    >>> requirements.add('py-deps')
+    >>> requirements.add('requests', '2.28.1')
+    >>> data = requirements.draw('linkdraw')
+
+Or, from command line.::
+
+    $ py-deps draw py-deps requests==2.28.1 --type linkdraw
+
+
 NetworkX
 ~~~~~~~~
 
@@ -218,7 +477,90 @@ This method returns :class:`Package.traced_chain`.
     >>> Container().read_data(('py-deps', '0.5.5'))
     [py-deps]
 
+Export the cached traced chains as an adjacency matrix in CSR format
+with :func:`py_deps.matrix.from_cache`, for the analytics with NumPy.
+The chains are read in batches, and the packages are indexed by the
+name and the version.::
+
+    >>> from py_deps import matrix
+    >>> csr = matrix.from_cache(backend())
+    >>> csr.names[csr.indices[csr.indptr[0]:csr.indptr[1]]]
+    array(['networkx', 'pip', 'setuptools', 'wheel'], dtype='<U10')
+
+
+
+Command line
+------------
+
+The ``py-deps`` command wraps the functions above.::
+
+    $ py-deps resolve py-deps --version 0.5.5
+    $ py-deps draw py-deps --type linkdraw
+    $ py-deps search deps --exactly
+    $ py-deps search deps --index names.txt
+    $ py-deps latest deps --mirror mirror.db
+    $ py-deps latest deps
+    $ py-deps list-cache
+    $ py-deps diff py-deps 0.5.4 0.5.5
+
+Each invocation pays the interpreter, ``pip`` import and cache load cost.
+Run the resolver daemon to keep them warm, and point the clients at
+its Unix socket with ``--socket`` or the ``PY_DEPS_SOCKET`` environment
+variable.::
+
+    $ py-deps --socket /tmp/py-deps.sock serve &
+    $ py-deps --socket /tmp/py-deps.sock resolve py-deps
+
+Resolve packages in parallel with ``batch`` command. Each package is
+resolved in a new process, and the results are stored to the cache
+by the command. See :mod:`py_deps.pool`.::
+
+    $ py-deps batch py-deps requests==2.28.1 --workers 4 --timeout 600
+
+Distribute the resolutions to the worker processes with ``queue``
+command, and share the results with Redis or Memcached backend.
+The queue is a SQLite database on a local file system, so its workers
+run on one host. See :mod:`py_deps.workqueue`.::
+
+    $ py-deps queue /var/lib/py-deps/queue.db put py-deps requests==2.28.1
+    $ py-deps --redis-url redis://cache:6379/0 \
+        queue /var/lib/py-deps/queue.db work --workers 4 --timeout 600
+    $ py-deps queue /var/lib/py-deps/queue.db progress
+
+HTTP service
+~~~~~~~~~~~~
+
+``py-deps http`` serves ``/resolve``, ``/draw``, ``/search``, ``/latest``
+and ``/metrics`` over HTTP. See :mod:`py_deps.service`.::
+
+    $ py-deps http --port 8080 --workers 4 &
+    $ curl http://127.0.0.1:8080/draw/linkdraw/py-deps/0.5.5
+
+Profiling
+~~~~~~~~~
+
+Profile the resolution and the graph export of a fraction of
+the packages with cProfile and tracemalloc, with ``profile`` argument
+or ``PY_DEPS_PROFILE`` environment variable as the directory of
+the dumps, and ``PY_DEPS_PROFILE_RATE`` as the fraction.
+Aggregate the hot spots of the dumps with ``profile-summary``
+command. See :mod:`py_deps.profiling`.::
+
+    $ PY_DEPS_PROFILE=/tmp/profiles PY_DEPS_PROFILE_RATE=0.01 py-deps http &
+    $ py-deps profile-summary /tmp/profiles --limit 10
 
 """
-from py_deps.deps import Package
 from py_deps.cache import Container
+
+
+def __getattr__(name):
+    """Import :class:`py_deps.deps.Package` on first access.
+
+    The command line client imports this package too, and must not pay
+    the ``pip._internal`` import cost when it only talks to the daemon.
+    """
+    if name == 'Package':
+        # pylint: disable=import-outside-toplevel
+        from py_deps.deps import Package
+        return Package
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
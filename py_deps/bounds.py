@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""py_deps.bounds module.
+
+Bounds of a resolution, so that a package of a huge closure or a slow
+build does not stall the resolver.
+
+=============  ===========================================================
+bound          effect
+=============  ===========================================================
+``max_depth``  the nodes of this depth are not expanded
+``exclude``    the packages are dropped from the tree
+``stub``       the packages are in the tree, but not expanded, such as
+               ``setuptools`` and ``pip`` required everywhere
+``deadline``   seconds of the resolution, the unexpanded nodes are left
+               when it expires
+=============  ===========================================================
+
+The nodes not expanded by the bounds are marked ``incomplete``.
+The trees bounded by ``max_depth``, ``exclude`` and ``stub`` are cached
+under the keys of the bounds, and the trees cut by ``deadline`` under
+the partial keys, so that they never shadow the complete trees.::
+
+    >>> from py_deps.deps import Package
+    >>> pkg = Package('py-deps', max_depth=1, stub=['setuptools'],
+    ...               deadline=300)
+    >>> pkg.incomplete
+    False
+"""
+import time
+from py_deps.metadata import canonical_name
+
+#: element of the cache keys of bounded trees
+BOUNDED = 'bounded'
+#: last element of the cache keys of trees cut by the deadline
+PARTIAL = 'partial'
+
+
+class Bounds:
+    """Bounds of a resolution."""
+
+    def __init__(self, max_depth=None, exclude=(), stub=(), deadline=None):
+        """Initialize.
+
+        :param int max_depth: depth of the nodes not expanded
+        :param exclude: package names to drop
+        :param stub: package names not to expand
+        :param float deadline: seconds from now
+        """
+        self.max_depth = max_depth
+        self.exclude = frozenset(canonical_name(name)
+                                 for name in exclude or ())
+        self.stub = frozenset(canonical_name(name) for name in stub or ())
+        self.deadline = None
+        if deadline is not None:
+            self.deadline = time.monotonic() + deadline
+        #: nodes are left unexpanded by the deadline, or for lack of
+        #: the metadata
+        self.cut = False
+
+    def key(self, key):
+        """Return cache key of the tree bounded.
+
+        The deadline is not a part of the key.
+
+        :rtype: tuple
+        :param tuple key: package name, version
+        """
+        if not any([self.max_depth is not None, self.exclude, self.stub]):
+            return tuple(key)
+        return tuple(key) + (BOUNDED, self.max_depth,
+                             ','.join(sorted(self.exclude)),
+                             ','.join(sorted(self.stub)))
+
+    def remaining(self):
+        """Return seconds to the deadline.
+
+        :rtype: float
+        :return: seconds, ``0`` when expired, ``None`` without deadline
+        """
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0)
+
+    def expired(self):
+        """Return whether the deadline expired.
+
+        :rtype: bool
+        """
+        return self.remaining() == 0
+
+    def excludes(self, name):
+        """Return whether the package is dropped.
+
+        :rtype: bool
+        """
+        return canonical_name(name) in self.exclude
+
+    def expands(self, name, depth):
+        """Return whether the node is expanded.
+
+        :rtype: bool
+        :param str name: package name
+        :param int depth: depth of the node
+        """
+        if self.max_depth is not None and depth >= self.max_depth:
+            return False
+        if canonical_name(name) in self.stub:
+            return False
+        if self.expired():
+            self.cut = True
+            return False
+        return True
+
+
+def partial_key(key):
+    """Return cache key of the tree cut by the deadline, or incomplete.
+
+    :rtype: tuple
+    :param tuple key: key of :meth:`Bounds.key`
+    """
+    return tuple(key) + (PARTIAL,)
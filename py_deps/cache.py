@@ -1,18 +1,35 @@
 # -*- coding: utf-8 -*-
 """py_deps.cache module."""
+import json
 import os.path
 import pickle
+import sys
+import time
+import zlib
+from collections import OrderedDict
+from py_deps import metrics
+from py_deps.exceptions import BackendFailure
+from py_deps.serializer import BinarySerializer, get_serializer, loads
 try:
     import pylibmc
 except ImportError:
     pass
+try:
+    import redis
+except ImportError:
+    pass
+
+#: Redis connection pools shared in process, by URL
+POOLS = {}
 
 
 def backend(**kwargs):
     """Specify cache backend.
 
     :rtype: :class:`py_deps.cache.Container`
-    :return: Pickle object or Memcached object.
+    :return: Pickle object, Memcached object, Redis object,
+             or Tiered object of them and
+             :class:`py_deps.snapshot.Snapshot` object.
 
     :param kwargs: parameters
 
@@ -27,31 +44,180 @@ def backend(**kwargs):
     password
         Memcached SASL password (optional)
 
+    near_cache_size
+        Entries of Memcached in-process near-cache (optional)
+
+    near_cache_ttl
+        Seconds to keep near-cache entries (optional)
+
+    redis_url
+        Redis URL (required in Redis)
+
+        Using Redis with ``redis_url`` and without ``servers``.
+
+    ttl
+        Seconds to keep Redis or Pickle entries (optional)
+
+    max_entries
+        Number of Pickle entries (optional)
+
+    max_bytes
+        Total size of Pickle entries (optional)
+
+    policy
+        Eviction policy of Pickle entries, ``lru`` or ``lfu`` (optional)
+
+    tiered
+        Chain in-process memory, Pickle and the backend above (optional)
+
+    snapshot
+        Snapshot file name, looked up before the backend above (optional)
+
+        The backend is in-process memory without ``servers``, ``redis_url``
+        and ``tiered``, not to load Pickle file in every process. The
+        entries written to it are lost when the process exits, and never
+        published to the next snapshot.
+
+    memory_bytes
+        Total size of in-process memory tier entries (optional)
+
     cache_name
         Pickle filename (default, optional)
+
+    serializer
+        ``pickle``, ``binary`` or :class:`py_deps.serializer.Serializer`
+        object (optional). Stores values as is in default.
+
+    compression
+        ``zlib``, ``zstd`` or ``lz4`` with serializer (optional)
+
+    compress_threshold
+        Compress values larger than this bytes (optional)
+
+    allow_pickle
+        Load pickle and legacy values (optional)
+
+        Refused in default with ``servers`` or ``redis_url``, since
+        anyone writing to the shared cache may craft the values. Their
+        values are serialized with ``binary`` without ``serializer``.
     """
+    remote = bool(kwargs.get('servers') or kwargs.get('redis_url'))
+    allow_pickle = kwargs.get('allow_pickle')
+    if allow_pickle is None:
+        allow_pickle = not remote
+    serializer_name = kwargs.get('serializer')
+    if serializer_name is None and not allow_pickle:
+        serializer_name = 'binary'
+    value_serializer = get_serializer(
+        serializer_name,
+        compression=kwargs.get('compression'),
+        threshold=kwargs.get('compress_threshold'),
+        allow_pickle=allow_pickle)
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from py_deps.snapshot import Snapshot
+    shared = any([remote, kwargs.get('tiered')])
+    if kwargs.get('snapshot') and not shared:
+        return Tiered([Snapshot(kwargs.get('snapshot')),
+                       Memory(max_bytes=kwargs.get('memory_bytes'))])
     if kwargs.get('servers'):
         cache = Memcached(kwargs.get('servers'),
                           username=kwargs.get('username'),
                           password=kwargs.get('password'),
-                          behaviors=kwargs.get('behaviors'))
+                          behaviors=kwargs.get('behaviors'),
+                          serializer=value_serializer,
+                          near_cache_size=kwargs.get('near_cache_size', 0),
+                          near_cache_ttl=kwargs.get('near_cache_ttl'))
+    elif kwargs.get('redis_url'):
+        cache = Redis(kwargs.get('redis_url'),
+                      ttl=kwargs.get('ttl'),
+                      serializer=value_serializer,
+                      allow_pickle=allow_pickle)
     else:
         # default Pickle
-        cache = Pickle(cache_name=kwargs.get('cache_name'))
+        cache = pickle_backend(value_serializer, **kwargs)
+    tiers = []
+    if kwargs.get('tiered'):
+        tiers.append(Memory(max_bytes=kwargs.get('memory_bytes')))
+    if kwargs.get('snapshot'):
+        tiers.append(Snapshot(kwargs.get('snapshot')))
+    if kwargs.get('tiered') and not isinstance(cache, Pickle):
+        tiers.append(pickle_backend(value_serializer, **kwargs))
+    if tiers:
+        cache = Tiered(tiers + [cache])
     return cache
 
 
+def pickle_backend(value_serializer=None, **kwargs):
+    """Return Pickle backend with parameters of :func:`backend`.
+
+    :rtype: :class:`py_deps.cache.Pickle`
+    """
+    return Pickle(cache_name=kwargs.get('cache_name'),
+                  serializer=value_serializer,
+                  max_entries=kwargs.get('max_entries'),
+                  max_bytes=kwargs.get('max_bytes'),
+                  ttl=kwargs.get('ttl'),
+                  policy=kwargs.get('policy') or 'lru')
+
+
 class Container:
     """Package container class."""
 
-    def __init__(self, cache_name=None):
-        """Initialize."""
+    #: copy the entries read to the faster tiers of :class:`Tiered`
+    promote = True
+
+    def __init__(self, cache_name=None, serializer=None):
+        """Initialize.
+
+        :param str cache_name: cache name
+        :param serializer: serializer of values, ``None`` as is
+        :type serializer: :class:`py_deps.serializer.Serializer`
+        """
         self.cache_name = cache_name
+        self.serializer = serializer
         self.container = {}
 
+    def dumps(self, data):
+        """Serialize data to store."""
+        if self.serializer is None:
+            return data
+        return self.serializer.dumps(data)
+
+    def loads(self, raw):
+        """Deserialize stored data.
+
+        Reads values of any serializer and the values stored as is.
+        """
+        if self.serializer is None:
+            return loads(raw)
+        return self.serializer.loads(raw)
+
     def store_data(self, key, data):
         """Store traced_chain data."""
 
+    def store_many(self, mapping):
+        """Store traced_chain data of packages.
+
+        :param dict mapping: traced dependency chain data by key
+        """
+        for key, data in mapping.items():
+            self.store_data(key, data)
+
+    def read_many(self, keys):
+        """Read traced_chain data of packages.
+
+        :rtype: dict
+        :return: dependency chain list by key, without missing keys
+
+        :param list keys: keys of package name, version
+        """
+        result = {}
+        for key in keys:
+            data = self.read_data(key)
+            if data is not None:
+                result[key] = data
+        return result
+
     def read_data(self, key):
         """Read traced_chain data.
 
@@ -60,7 +226,7 @@ class Container:
 
         :param tuple key: package name, version
         """
-        return self.container.get(key)
+        return self.loads(self.container.get(key))
 
     def list_data(self):
         """Return dictionary stored package metadata.
@@ -68,32 +234,161 @@ class Container:
         :rtype: dict
         :return: packages metadata
         """
-        return self.container
+        return {key: self.loads(value)
+                for key, value in self.container.items()}
+
+    def list_keys(self):
+        """Return keys of stored package metadata, without reading them.
+
+        :rtype: list
+        :return: keys of package name, version
+        """
+        return list(self.container)
 
 
 class Pickle(Container):
-    """Cache backend is Pickle."""
+    """Cache backend is Pickle.
+
+    The stored and last accessed time, the hits and the size of each
+    entry are tracked in :attr:`access`, and saved with the entries.
+    Entries older than ``ttl`` seconds are dropped, and the least
+    recently (``lru``) or least frequently (``lfu``) used entries are
+    evicted when over ``max_entries`` or ``max_bytes``.
+    """
 
     #: default cache file name
     default_cache_name = 'py-deps.pickle'
-
-    def __init__(self, cache_name=None):
-        """Initialize."""
+    #: cache file format version
+    file_format = 2
+    #: eviction policies, returning the sort key of access record
+    policies = dict(lru=lambda access: access['accessed'],
+                    lfu=lambda access: (access['hits'], access['accessed']))
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, cache_name=None, serializer=None, max_entries=None,
+                 max_bytes=None, ttl=None, policy='lru'):
+        """Initialize.
+
+        :param str cache_name: cache file name
+        :param serializer: serializer of values
+        :param int max_entries: number of entries
+        :param int max_bytes: total size of entries
+        :param float ttl: seconds to keep entries
+        :param str policy: eviction policy, ``lru`` or ``lfu``
+        """
         if cache_name is None:
             cache_name = self.default_cache_name
-        super().__init__(cache_name)
+        if policy not in self.policies:
+            raise ValueError(f'unknown policy: {policy}')
+        super().__init__(cache_name, serializer=serializer)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.policy = policy
+        #: access records by key
+        self.access = {}
         self.load_cache()
 
     def load_cache(self):
-        """Load cache file."""
+        """Load cache file.
+
+        Reads the file of previous versions, without access records.
+        """
         if os.path.isfile(self.cache_name):
             with open(self.cache_name, 'rb') as fobj:
-                self.container = pickle.load(fobj)
+                data = pickle.load(fobj)
+            if isinstance(data, tuple):
+                _, self.container, self.access = data
+            else:
+                self.container = data
+        now = time.time()
+        for key in self.container:
+            if key not in self.access:
+                self.access[key] = dict(stored=now, accessed=now, hits=0,
+                                        size=None)
 
     def save_cache(self):
-        """Save cache file."""
-        with open(self.cache_name, 'wb') as fobj:
-            pickle.dump(self.container, fobj)
+        """Save cache file, replacing it atomically."""
+        tempname = f'{self.cache_name}.{os.getpid()}.tmp'
+        with open(tempname, 'wb') as fobj:
+            pickle.dump((self.file_format, self.container, self.access),
+                        fobj, pickle.HIGHEST_PROTOCOL)
+        os.replace(tempname, self.cache_name)
+
+    def size(self, key):
+        """Return size of entry in bytes."""
+        access = self.access[key]
+        if access['size'] is None:
+            raw = self.container[key]
+            if not isinstance(raw, bytes):
+                raw = pickle.dumps(raw, pickle.HIGHEST_PROTOCOL)
+            access['size'] = len(raw)
+        return access['size']
+
+    def expired(self, key, now=None):
+        """Return whether entry is older than ttl."""
+        if self.ttl is None:
+            return False
+        return self.access[key]['stored'] + self.ttl < (now or time.time())
+
+    def delete(self, key):
+        """Delete entry without saving."""
+        self.container.pop(key, None)
+        self.access.pop(key, None)
+
+    def over_limits(self, count, total):
+        """Return whether entries are over max_entries or max_bytes."""
+        if self.max_entries is not None and count > self.max_entries:
+            return True
+        return self.max_bytes is not None and total > self.max_bytes
+
+    def evict(self, protected=()):
+        """Drop expired entries, and evict entries over limits.
+
+        :rtype: list
+        :return: dropped keys
+
+        :param protected: keys not to evict, such as the just stored
+        """
+        now = time.time()
+        dropped = [key for key in self.container if self.expired(key, now)]
+        for key in dropped:
+            self.delete(key)
+        count = len(self.container)
+        total = 0
+        if self.max_bytes is not None:
+            total = sum(self.size(key) for key in self.container)
+        if self.over_limits(count, total):
+            policy = self.policies[self.policy]
+            candidates = [key for key in self.container
+                          if key not in protected]
+            for key in sorted(candidates,
+                              key=lambda key: policy(self.access[key])):
+                if not self.over_limits(count, total):
+                    break
+                count -= 1
+                if self.max_bytes is not None:
+                    total -= self.size(key)
+                self.delete(key)
+                dropped.append(key)
+        return dropped
+
+    def read_data(self, key):
+        """Read traced_chain data, and record the access.
+
+        The access records are saved with next store.
+
+        :rtype: list
+        :return: dependency chain list
+
+        :param tuple key: package name, version
+        """
+        if key not in self.container or self.expired(key):
+            return None
+        access = self.access[key]
+        access['accessed'] = time.time()
+        access['hits'] += 1
+        return super().read_data(key)
 
     def store_data(self, key, data):
         """Store traced_chain data.
@@ -101,20 +396,85 @@ class Pickle(Container):
         :param tuple key: package name, version
         :param list data: traced dependency chain data
         """
-        self.container[key] = data
+        self.store_many({key: data})
+
+    def store_many(self, mapping):
+        """Store traced_chain data of packages, saving the file once.
+
+        :param dict mapping: traced dependency chain data by key
+        """
+        now = time.time()
+        for key, data in mapping.items():
+            self.container[key] = self.dumps(data)
+            self.access[key] = dict(stored=now, accessed=now, hits=0,
+                                    size=None)
+        self.evict(protected=mapping)
         self.save_cache()
 
+    def compact(self):
+        """Rewrite cache file, dropping expired, unreadable and evicted.
+
+        :rtype: int
+        :return: number of dropped entries
+        """
+        unreadable = []
+        for key in self.container:
+            try:
+                if self.loads(self.container[key]) is None:
+                    unreadable.append(key)
+            # pylint: disable=broad-except
+            except Exception:
+                unreadable.append(key)
+        for key in unreadable:
+            self.delete(key)
+        dropped = len(unreadable) + len(self.evict())
+        self.save_cache()
+        return dropped
+
 
 class Memcached(Container):
-    """Cache backend is Memecached."""
+    """Cache backend is Memecached.
+
+    The stored keys are registered to the :attr:`registry_shards`
+    entries prefixed with :attr:`registry_key`, sharded by the hash of
+    the key, so that :meth:`list_data` lists them. Each store rewrites
+    only the shards of its keys, and every entry stays far below the item
+    size limit of Memcached. The near-cache keeps recently
+    used values in process, up to ``near_cache_size`` entries for
+    ``near_cache_ttl`` seconds.
+    """
+
+    #: key of the registry of stored keys, and prefix of its shards
+    registry_key = 'py-deps:keys'
+    #: number of registry shards
+    registry_shards = 64
+    #: retries of updating a registry shard
+    registry_retries = 10
 
+    # pylint: disable=too-many-arguments
     def __init__(self, servers=None,
                  username=None,
                  password=None,
-                 behaviors=None):
-        """Initialize."""
-        super().__init__()
-        if username and password:
+                 behaviors=None,
+                 serializer=None,
+                 near_cache_size=0,
+                 near_cache_ttl=None,
+                 client=None):
+        """Initialize.
+
+        :param list servers: Memcached servers
+        :param str username: SASL username
+        :param str password: SASL password
+        :param dict behaviors: behaviors of pylibmc.Client
+        :param serializer: serializer of values
+        :param int near_cache_size: entries of near-cache, 0 disables it
+        :param float near_cache_ttl: seconds to keep near-cache entries
+        :param client: client object instead of pylibmc.Client
+        """
+        super().__init__(serializer=serializer)
+        if client is not None:
+            self.container = client
+        elif username and password:
             self.container = pylibmc.Client(servers,
                                             binary=True,
                                             username=username,
@@ -122,6 +482,56 @@ class Memcached(Container):
         else:
             self.container = pylibmc.Client(servers,
                                             binary=True)
+        self.container.behaviors = dict(behaviors or {}, cas=True)
+        self.near_cache = LRU(near_cache_size, ttl=near_cache_ttl)
+
+    @staticmethod
+    def _key(key):
+        """Return Memcached key of package name, version.
+
+        Negative cache keys have the third element.
+        """
+        return ' '.join(str(part) for part in key)
+
+    def _shard(self, key):
+        """Return Memcached key of the registry shard of a key."""
+        shard = zlib.crc32(self._key(key).encode('utf-8'))
+        return f'{self.registry_key}:{shard % self.registry_shards}'
+
+    def _register(self, keys):
+        """Add keys to the registry shards with compare-and-set.
+
+        :raises: :class:`py_deps.exceptions.BackendFailure`
+                 when a shard is not updated after the retries
+        """
+        shards = {}
+        for key in keys:
+            shards.setdefault(self._shard(key), set()).add(key)
+        for shard, shard_keys in shards.items():
+            if not self._register_shard(shard, shard_keys):
+                raise BackendFailure(f'failed to register {len(shard_keys)} '
+                                     f'keys to {shard}')
+
+    def _register_shard(self, shard, keys):
+        """Add keys to a registry shard with compare-and-set.
+
+        :rtype: bool
+        :return: whether the keys are registered
+        """
+        # pylint: disable=no-member
+        for _ in range(self.registry_retries):
+            raw, cas_id = self.container.gets(shard)
+            if raw is None:
+                if self.container.add(shard, self.dumps(keys)):
+                    return True
+                continue
+            registered = self.loads(raw)
+            if keys <= registered:
+                return True
+            if self.container.cas(shard, self.dumps(registered | keys),
+                                  cas_id):
+                return True
+        return False
 
     def store_data(self, key, data):
         """Store traced_chain data.
@@ -129,8 +539,136 @@ class Memcached(Container):
         :param tuple key: package name, version
         :param list data: traced dependency chain data
         """
+        self.store_many({key: data})
+
+    def store_many(self, mapping):
+        """Store traced_chain data of packages in a round trip.
+
+        :param dict mapping: traced dependency chain data by key
+        """
+        # pylint: disable=no-member
+        self.container.set_multi({self._key(key): self.dumps(data)
+                                  for key, data in mapping.items()})
+        for key, data in mapping.items():
+            self.near_cache.set(key, data)
+        self._register(mapping)
+
+    def read_data(self, key):
+        """Read traced_chain data.
+
+        :rtype: list
+        :return: dependency chain list
+
+        :param tuple key: package name, version
+        """
+        return self.read_many([key]).get(key)
+
+    def read_many(self, keys):
+        """Read traced_chain data of packages in a round trip.
+
+        :rtype: dict
+        :return: dependency chain list by key, without missing keys
+
+        :param list keys: keys of package name, version
+        """
+        result = {}
+        missing = {}
+        for key in keys:
+            data = self.near_cache.get(key)
+            if data is None:
+                missing[self._key(key)] = key
+            else:
+                result[key] = data
+        if missing:
+            # pylint: disable=no-member
+            values = self.container.get_multi(list(missing))
+            for memcached_key, raw in values.items():
+                key = missing[memcached_key]
+                result[key] = self.loads(raw)
+                self.near_cache.set(key, result[key])
+        return result
+
+    def list_data(self):
+        """Return dictionary stored package metadata.
+
+        :rtype: dict
+        :return: packages metadata
+        """
+        return self.read_many(self.list_keys())
+
+    def list_keys(self):
+        """Return keys of the registry, without reading the entries.
+
+        :rtype: list
+        :return: keys of package name, version
+        """
         # pylint: disable=no-member
-        self.container.set('{0} {1}'.format(*key), data)
+        shards = self.container.get_multi(
+            [self.registry_key] + [f'{self.registry_key}:{shard}'
+                                   for shard in range(self.registry_shards)])
+        registered = set()
+        for raw in shards.values():
+            registered |= self.loads(raw)
+        return sorted(registered, key=str)
+
+
+class Redis(Container):
+    """Cache backend is Redis.
+
+    The connections are pooled per process and URL. Batches are sent
+    in a round trip, entries expire on the server after ``ttl`` seconds,
+    and :meth:`update_data` updates an entry with compare-and-set,
+    so that many resolver workers share a cache without lost updates.
+    """
+
+    #: key prefix
+    prefix = 'py-deps:'
+    #: keys per round trip of listing
+    scan_count = 1000
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, url='redis://localhost:6379/0', ttl=None,
+                 serializer=None, client=None, allow_pickle=False):
+        """Initialize.
+
+        :param str url: Redis URL
+        :param int ttl: seconds to keep entries, ``None`` is forever
+        :param serializer: serializer of values (default: binary)
+        :param client: client object instead of redis.Redis
+        :param bool allow_pickle: load pickle and legacy values with
+                                  the default serializer
+        """
+        if serializer is None:
+            serializer = BinarySerializer(allow_pickle=allow_pickle)
+        super().__init__(cache_name=url, serializer=serializer)
+        if client is None:
+            if url not in POOLS:
+                POOLS[url] = redis.ConnectionPool.from_url(url)
+            client = redis.Redis(connection_pool=POOLS[url])
+        self.container = client
+        self.ttl = ttl
+
+    def _key(self, key):
+        """Return Redis key of package name, version."""
+        return self.prefix + json.dumps(list(key))
+
+    def store_data(self, key, data):
+        """Store traced_chain data.
+
+        :param tuple key: package name, version
+        :param list data: traced dependency chain data
+        """
+        self.container.set(self._key(key), self.dumps(data), ex=self.ttl)
+
+    def store_many(self, mapping):
+        """Store traced_chain data of packages in a round trip.
+
+        :param dict mapping: traced dependency chain data by key
+        """
+        pipeline = self.container.pipeline(transaction=False)
+        for key, data in mapping.items():
+            pipeline.set(self._key(key), self.dumps(data), ex=self.ttl)
+        pipeline.execute()
 
     def read_data(self, key):
         """Read traced_chain data.
@@ -140,4 +678,298 @@ class Memcached(Container):
 
         :param tuple key: package name, version
         """
-        return self.container.get('{0} {1}'.format(*key))
+        return self.loads(self.container.get(self._key(key)))
+
+    def read_many(self, keys):
+        """Read traced_chain data of packages in a round trip.
+
+        :rtype: dict
+        :return: dependency chain list by key, without missing keys
+
+        :param list keys: keys of package name, version
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.container.mget([self._key(key) for key in keys])
+        return {key: self.loads(raw)
+                for key, raw in zip(keys, values) if raw is not None}
+
+    def update_data(self, key, func):
+        """Update traced_chain data with compare-and-set.
+
+        ``func`` is called again when another writer changes the entry
+        between reading and writing.
+
+        :rtype: list
+        :return: stored data
+
+        :param tuple key: package name, version
+        :param func: called with the stored data or ``None``,
+                     and returns the data to store
+        """
+        redis_key = self._key(key)
+        with self.container.pipeline() as pipeline:
+            while True:
+                try:
+                    pipeline.watch(redis_key)
+                    data = func(self.loads(pipeline.get(redis_key)))
+                    pipeline.multi()
+                    pipeline.set(redis_key, self.dumps(data), ex=self.ttl)
+                    pipeline.execute()
+                    return data
+                except redis.WatchError:
+                    continue
+
+    def list_data(self):
+        """Return dictionary stored package metadata.
+
+        :rtype: dict
+        :return: packages metadata
+        """
+        return self.read_many(self.list_keys())
+
+    def list_keys(self):
+        """Return keys scanned on the server, without reading the values.
+
+        :rtype: list
+        :return: keys of package name, version
+        """
+        keys = []
+        for redis_key in self.container.scan_iter(match=self.prefix + '*',
+                                                  count=self.scan_count):
+            if isinstance(redis_key, bytes):
+                redis_key = redis_key.decode('utf-8')
+            keys.append(tuple(json.loads(redis_key[len(self.prefix):])))
+        return keys
+
+
+class Memory(Container):
+    """Cache backend is in-process memory.
+
+    Entries are evicted in least recently used order when the total of
+    their serialized sizes exceeds ``max_bytes``.
+    """
+
+    #: default total size of entries
+    default_max_bytes = 64 * 1024 * 1024
+
+    def __init__(self, max_bytes=None, max_entries=None, serializer=None):
+        """Initialize.
+
+        :param int max_bytes: total size of entries
+        :param int max_entries: number of entries (default: unbounded)
+        :param serializer: serializer measuring the size (default: binary)
+        """
+        super().__init__()
+        if max_bytes is None:
+            max_bytes = self.default_max_bytes
+        if max_entries is None:
+            max_entries = sys.maxsize
+        self.measure = serializer or BinarySerializer()
+        self.container = LRU(max_entries, max_bytes=max_bytes)
+
+    def store_data(self, key, data):
+        """Store traced_chain data.
+
+        :param tuple key: package name, version
+        :param list data: traced dependency chain data
+        """
+        self.container.set(key, data, size=len(self.measure.dumps(data)))
+
+    def read_data(self, key):
+        """Read traced_chain data.
+
+        :rtype: list
+        :return: dependency chain list
+
+        :param tuple key: package name, version
+        """
+        return self.container.get(key)
+
+    def list_data(self):
+        """Return dictionary stored package metadata.
+
+        :rtype: dict
+        :return: packages metadata
+        """
+        return {key: entry[1]
+                for key, entry in self.container.entries.items()}
+
+    def list_keys(self):
+        """Return keys of stored package metadata.
+
+        :rtype: list
+        :return: keys of package name, version
+        """
+        return list(self.container.entries)
+
+
+class Tiered(Container):
+    """Cache backend chaining tiers, from the fastest to the shared one.
+
+    Reads look up the tiers in order, and promote the found entries to
+    the faster tiers, unless the tier does not :attr:`promote` them, as
+    the snapshot shared by the processes. Writes go through all tiers.
+    The hits of each tier are counted in :attr:`hits` and reported as
+    ``tier_hits`` to :data:`py_deps.metrics.instrument`.
+    """
+
+    def __init__(self, tiers):
+        """Initialize.
+
+        :param list tiers: :class:`Container` objects
+        """
+        super().__init__()
+        self.tiers = tiers
+        self.container = tiers[-1].container
+        #: hits by tier name, and misses as ``miss``
+        self.hits = dict.fromkeys(self.names + ['miss'], 0)
+
+    @property
+    def names(self):
+        """Return names of tiers."""
+        return [type(tier).__name__ for tier in self.tiers]
+
+    def _count(self, name, value):
+        self.hits[name] += value
+        if name == 'miss':
+            metrics.instrument.count('tier_misses', value)
+        else:
+            metrics.instrument.count('tier_hits', value, tier=name)
+
+    def store_data(self, key, data):
+        """Store traced_chain data to all tiers.
+
+        :param tuple key: package name, version
+        :param list data: traced dependency chain data
+        """
+        self.store_many({key: data})
+
+    def store_many(self, mapping):
+        """Store traced_chain data of packages to all tiers.
+
+        :param dict mapping: traced dependency chain data by key
+        """
+        for tier in self.tiers:
+            tier.store_many(mapping)
+
+    def read_data(self, key):
+        """Read traced_chain data.
+
+        :rtype: list
+        :return: dependency chain list
+
+        :param tuple key: package name, version
+        """
+        return self.read_many([key]).get(key)
+
+    def read_many(self, keys):
+        """Read traced_chain data of packages.
+
+        :rtype: dict
+        :return: dependency chain list by key, without missing keys
+
+        :param list keys: keys of package name, version
+        """
+        result = {}
+        missing = list(keys)
+        for level, (name, tier) in enumerate(zip(self.names, self.tiers)):
+            if not missing:
+                break
+            found = tier.read_many(missing)
+            if found:
+                self._count(name, len(found))
+                if tier.promote:
+                    for upper in self.tiers[:level]:
+                        upper.store_many(found)
+                result.update(found)
+                missing = [key for key in missing if key not in found]
+        if missing:
+            self._count('miss', len(missing))
+        return result
+
+    def list_data(self):
+        """Return dictionary stored package metadata of the last tier.
+
+        :rtype: dict
+        :return: packages metadata
+        """
+        return self.tiers[-1].list_data()
+
+    def list_keys(self):
+        """Return keys of stored package metadata of the last tier.
+
+        :rtype: list
+        :return: keys of package name, version
+        """
+        return self.tiers[-1].list_keys()
+
+
+class LRU:
+    """Least recently used in-process cache."""
+
+    def __init__(self, maxsize=128, ttl=None, max_bytes=None):
+        """Initialize.
+
+        :param int maxsize: number of entries, 0 disables caching
+        :param float ttl: seconds to keep entries, ``None`` is forever
+        :param int max_bytes: total size of entries, ``None`` is unbounded
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        #: total size of entries
+        self.size = 0
+        #: (expiration, value, size) by key
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        """Return number of entries."""
+        return len(self.entries)
+
+    def get(self, key):
+        """Return value, or ``None`` if missing or expired."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expiration, value, _ = entry
+        if expiration is not None and expiration < time.monotonic():
+            self.pop(key)
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    def set(self, key, value, size=0):
+        """Set value, and evict least recently used entries.
+
+        :param key: key
+        :param value: value
+        :param int size: size of value in bytes
+        """
+        if self.maxsize <= 0:
+            return
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.pop(key)
+            return
+        expiration = None
+        if self.ttl is not None:
+            expiration = time.monotonic() + self.ttl
+        self.pop(key)
+        self.entries[key] = (expiration, value, size)
+        self.size += size
+        while len(self.entries) > self.maxsize or (
+                self.max_bytes is not None and self.size > self.max_bytes):
+            _, (_, _, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+
+    def pop(self, key):
+        """Remove entry."""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def clear(self):
+        """Remove all entries."""
+        self.entries.clear()
+        self.size = 0
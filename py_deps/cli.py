@@ -0,0 +1,538 @@
+# -*- coding: utf-8 -*-
+"""py_deps.cli module."""
+import argparse
+import json
+import os
+import socket
+import sys
+from py_deps.exceptions import DaemonFailure
+
+#: environment variable of the resolver daemon socket path
+SOCKET_ENV = 'PY_DEPS_SOCKET'
+#: draw types selectable from command line
+DRAW_TYPES = {'pretty': None,
+              'linkdraw': 'linkdraw',
+              'dot': 'dot',
+              'blockdiag': 'blockdiag'}
+
+
+def request(path, payload):
+    """Send a request to the resolver daemon.
+
+    :rtype: dict, list or str
+    :return: result of the request
+
+    :param str path: Unix domain socket path of the daemon
+    :param dict payload: request, ``command`` and its arguments
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+        sock.shutdown(socket.SHUT_WR)
+        data = b''.join(iter(lambda: sock.recv(65536), b''))
+    response = json.loads(data)
+    if 'error' in response:
+        raise DaemonFailure(f"{response['error']}: {response['message']}")
+    return response.get('result')
+
+
+def cache_kwargs(args):
+    """Return parameters of :func:`py_deps.cache.backend`.
+
+    :rtype: dict
+    :param args: parsed arguments
+    """
+    return dict(cache_name=args.cache_name,
+                servers=args.servers,
+                redis_url=args.redis_url,
+                tiered=args.tiered,
+                max_entries=args.max_entries,
+                max_bytes=args.max_bytes,
+                ttl=args.ttl,
+                policy=args.policy,
+                serializer=args.serializer,
+                compression=args.compression,
+                allow_pickle=args.allow_pickle,
+                snapshot=args.snapshot)
+
+
+def parse_specs(specs):
+    """Parse package specifiers.
+
+    :rtype: list
+    :return: list of ``(name, version)``
+    :param list specs: ``name`` or ``name==version``
+    """
+    return [tuple(spec.split('==', 1)) if '==' in spec else (spec, None)
+            for spec in specs]
+
+
+def payload_from_args(args):
+    """Convert parsed arguments to a daemon request.
+
+    :rtype: dict
+    :param args: parsed arguments
+    """
+    payload = dict(command=args.command)
+    for key in ('name', 'version', 'update_force', 'exactly', 'link_prefix',
+                'old_version', 'new_version', 'max_depth', 'exclude',
+                'stub', 'deadline', 'allow_partial', 'index', 'mirror'):
+        if hasattr(args, key):
+            payload[key] = getattr(args, key)
+    if hasattr(args, 'draw_type'):
+        payload['draw_type'] = DRAW_TYPES[args.draw_type]
+    if getattr(args, 'others', None):
+        payload['others'] = parse_specs(args.others)
+    return payload
+
+
+def add_cache_options(parser):
+    """Add options of the cache backend."""
+    parser.add_argument('--cache-name',
+                        help='Pickle cache filename')
+    parser.add_argument('--servers', nargs='+',
+                        help='Memcached servers')
+    parser.add_argument('--redis-url',
+                        help='Redis URL')
+    parser.add_argument('--tiered', action='store_true',
+                        help='chain in-process memory and Pickle caches')
+    parser.add_argument('--max-entries', type=int,
+                        help='number of Pickle cache entries')
+    parser.add_argument('--max-bytes', type=int,
+                        help='total size of Pickle cache entries')
+    parser.add_argument('--ttl', type=float,
+                        help='seconds to keep cache entries')
+    parser.add_argument('--policy', choices=['lru', 'lfu'],
+                        help='eviction policy of Pickle cache entries')
+    parser.add_argument('--serializer', choices=['pickle', 'binary'],
+                        help='serializer of cached values')
+    parser.add_argument('--compression', choices=['zlib', 'zstd', 'lz4'],
+                        help='compression of cached values')
+    parser.add_argument('--allow-pickle', action='store_true', default=None,
+                        help='load pickle values of Memcached or Redis')
+    parser.add_argument('--snapshot',
+                        help='cache snapshot file shared by processes')
+
+
+def add_resolve_parser(subparsers):
+    """Add ``resolve`` command."""
+    resolve = subparsers.add_parser('resolve',
+                                    help='resolve dependencies as JSON')
+    resolve.add_argument('name')
+    resolve.add_argument('--version')
+    resolve.add_argument('--update-force', action='store_true')
+    resolve.add_argument('--max-depth', type=int,
+                         help='depth of the packages not expanded')
+    resolve.add_argument('--exclude', nargs='+', metavar='NAME',
+                         help='packages to drop')
+    resolve.add_argument('--stub', nargs='+', metavar='NAME',
+                         help='packages not to expand')
+    resolve.add_argument('--deadline', type=float,
+                         help='seconds of the resolution, '
+                         'to return the partial tree')
+    resolve.add_argument('--allow-partial', action='store_true',
+                         help='return the cached partial tree')
+    resolve.add_argument('--mirror',
+                         help='resolve from the index metadata mirror')
+
+
+def add_draw_parser(subparsers):
+    """Add ``draw`` command."""
+    draw = subparsers.add_parser('draw', help='generate drawing data')
+    draw.add_argument('name')
+    draw.add_argument('others', nargs='*', metavar='name[==version]',
+                      help='draw the union graph with other packages')
+    draw.add_argument('--version')
+    draw.add_argument('--type', dest='draw_type', default='pretty',
+                      choices=sorted(DRAW_TYPES))
+    draw.add_argument('--link-prefix')
+
+
+def add_diff_parser(subparsers):
+    """Add ``diff`` command."""
+    diff = subparsers.add_parser('diff',
+                                 help='compare dependencies of two versions')
+    diff.add_argument('name')
+    diff.add_argument('old_version')
+    diff.add_argument('new_version')
+
+
+def add_search_parser(subparsers):
+    """Add ``search`` command."""
+    search = subparsers.add_parser('search', help='search packages')
+    search.add_argument('name')
+    search.add_argument('--exactly', action='store_true')
+    search.add_argument('--index',
+                        help='search the local name index file')
+    search.add_argument('--mirror',
+                        help='search the index metadata mirror')
+
+
+def add_index_parser(subparsers):
+    """Add ``index`` command."""
+    index = subparsers.add_parser('index',
+                                  help='build or update local name index')
+    index.add_argument('path', help='name index file')
+    index.add_argument('--source',
+                       help='URL or file of the simple repository '
+                       'listing, or a file of names (default: PyPI)')
+
+
+def add_latest_parser(subparsers):
+    """Add ``latest`` command."""
+    latest = subparsers.add_parser('latest', help='show latest version')
+    latest.add_argument('name')
+    latest.add_argument('--mirror',
+                        help='read the index metadata mirror')
+
+
+def add_mirror_parser(subparsers):
+    """Add ``mirror`` command."""
+    mirror = subparsers.add_parser('mirror',
+                                   help='index metadata mirror')
+    mirror.add_argument('database', help='SQLite database of the mirror')
+    mirror_commands = mirror.add_subparsers(dest='mirror_command',
+                                            required=True)
+    sync = mirror_commands.add_parser('sync', help='synchronize with '
+                                      'the change log of PyPI')
+    sync.add_argument('names', nargs='*', metavar='name',
+                      help='packages to add to the mirror')
+    sync.add_argument('--all', dest='follow_all', action='store_true',
+                      help='fetch all packages changed')
+    versions = mirror_commands.add_parser('latest',
+                                          help='show latest versions')
+    versions.add_argument('names', nargs='+', metavar='name')
+
+
+def add_cache_parsers(subparsers):
+    """Add ``list-cache``, ``compact``, ``serve`` and ``snapshot`` commands."""
+    subparsers.add_parser('list-cache', help='list cached packages')
+    subparsers.add_parser('compact',
+                          help='drop expired, unreadable and evicted '
+                          'entries from Pickle cache')
+    subparsers.add_parser('serve', help='run resolver daemon')
+    snapshot = subparsers.add_parser('snapshot',
+                                     help='publish cache snapshot file')
+    snapshot.add_argument('path', help='snapshot file name')
+
+
+def add_scan_parser(subparsers):
+    """Add ``scan`` command."""
+    scan = subparsers.add_parser('scan', help='resolve packages installed '
+                                 'in environments, and store to cache')
+    scan.add_argument('paths', nargs='*', metavar='path',
+                      help='prefixes of environments or site-packages '
+                      '(default: current environment)')
+    scan.add_argument('--type', dest='draw_type', choices=sorted(DRAW_TYPES),
+                      help='draw the union graph instead of the trees')
+    scan.add_argument('--link-prefix')
+    scan.add_argument('--update-force', action='store_true')
+
+
+def add_profile_summary_parser(subparsers):
+    """Add ``profile-summary`` command."""
+    summary = subparsers.add_parser('profile-summary',
+                                    help='aggregate hot spots of '
+                                    'profile dumps')
+    summary.add_argument('directory', help='directory of the dumps')
+    summary.add_argument('--limit', type=int, default=20,
+                         help='number of hot spots')
+
+
+def add_batch_parser(subparsers):
+    """Add ``batch`` command."""
+    batch = subparsers.add_parser('batch',
+                                  help='resolve packages in worker processes')
+    batch.add_argument('specs', nargs='+', metavar='name[==version]')
+    batch.add_argument('--workers', type=int,
+                       help='number of resolver processes '
+                       '(default: number of CPUs)')
+    batch.add_argument('--timeout', type=float,
+                       help='seconds per package')
+    batch.add_argument('--update-force', action='store_true')
+
+
+def add_queue_parser(subparsers):
+    """Add ``queue`` command."""
+    queue = subparsers.add_parser('queue',
+                                  help='distribute resolutions with '
+                                  'a work queue')
+    queue.add_argument('database', help='SQLite database of the queue')
+    queue.add_argument('--max-attempts', type=int, default=3)
+    queue_commands = queue.add_subparsers(dest='queue_command',
+                                          required=True)
+    put = queue_commands.add_parser('put', help='put packages')
+    put.add_argument('specs', nargs='+', metavar='name[==version]')
+    work = queue_commands.add_parser('work', help='resolve queued packages')
+    work.add_argument('--workers', type=int, default=1,
+                      help='number of resolver processes')
+    work.add_argument('--timeout', type=float, help='seconds per package')
+    work.add_argument('--wait', action='store_true',
+                      help='wait new packages when the queue is empty')
+    queue_commands.add_parser('progress', help='show number of packages '
+                              'by state and failures')
+
+
+def add_http_parser(subparsers):
+    """Add ``http`` command."""
+    http = subparsers.add_parser('http', help='run HTTP service')
+    http.add_argument('--host', default='127.0.0.1')
+    http.add_argument('--port', type=int, default=8080)
+    http.add_argument('--workers', type=int, default=1,
+                      help='number of resolver processes')
+    http.add_argument('--max-queue', type=int, default=16,
+                      help='number of resolutions waiting a worker')
+    http.add_argument('--index',
+                      help='search the local name index file')
+    http.add_argument('--mirror',
+                      help='search and read latest versions of '
+                      'the index metadata mirror')
+
+
+#: builders of the subcommands, in the order of the help
+SUBCOMMANDS = (add_resolve_parser, add_draw_parser, add_diff_parser,
+               add_search_parser, add_index_parser, add_latest_parser,
+               add_mirror_parser, add_cache_parsers, add_scan_parser,
+               add_profile_summary_parser, add_batch_parser,
+               add_queue_parser, add_http_parser)
+
+
+def parse_options(argv=None):
+    """Parse command line arguments.
+
+    :rtype: :class:`argparse.Namespace`
+    :param list argv: arguments (default: ``sys.argv[1:]``)
+    """
+    parser = argparse.ArgumentParser(
+        prog='py-deps',
+        description='parsing the Python deps and generating graph data')
+    parser.add_argument('--socket', default=os.environ.get(SOCKET_ENV),
+                        help='Unix domain socket path of resolver daemon')
+    add_cache_options(parser)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for add_parser in SUBCOMMANDS:
+        add_parser(subparsers)
+    return parser.parse_args(argv)
+
+
+def output(result, stream=None):
+    """Write the result to stream (default: ``sys.stdout``)."""
+    if stream is None:
+        stream = sys.stdout
+    if isinstance(result, str):
+        stream.write(result + '\n')
+    else:
+        json.dump(result, stream, indent=2)
+        stream.write('\n')
+
+
+def queue_main(args):
+    """Execute ``py-deps queue`` command.
+
+    :rtype: int
+    :return: exit status
+    """
+    # pylint: disable=import-outside-toplevel
+    from py_deps.workqueue import SQLiteBroker, Worker
+    broker = SQLiteBroker(args.database, max_attempts=args.max_attempts)
+    if args.queue_command == 'put':
+        output(f'{broker.put(parse_specs(args.specs))} packages added')
+    elif args.queue_command == 'work':
+        def report(job, result):
+            sys.stderr.write(f'{job.name} {job.version or ""} '
+                             f'{result.status} {broker.progress()}\n')
+        Worker(broker, workers=args.workers, timeout=args.timeout,
+               **cache_kwargs(args)).run(wait=args.wait, callback=report)
+    else:
+        output(dict(progress=broker.progress(),
+                    failures=[dict(name=name, version=version, error=error)
+                              for name, version, error
+                              in broker.failures()]))
+    return 0
+
+
+def index_main(args):
+    """Execute ``py-deps index`` command.
+
+    :rtype: int
+    :return: exit status
+    """
+    # pylint: disable=import-outside-toplevel
+    from py_deps.index import SIMPLE_URL, NameIndex, fetch_simple
+    index = NameIndex()
+    if os.path.exists(args.path):
+        index = NameIndex.load(args.path)
+    added = index.update(fetch_simple(args.source or SIMPLE_URL))
+    index.save(args.path)
+    output(f'{added} names added, {len(index)} names')
+    return 0
+
+
+def mirror_main(args):
+    """Execute ``py-deps mirror`` command.
+
+    :rtype: int
+    :return: exit status
+    """
+    # pylint: disable=import-outside-toplevel
+    from py_deps.mirror import Mirror, PyPIFeed
+    mirror = Mirror(args.database)
+    if args.mirror_command == 'sync':
+        fetched = mirror.sync(PyPIFeed(), names=args.names,
+                              follow_all=args.follow_all)
+        output(f'{fetched} packages fetched, serial {mirror.serial()}')
+    else:
+        output(mirror.latest_versions(args.names))
+    return 0
+
+
+def serve_main(args):
+    """Execute ``py-deps serve`` command.
+
+    :rtype: int
+    :return: exit status
+    """
+    if not args.socket:
+        sys.stderr.write(f'error: --socket or {SOCKET_ENV} required\n')
+        return 2
+    # pylint: disable=import-outside-toplevel
+    from py_deps.daemon import Daemon
+    Daemon(args.socket, **cache_kwargs(args)).serve()
+    return 0
+
+
+def http_main(args):
+    """Execute ``py-deps http`` command.
+
+    :rtype: int
+    :return: exit status
+    """
+    # pylint: disable=import-outside-toplevel
+    from py_deps import service
+    service.run(host=args.host, port=args.port,
+                workers=args.workers, max_queue=args.max_queue,
+                index=args.index, mirror=args.mirror,
+                **cache_kwargs(args))
+    return 0
+
+
+def batch_main(args):
+    """Execute ``py-deps batch`` command.
+
+    :rtype: int
+    :return: exit status, 1 when any package is not resolved
+    """
+    # pylint: disable=import-outside-toplevel
+    from py_deps.pool import ResolverPool
+    pool = ResolverPool(workers=args.workers, timeout=args.timeout,
+                        **cache_kwargs(args))
+    results = [dict(name=result.name, version=result.version,
+                    status=result.status, error=result.error)
+               for result in pool.run(parse_specs(args.specs),
+                                      update_force=args.update_force)]
+    output(results)
+    return int(any(result['status'] in ('failed', 'timeout', 'crashed')
+                   for result in results))
+
+
+def profile_summary_main(args):
+    """Execute ``py-deps profile-summary`` command.
+
+    :rtype: int
+    :return: exit status
+    """
+    # pylint: disable=import-outside-toplevel
+    from py_deps.profiling import summarize
+    output(summarize(args.directory, limit=args.limit))
+    return 0
+
+
+def scan_main(args):
+    """Execute ``py-deps scan`` command.
+
+    :rtype: int
+    :return: exit status
+    """
+    # pylint: disable=import-outside-toplevel
+    from py_deps import cache
+    from py_deps.environment import Environment
+    env = Environment(args.paths or None)
+    env.store(cache.backend(**cache_kwargs(args)),
+              update_force=args.update_force)
+    if args.draw_type:
+        output(env.draw(DRAW_TYPES[args.draw_type],
+                        link_prefix=args.link_prefix))
+    else:
+        output([dict(name=node.name, version=node.version,
+                     tree=node.to_dict())
+                for node in env.traced_chain])
+    return 0
+
+
+def compact_main(args):
+    """Execute ``py-deps compact`` command.
+
+    :rtype: int
+    :return: exit status
+    """
+    # pylint: disable=import-outside-toplevel
+    from py_deps import cache
+    container = cache.pickle_backend(**cache_kwargs(args))
+    output(f'{container.compact()} entries dropped')
+    return 0
+
+
+def snapshot_main(args):
+    """Execute ``py-deps snapshot`` command.
+
+    :rtype: int
+    :return: exit status
+    """
+    # pylint: disable=import-outside-toplevel
+    from py_deps import cache
+    from py_deps.snapshot import Snapshot
+    kwargs = cache_kwargs(args)
+    kwargs['snapshot'] = None
+    count = Snapshot.publish(cache.backend(**kwargs).list_data(), args.path)
+    output(f'{count} entries published')
+    return 0
+
+
+#: commands executed in this process, not by the resolver daemon
+LOCAL_COMMANDS = {'serve': serve_main,
+                  'http': http_main,
+                  'batch': batch_main,
+                  'queue': queue_main,
+                  'index': index_main,
+                  'profile-summary': profile_summary_main,
+                  'scan': scan_main,
+                  'mirror': mirror_main,
+                  'compact': compact_main,
+                  'snapshot': snapshot_main}
+
+
+def main(argv=None):
+    """Execute ``py-deps`` command.
+
+    :rtype: int
+    :return: exit status
+    """
+    args = parse_options(argv)
+    if args.command in LOCAL_COMMANDS:
+        return LOCAL_COMMANDS[args.command](args)
+    payload = payload_from_args(args)
+    try:
+        if args.socket:
+            result = request(args.socket, payload)
+        else:
+            # The daemon module imports pip, so that clients talking to
+            # a daemon import it only when executing locally.
+            # pylint: disable=import-outside-toplevel
+            from py_deps import cache, daemon
+            result = daemon.execute(payload,
+                                    cache.backend(**cache_kwargs(args)))
+    except Exception as exc:  # pylint: disable=broad-except
+        sys.stderr.write(f'error: {exc}\n')
+        return 1
+    output(result)
+    return 0
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""py_deps.daemon module.
+
+The resolver daemon keeps the imported modules and the opened cache
+backend warm, and answers the requests of the command line clients
+over a Unix domain socket. One request per connection, encoded as a
+line of JSON.
+"""
+import json
+import os
+import socketserver
+import stat
+from py_deps import cache, diff
+from py_deps.deps import Package, Requirements, search, latest_version
+
+#: request parameters of the bounds of resolution
+BOUNDS = ('max_depth', 'exclude', 'stub', 'deadline', 'allow_partial')
+
+
+def execute(payload, container):
+    """Execute a request.
+
+    :rtype: dict, list or str
+    :return: JSON serializable result
+
+    :param dict payload: request, ``command`` and its arguments
+    :param container: cache backend
+    :type container: :class:`py_deps.cache.Container`
+    """
+    command = payload.get('command')
+    if command == 'resolve':
+        kwargs = {key: payload[key] for key in BOUNDS
+                  if payload.get(key) is not None}
+        if payload.get('mirror'):
+            kwargs.update(resolver='mirror', mirror=payload['mirror'])
+        pkg = Package(payload.get('name'),
+                      version=payload.get('version'),
+                      update_force=payload.get('update_force', False),
+                      cache=container, **kwargs)
+        result = dict(name=pkg.name,
+                      version=pkg.version,
+                      incomplete=pkg.incomplete,
+                      tree=[node.to_dict() for node in pkg.traced_chain])
+    elif command == 'draw':
+        if payload.get('others'):
+            specs = [(payload.get('name'), payload.get('version'))]
+            specs.extend(tuple(spec) for spec in payload.get('others'))
+            pkg = Requirements(specs=specs, cache=container)
+        else:
+            pkg = Package(payload.get('name'),
+                          version=payload.get('version'),
+                          cache=container)
+        result = pkg.draw(draw_type=payload.get('draw_type'),
+                          link_prefix=payload.get('link_prefix'))
+    elif command == 'diff':
+        old, new = [Package(payload.get('name'),
+                            version=payload.get(key),
+                            cache=container).traced_chain
+                    for key in ('old_version', 'new_version')]
+        result = diff.diff(old, new)._asdict()
+    elif command == 'search':
+        result = search(payload.get('name'),
+                        exactly=payload.get('exactly', False),
+                        index=payload.get('index'),
+                        mirror=payload.get('mirror'),
+                        cache=container)
+    elif command == 'latest':
+        result = latest_version(payload.get('name'),
+                                mirror=payload.get('mirror'),
+                                cache=container)
+    elif command == 'list-cache':
+        result = sorted([list(key) for key in container.list_keys()],
+                        key=str)
+    else:
+        raise ValueError(f'unknown command: {command}')
+    return result
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Handle a request from the command line client."""
+
+    def handle(self):
+        """Read a request and write the response."""
+        try:
+            payload = json.loads(self.rfile.readline())
+            if payload.get('command') == 'shutdown':
+                self.server.shutdown_requested = True
+                response = dict(result=None)
+            else:
+                response = dict(result=execute(payload,
+                                               self.server.container))
+        # pylint: disable=broad-except
+        except Exception as exc:
+            response = dict(error=type(exc).__name__, message=str(exc))
+        self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+def is_socket(path):
+    """Return whether the path is a socket, not following a symlink."""
+    try:
+        return stat.S_ISSOCK(os.lstat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+class Daemon(socketserver.UnixStreamServer):
+    """Resolver daemon.
+
+    Requests are served one by one, because :class:`py_deps.deps.Package`
+    changes ``sys.path`` and the global ``pkg_resources.working_set``.
+    """
+
+    def __init__(self, path, **kwargs):
+        """Initialize.
+
+        :param str path: Unix domain socket path
+        :param kwargs: parameters of :func:`py_deps.cache.backend`
+        """
+        if is_socket(path):
+            os.remove(path)
+        # the socket is created accessible only by the owner
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, RequestHandler)
+        finally:
+            os.umask(umask)
+        #: cache backend kept open while serving
+        self.container = cache.backend(**kwargs)
+        self.shutdown_requested = False
+
+    def serve(self):
+        """Serve until the ``shutdown`` command is received."""
+        try:
+            while not self.shutdown_requested:
+                self.handle_request()
+        finally:
+            self.server_close()
+
+    def server_close(self):
+        """Close the socket and remove the socket file."""
+        super().server_close()
+        if is_socket(self.server_address):
+            os.remove(self.server_address)
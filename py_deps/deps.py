@@ -1,21 +1,43 @@
 # -*- coding: utf-8 -*-
 """py_deps.deps module."""
-import os
+import json
 import pkg_resources
 import sys
 import subprocess
-import tempfile
-from glob import glob
+import time
 import xmlrpc.client as xmlrpclib
-from pip._internal.utils.misc import rmtree
 from pip._internal.commands.show import search_packages_info
-from py_deps import graph, cache
-from py_deps.exceptions import BackendFailure
+from py_deps import graph, cache, envpool, metrics, profiling
+from py_deps.bounds import Bounds, partial_key
+from py_deps.index import get_index
+from py_deps.mirror import get_mirror
+from py_deps.metadata import nodes_from_report
+from py_deps.exceptions import BackendFailure, BrokenPackage, NotFound
+from py_deps.wheelhouse import Wheelhouse
 
 
-#: suffix of temporary directory name
-SUFFIX = '-py_deps'
 PYPI_URL = 'https://pypi.python.org/pypi'
+#: last element of negative cache keys
+FAILURE = 'failure'
+#: default seconds to keep negative cache entries
+FAILURE_TTL = 3600
+#: exceptions stored as negative cache entries
+FAILURES = {'NotFound': NotFound, 'BrokenPackage': BrokenPackage}
+#: pip messages of network failures, not cached
+BACKEND_FAILURE_MESSAGES = ('Max retries exceeded',
+                            'Temporary failure in name resolution',
+                            'Connection refused',
+                            'Network is unreachable',
+                            'Read timed out')
+#: failures of PyPI XML-RPC requests, raised as BackendFailure, not cached
+RPC_FAILURES = (OSError, xmlrpclib.ProtocolError, xmlrpclib.Fault)
+#: version element of negative cache keys of :func:`search`
+SEARCH = ':search'
+#: version element of negative cache keys of :func:`latest_version`
+LATEST = ':latest'
+#: pip messages of missing packages and versions
+NOT_FOUND_MESSAGES = ('No matching distribution found',
+                      'Could not find a version that satisfies')
 
 
 def u2h(name):
@@ -29,58 +51,165 @@ def u2h(name):
     return name.replace('_', '-')
 
 
-def search(pkg_name, exactly=False):
+def search(pkg_name, exactly=False, index=None, mirror=None, **kwargs):
     """Search package.
 
+    Names not found on PyPI are stored as negative cache entries,
+    and found empty without a request while the entries are kept.
+
     :rtype: list
     :return: search packages
 
     :param str pkg_name: package name.
     :param bool exactly: exactly match only.
+    :param index: search the local index instead of PyPI,
+                  file or :class:`py_deps.index.NameIndex`
+    :param mirror: search the packages mirrored instead of PyPI,
+                   database file or :class:`py_deps.mirror.Mirror`
+    :param kwargs: ``cache`` backend of negative cache entries,
+                   ``failure_ttl`` seconds to keep them
     """
+    if mirror is not None:
+        return get_mirror(mirror).search(pkg_name, exactly)
+    if index is not None:
+        return [dict(name=name)
+                for name in get_index(index).search(pkg_name, exactly)]
+    key = (u2h(pkg_name), SEARCH)
+    container = kwargs.get('cache')
+    if container is not None and read_failure(container, key) is not None:
+        return []
     try:
         client = xmlrpclib.ServerProxy(PYPI_URL)
         result = client.search({'name': pkg_name})
-        # pylint: disable=undefined-variable
-    except (TimeoutError,
-            ConnectionRefusedError,
-            xmlrpclib.ProtocolError) as exc:
+    except RPC_FAILURES as exc:
         raise BackendFailure(exc) from exc
+    if not result and container is not None:
+        store_failure(container, key, NotFound(f'{pkg_name} not on PyPI'),
+                      kwargs.get('failure_ttl', FAILURE_TTL))
     if exactly:
         result = [pkg for pkg in result
                   if u2h(pkg.get('name')) == u2h(pkg_name)]
     return result
 
 
-def latest_version(pkg_name):
+def latest_version(pkg_name, mirror=None, **kwargs):
     """Retrieve latest version.
 
+    Packages without releases on PyPI are stored as negative cache
+    entries, as :func:`search`.
+
     :rtype: str
     :return: latest version
 
     :param str pkg_name: package name.
+    :param mirror: read the mirror instead of PyPI,
+                   database file or :class:`py_deps.mirror.Mirror`
+    :param kwargs: ``cache`` backend of negative cache entries,
+                   ``failure_ttl`` seconds to keep them
     """
+    if mirror is not None:
+        return get_mirror(mirror).latest_version(pkg_name) or ''
+    key = (u2h(pkg_name), LATEST)
+    container = kwargs.get('cache')
+    if container is not None and read_failure(container, key) is not None:
+        return ''
     try:
         client = xmlrpclib.ServerProxy(PYPI_URL)
         package_releases = client.package_releases(pkg_name)
-        # pylint: disable=undefined-variable
-    except (TimeoutError,
-            ConnectionRefusedError,
-            xmlrpclib.ProtocolError) as exc:
+    except RPC_FAILURES as exc:
         raise BackendFailure(exc) from exc
     if package_releases:
         result = package_releases[0]
     else:
         result = ''
+        if container is not None:
+            store_failure(container, key,
+                          NotFound(f'{pkg_name} has no releases on PyPI'),
+                          kwargs.get('failure_ttl', FAILURE_TTL))
     return result
 
 
-def create_nodes(package_names, depth=0):
-    """Show information about installed package."""
+def classify(exc):
+    """Classify failure of pip command.
+
+    :rtype: :class:`py_deps.exceptions.Error`
+    :return: :class:`BackendFailure`, :class:`NotFound` or
+             :class:`BrokenPackage` with the last lines of pip errors
+
+    :param exc: failure of pip command
+    :type exc: :class:`subprocess.CalledProcessError`
+    """
+    stderr = exc.stderr or ''
+    if isinstance(stderr, bytes):
+        stderr = stderr.decode('utf-8', 'replace')
+    detail = '\n'.join(stderr.strip().splitlines()[-20:]) or str(exc)
+    if any(message in stderr for message in BACKEND_FAILURE_MESSAGES):
+        return BackendFailure(detail)
+    if any(message in stderr for message in NOT_FOUND_MESSAGES):
+        return NotFound(detail)
+    return BrokenPackage(detail)
+
+
+def failure_key(key):
+    """Return negative cache key.
+
+    :rtype: tuple
+    :param tuple key: package name, version
+    """
+    return tuple(key) + (FAILURE,)
+
+
+def store_failure(container, key, error, ttl=FAILURE_TTL):
+    """Store negative cache entry of :data:`FAILURES` error.
+
+    :param container: cache backend
+    :type container: :class:`py_deps.cache.Container`
+    :param tuple key: package name, version
+    :param error: classified error
+    :param float ttl: seconds to keep, ``0`` not to store,
+                      ``None`` to keep forever
+    """
+    if type(error).__name__ not in FAILURES or ttl == 0:
+        return
+    expires = None if ttl is None else time.time() + ttl
+    container.store_data(failure_key(key),
+                         dict(error=type(error).__name__,
+                              detail=str(error),
+                              expires=expires))
+
+
+def read_failure(container, key):
+    """Read negative cache entry.
+
+    :rtype: :class:`py_deps.exceptions.Error`
+    :return: stored error, or ``None`` when not stored or expired
+
+    :param container: cache backend
+    :type container: :class:`py_deps.cache.Container`
+    :param tuple key: package name, version
+    """
+    data = container.read_data(failure_key(key))
+    if not isinstance(data, dict) or data.get('error') not in FAILURES:
+        return None
+    if data.get('expires') is not None and data['expires'] < time.time():
+        return None
+    return FAILURES[data['error']](data.get('detail'))
+
+
+def create_nodes(package_names, depth=0, bounds=None):
+    """Show information about installed package.
+
+    :param bounds: bounds of the tree
+    :type bounds: :class:`py_deps.bounds.Bounds`
+    """
+    if bounds is None:
+        bounds = Bounds()
     nodes = list()
     results = search_packages_info(package_names)
     try:
         for _, dist in enumerate(results):
+            if bounds.excludes(dist.get('name')):
+                continue
             node = Node(
                 dist.get('name'),
                 dist.get('version'),
@@ -89,8 +218,12 @@ def create_nodes(package_names, depth=0):
                 depth=depth
             )
             if len(dist.get('requires')) > 0:
-                _nodes = create_nodes(dist.get('requires'), node.depth + 1)
-                node.targets += _nodes
+                if bounds.expands(node.name, node.depth):
+                    _nodes = create_nodes(dist.get('requires'),
+                                          node.depth + 1, bounds)
+                    node.targets += _nodes
+                else:
+                    node.incomplete = True
             nodes.append(node)
     except StopIteration:
         pass
@@ -105,27 +238,202 @@ class Package:
     #: index_url
     index_url = 'https://pypi.python.org/simple'
     pip_command = 'pip'
+    #: resolvers
+    resolvers = ('install', 'report', 'mirror')
+    #: render the shared nodes once
+    union = False
 
     def __init__(self, name, version=None, update_force=False, **kwargs):
-        """Initialize to parsing dependencies of package."""
+        """Initialize to parsing dependencies of package.
+
+        :param kwargs: parameters of :func:`py_deps.cache.backend`,
+                       ``cache`` to reuse an opened
+                       :class:`py_deps.cache.Container`,
+                       ``wheelhouse`` directory or
+                       :class:`py_deps.wheelhouse.Wheelhouse` to reuse
+                       downloaded files, ``wheelhouse_bytes`` to bound
+                       the wheelhouse, ``offline`` to install from
+                       the wheelhouse only, ``envpool`` directory or
+                       :class:`py_deps.envpool.EnvPool` to lease
+                       the directories where pip installs, and
+                       ``resolver``, ``install`` (default) to read the
+                       installed metadata, or ``report`` to read
+                       the installation report of pip without installing,
+                       or ``mirror`` to read the ``mirror`` database file
+                       or :class:`py_deps.mirror.Mirror` without network,
+                       ``failure_ttl`` seconds to keep the failures
+                       as negative cache entries, ``max_depth``,
+                       ``exclude``, ``stub`` and ``deadline`` of
+                       :class:`py_deps.bounds.Bounds`, and
+                       ``allow_partial`` to read the tree cut by
+                       the deadline when the complete tree is not cached,
+                       and ``profile`` directory or
+                       :class:`py_deps.profiling.Profiler` to profile
+                       the resolution and the graph export.
+        :raises NotFound: the package or the version is not found
+        :raises BrokenPackage: pip fails to install the package
+        :raises BackendFailure: pip fails to connect the index
+        """
         #: package name
         self.name = name
         self.version = version
-        self._cache = cache.backend(**kwargs)
+        wheelhouse = kwargs.get('wheelhouse')
+        if isinstance(wheelhouse, str):
+            wheelhouse = Wheelhouse(wheelhouse,
+                                    max_bytes=kwargs.get('wheelhouse_bytes'))
+        #: wheelhouse
+        self.wheelhouse = wheelhouse
+        #: install from the wheelhouse without the index
+        self.offline = kwargs.get('offline', False)
+        #: seconds to keep negative cache entries
+        self.failure_ttl = kwargs.get('failure_ttl', FAILURE_TTL)
+        #: resolver
+        self.resolver = kwargs.get('resolver') or 'install'
+        #: index metadata mirror of ``mirror`` resolver
+        self.mirror = self.__get_mirror(kwargs.get('mirror'))
+        if kwargs.get('cache') is None:
+            self._cache = cache.backend(**kwargs)
+        else:
+            self._cache = kwargs.get('cache')
         self.container = self._cache.container
-        self.tempdir = tempfile.mkdtemp(suffix=SUFFIX)
+        #: pool of install directories
+        self.envpool = envpool.get_pool(kwargs.get('envpool'))
+        #: bounds of the resolution
+        self.bounds = Bounds(max_depth=kwargs.get('max_depth'),
+                             exclude=kwargs.get('exclude'),
+                             stub=kwargs.get('stub'),
+                             deadline=kwargs.get('deadline'))
+        #: the tree is cut by the deadline, or for lack of the metadata
+        self.incomplete = False
+        #: profiler, when profiling this package
+        self.profiler = profiling.get_profiler(kwargs.get('profile'))
+        #: leased install directory, only while installing
+        self.tempdir = None
+        self._lease = None
+
+        context = dict(name=self.name, version=self.version)
+        with metrics.instrument.timer('cache_read', context):
+            self.traced_chain = self.__read_cache(
+                allow_partial=not update_force and kwargs.get('allow_partial'))
+        try:
+            if self.traced_chain is None or update_force:
+                self.traced_chain = self.__resolve_missed(update_force,
+                                                          context)
+            else:
+                metrics.instrument.count('cache_hits', context=context,
+                                         backend=type(self._cache).__name__)
+        finally:
+            with metrics.instrument.timer('cleanup', context):
+                self.cleanup()
+        metrics.instrument.observe('nodes',
+                                   metrics.count_nodes(self.traced_chain),
+                                   context=context)
+        metrics.instrument.observe('tree_depth',
+                                   metrics.tree_depth(self.traced_chain),
+                                   context=context)
+
+    def __get_mirror(self, mirror):
+        """Return the index metadata mirror of ``mirror`` resolver.
+
+        :rtype: :class:`py_deps.mirror.Mirror`
+        :return: mirror, ``None`` with the other resolvers
+        :param mirror: database file or :class:`py_deps.mirror.Mirror`
+        """
+        if self.resolver not in self.resolvers:
+            raise ValueError(f'unknown resolver: {self.resolver}')
+        if self.resolver != 'mirror':
+            return None
+        if mirror is None:
+            raise ValueError('mirror resolver requires mirror')
+        return get_mirror(mirror)
+
+    def __read_cache(self, allow_partial=False):
+        """Read the tree bounded, or the tree cut by the deadline.
+
+        :rtype: list
+        :return: traced chain, ``None`` when not cached
+        :param bool allow_partial: read the tree cut by the deadline
+                                   when the complete tree is not cached
+        """
+        key = self.bounds.key((self.name, self.version))
+        traced_chain = self._cache.read_data(key)
+        if traced_chain is None and allow_partial:
+            traced_chain = self._cache.read_data(partial_key(key))
+            self.incomplete = traced_chain is not None
+        return traced_chain
+
+    def __resolve_missed(self, update_force, context):
+        """Resolve the package not cached, and store the tree.
 
+        The failures are stored as negative cache entries, and raised
+        again until they expire.
+
+        :rtype: list
+        :return: traced chain
+        """
         pkg_ver = (self.name, self.version)
-        if self._cache.read_data(pkg_ver) is None or update_force:
-            self.install()
-            self.__load_path()
-            self.requires = create_nodes([name])
-            self.__restore_path()
-            self.traced_chain = self.requires
-            self._cache.store_data(pkg_ver, self.traced_chain)
-        else:
-            self.traced_chain = self._cache.read_data(pkg_ver)
-        self.cleanup()
+        backend = type(self._cache).__name__
+        metrics.instrument.count('cache_misses', context=context,
+                                 backend=backend)
+        failure = None
+        if not update_force:
+            failure = read_failure(self._cache, pkg_ver)
+        if failure is not None:
+            metrics.instrument.count('negative_hits', context=context,
+                                     backend=backend)
+            raise failure
+        try:
+            with profiling.profile(self.profiler, self.name, self.version,
+                                   'resolve'):
+                self.__resolve(context)
+        except subprocess.CalledProcessError as exc:
+            failure = classify(exc)
+            store_failure(self._cache, pkg_ver, failure, self.failure_ttl)
+            raise failure from exc
+        key = self.bounds.key(pkg_ver)
+        if self.incomplete:
+            key = partial_key(key)
+        with metrics.instrument.timer('store_data', context):
+            self._cache.store_data(key, self.requires)
+        return self.requires
+
+    def __resolve(self, context):
+        """Resolve dependencies with the resolver.
+
+        When pip does not finish by the deadline, the tree is the root
+        node only. The tree is incomplete when cut by the deadline, or
+        by the releases without metadata of ``mirror`` resolver.
+        """
+        timer = metrics.instrument.timer
+        try:
+            if self.resolver == 'mirror':
+                with timer('create_nodes', context):
+                    self.requires = self.mirror.nodes(self.name,
+                                                      self.version,
+                                                      bounds=self.bounds)
+            elif self.resolver == 'report':
+                with timer('install', context):
+                    report = self.report()
+                with timer('create_nodes', context):
+                    self.requires = nodes_from_report(report, self.bounds)
+            else:
+                self._lease = self.envpool.lease()
+                self.tempdir = self._lease.path
+                with timer('install', context):
+                    self.install()
+                with timer('load_path', context):
+                    self.__load_path()
+                with timer('create_nodes', context):
+                    self.requires = create_nodes([self.name],
+                                                 bounds=self.bounds)
+                with timer('restore_path', context):
+                    self.__restore_path()
+        except subprocess.TimeoutExpired:
+            self.requires = [Node(self.name, self.version, incomplete=True)]
+            self.bounds.cut = True
+        self.incomplete = self.bounds.cut
+        if self.incomplete and self.bounds.expired():
+            metrics.instrument.count('deadlines', context=context)
 
     # pylint: disable=protected-access
     def __load_path(self):
@@ -139,43 +447,172 @@ class Package:
         pkg_resources.working_set = pkg_resources.WorkingSet._build_master()
 
     def cleanup(self, alldir=False):
-        """Cleanup temporary build directory.
+        """Release temporary build directory.
 
-        :param bool alldir: Remove all temporary directories. (default: False)
+        :param bool alldir: Remove all directories of the pool
+                            not leased by any resolver. (default: False)
 
         :rtype: None
         """
+        if self._lease is not None:
+            self._lease.release()
+            self._lease = None
+            self.tempdir = None
         if alldir:
-            [rmtree(tempdir, ignore_errors=True)
-             for tempdir in
-             glob("{0}/tmp*{1}".format(os.path.dirname(self.tempdir),
-                                       SUFFIX))]
-        else:
-            rmtree(self.tempdir, ignore_errors=True)
+            self.envpool.clear()
 
-    def install(self):
-        """Install packages to build_dir."""
+    @property
+    def spec(self):
+        """Return requirement specifier of package.
+
+        :rtype: str
+        """
         if self.version is None:
-            cmdline = (f'{self.pip_command} install --isolated '
-                       f'-t {self.tempdir} {self.name}')
-        else:
-            cmdline = (f'{self.pip_command} install --isolated '
-                       f'-t {self.tempdir} {self.name}=={self.version}')
-        subprocess.run(cmdline.split(), check=True)
+            return self.name
+        return f'{self.name}=={self.version}'
+
+    def pip(self, *args, **kwargs):
+        """Run pip command.
+
+        Errors of pip are captured to classify the failure, and pip is
+        killed at the deadline.
+
+        :rtype: :class:`subprocess.CompletedProcess`
+        :param args: arguments of pip command
+        :param kwargs: parameters of :func:`subprocess.run`
+        """
+        kwargs.setdefault('stderr', subprocess.PIPE)
+        kwargs.setdefault('timeout', self.bounds.remaining())
+        with metrics.instrument.timer('pip', dict(name=self.name,
+                                                  version=self.version)):
+            return subprocess.run(self.pip_command.split() + list(args),
+                                  check=True, **kwargs)
+
+    def report(self):
+        """Resolve packages with pip, without installing.
+
+        Requires pip 22.2 or later.
+
+        :rtype: dict
+        :return: installation report of pip
+        """
+        args = ['install', '--isolated', '--dry-run', '--ignore-installed',
+                '--quiet', '--report', '-']
+        if self.wheelhouse is None:
+            result = self.pip(*args, self.spec, stdout=subprocess.PIPE)
+            return json.loads(result.stdout)
+        args += ['--find-links', self.wheelhouse.links]
+        if self.offline:
+            args.append('--no-index')
+        with self.wheelhouse.lock():
+            result = self.pip(*args, self.spec, stdout=subprocess.PIPE)
+        return json.loads(result.stdout)
+
+    def install(self):
+        """Install packages to build_dir.
+
+        With the wheelhouse, pip builds the wheels of the package and
+        the dependencies into the wheelhouse, reusing the files already
+        stored, and installs them without the index.
+        """
+        spec = self.spec
+        if self.wheelhouse is None:
+            self.pip('install', '--isolated', '-t', self.tempdir, spec)
+            return
+        if not self.offline:
+            with self.envpool.lease() as wheel_dir:
+                with self.wheelhouse.lock():
+                    self.pip('wheel', '--isolated', '-w', wheel_dir,
+                             '--find-links', self.wheelhouse.links, spec)
+                self.wheelhouse.add_directory(wheel_dir)
+        with self.wheelhouse.lock():
+            self.pip('install', '--isolated', '--no-index',
+                     '--find-links', self.wheelhouse.links,
+                     '-t', self.tempdir, spec)
+            self.wheelhouse.touch_installed(self.tempdir)
+        self.wheelhouse.evict()
+
+    def draw(self, draw_type=None, link_prefix=None):
+        """Generate drawing data.
+
+        :param str draw_type: [dot|blockdiag|linkdraw]
+        """
+        with profiling.profile(self.profiler, self.name, self.version,
+                               'draw'):
+            return graph.router(self, draw_type=draw_type,
+                                link_prefix=link_prefix)
+
+
+class Requirements:
+    """Union of packages resolved one by one.
+
+    Renders the traced chains of all packages as one graph with
+    :func:`py_deps.graph.router`, the shared nodes emitted once.
+    """
+
+    #: render the shared nodes once
+    union = True
+
+    def __init__(self, name='requirements', specs=(), **kwargs):
+        """Initialize.
+
+        :param str name: name of the requirements set
+        :param specs: iterable of ``(name, version)`` to resolve
+        :param kwargs: parameters of :class:`Package`
+        """
+        #: name of the requirements set
+        self.name = name
+        self.version = None
+        if kwargs.get('cache') is None:
+            kwargs['cache'] = cache.backend(**kwargs)
+        self.kwargs = kwargs
+        #: profiler, when profiling the graph export
+        self.profiler = profiling.get_profiler(kwargs.get('profile'))
+        #: resolved packages
+        self.packages = []
+        #: root nodes of all packages
+        self.traced_chain = []
+        for pkg_name, version in specs:
+            self.add(pkg_name, version)
+
+    def add(self, name, version=None, update_force=False):
+        """Resolve a package and add it to the union.
+
+        :rtype: :class:`Package`
+        """
+        pkg = Package(name, version=version, update_force=update_force,
+                      **self.kwargs)
+        self.packages.append(pkg)
+        self.add_chain(pkg.traced_chain)
+        return pkg
+
+    def add_chain(self, chain_data):
+        """Add a traced chain resolved elsewhere to the union.
+
+        :param list chain_data: List of `deps.Node`
+        """
+        self.traced_chain += chain_data
 
     def draw(self, draw_type=None, link_prefix=None):
         """Generate drawing data.
 
         :param str draw_type: [dot|blockdiag|linkdraw]
         """
-        return graph.router(self, draw_type=draw_type, link_prefix=link_prefix)
+        with profiling.profile(self.profiler, self.name, self.version,
+                               'draw'):
+            return graph.router(self, draw_type=draw_type,
+                                link_prefix=link_prefix)
 
 
 class Node:
     """Node object class."""
 
+    #: targets not expanded by the bounds
+    incomplete = False
+
     # pylint: disable=too-many-arguments
-    def __init__(self, name, version=None, url=None, requires=None, depth=0):
+    def __init__(self, name, version=None, url=None, requires=None, depth=0,
+                 incomplete=False):
         """Initialize."""
         #: name
         self.name = name
@@ -191,6 +628,20 @@ class Node:
         self.test_targets = []
         #: base dependency depth level
         self.depth = depth
+        self.incomplete = incomplete
+
+    def to_dict(self):
+        """Return the dependency tree of this node.
+
+        :rtype: dict
+        :return: node metadata with nested ``targets``
+        """
+        return dict(name=self.name,
+                    version=self.version,
+                    url=self.url,
+                    depth=self.depth,
+                    incomplete=self.incomplete,
+                    targets=[target.to_dict() for target in self.targets])
 
     def __repr__(self):
         """Return Node object name."""
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""py_deps.diff module.
+
+Structural diff of two traced chains, such as two versions of a package.
+
+Every subtree is hashed from the canonical package name, the version and
+the sorted hashes of the children. The trees are compared from the
+roots, and the subtrees of the same hash are skipped without walking.
+
+The diff is reported on the dependency graph: packages by name, and
+the edges from the requiring package to the required package. A package
+required in several subtrees is added or removed only when it is added
+to or removed from the whole graph.::
+
+    >>> from py_deps import diff
+    >>> from py_deps.deps import Package
+    >>> result = diff.diff(Package('requests', '2.25.1').traced_chain,
+    ...                    Package('requests', '2.28.1').traced_chain)
+    >>> result.changed
+    [('idna', '2.10', '3.4'), ('requests', '2.25.1', '2.28.1'), ...]
+"""
+import hashlib
+from collections import namedtuple
+from py_deps.metadata import canonical_name
+
+#: diff of traced chains, lists sorted by name
+Diff = namedtuple('Diff', ['added', 'removed', 'changed',
+                           'added_edges', 'removed_edges'])
+
+
+def versions_text(versions):
+    """Return versions as a string.
+
+    :rtype: str
+    :param set versions: versions of a package
+    """
+    return ', '.join(sorted(str(version) for version in versions))
+
+
+class TreeIndex:
+    """Subtree hashes and graph of a traced chain.
+
+    Build the index once per chain to compare the chain many times.
+    """
+
+    def __init__(self, chain_data):
+        """Initialize.
+
+        :param list chain_data: List of `deps.Node`
+        """
+        self.chain_data = chain_data
+        #: subtree digests by ``id(node)``
+        self.hashes = {}
+        #: versions by canonical name
+        self.versions = {}
+        #: display names by canonical name
+        self.names = {}
+        #: edges of canonical names, (requiring, required)
+        self.edges = set()
+        stack = [(node, False) for node in chain_data]
+        while stack:
+            node, visited = stack.pop()
+            if not visited:
+                key = canonical_name(node.name)
+                self.names.setdefault(key, node.name)
+                self.versions.setdefault(key, set()).add(node.version)
+                self.edges.update((key, canonical_name(target.name))
+                                  for target in node.targets)
+                stack.append((node, True))
+                stack += [(target, False) for target in node.targets]
+                continue
+            parts = [canonical_name(node.name), str(node.version)]
+            parts.extend(sorted(self.hashes[id(target)]
+                                for target in node.targets))
+            source = '\0'.join(parts)
+            self.hashes[id(node)] = hashlib.sha1(
+                source.encode('utf-8')).hexdigest()
+        #: digest of the whole chain
+        self.digest = hashlib.sha1('\0'.join(
+            sorted(self.hashes[id(node)] for node in chain_data)).encode(
+                'utf-8')).hexdigest()
+
+    def name(self, key):
+        """Return display name of canonical name."""
+        return self.names.get(key, key)
+
+
+def by_name(nodes):
+    """Return nodes by canonical name."""
+    return {canonical_name(node.name): node for node in nodes}
+
+
+def collect(node, keys, edges):
+    """Collect names and edges of a subtree.
+
+    :param node: root of subtree
+    :param set keys: canonical names to update
+    :param set edges: edges to update
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        key = canonical_name(node.name)
+        keys.add(key)
+        for target in node.targets:
+            edges.add((key, canonical_name(target.name)))
+            stack.append(target)
+
+
+def diff(old, new):
+    """Compare traced chains.
+
+    :rtype: :class:`Diff`
+    :return: ``added`` and ``removed`` of ``(name, version)``,
+             ``changed`` of ``(name, old version, new version)``,
+             ``added_edges`` and ``removed_edges`` of
+             ``(requiring, required)``
+
+    :param old: List of `deps.Node`, or :class:`TreeIndex`
+    :param new: List of `deps.Node`, or :class:`TreeIndex`
+    """
+    if not isinstance(old, TreeIndex):
+        old = TreeIndex(old)
+    if not isinstance(new, TreeIndex):
+        new = TreeIndex(new)
+    if old.digest == new.digest:
+        return Diff([], [], [], [], [])
+    old_keys, new_keys = set(), set()
+    old_edges, new_edges = set(), set()
+    stack = [(old.chain_data, new.chain_data)]
+    while stack:
+        old_nodes, new_nodes = stack.pop()
+        old_children, new_children = by_name(old_nodes), by_name(new_nodes)
+        for key, node in old_children.items():
+            if key not in new_children:
+                collect(node, old_keys, old_edges)
+        for key, node in new_children.items():
+            if key not in old_children:
+                collect(node, new_keys, new_edges)
+                continue
+            old_node = old_children[key]
+            if old.hashes[id(old_node)] == new.hashes[id(node)]:
+                continue
+            old_keys.add(key)
+            new_keys.add(key)
+            old_edges.update((key, canonical_name(target.name))
+                             for target in old_node.targets)
+            new_edges.update((key, canonical_name(target.name))
+                             for target in node.targets)
+            stack.append((old_node.targets, node.targets))
+    keys = old_keys | new_keys
+    return Diff(
+        sorted((new.name(key), versions_text(new.versions[key]))
+               for key in keys - set(old.versions)),
+        sorted((old.name(key), versions_text(old.versions[key]))
+               for key in keys - set(new.versions)),
+        sorted((new.name(key), versions_text(old.versions[key]),
+                versions_text(new.versions[key]))
+               for key in keys & set(old.versions) & set(new.versions)
+               if old.versions[key] != new.versions[key]),
+        sorted((new.name(source), new.name(target))
+               for source, target in new_edges - old.edges),
+        sorted((old.name(source), old.name(target))
+               for source, target in old_edges - new.edges))
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""py_deps.environment module.
+
+Dependencies of the packages installed in an environment, such as
+the current virtualenv or the site-packages of a container image,
+without installing them again.
+
+The metadata of all distributions are read in one pass of the paths,
+and the trees of the top level distributions, required by no other
+distribution, are built from the index.::
+
+    >>> from py_deps import cache
+    >>> from py_deps.environment import Environment
+    >>> env = Environment(['/opt/venv/lib/python3.8/site-packages'])
+    >>> [node.name for node in env.traced_chain]
+    ['py-deps', 'pip', 'setuptools', 'wheel']
+    >>> env.store(cache.backend())
+    9
+    >>> print(env.draw('dot'))
+"""
+import glob
+import os
+import sys
+from importlib import metadata as importlib_metadata
+from py_deps import graph
+from py_deps.bounds import Bounds, partial_key
+from py_deps.metadata import (canonical_name, home_page, nodes_from_metadata,
+                              requirements)
+
+
+def site_packages(path):
+    """Return import paths of an environment.
+
+    :rtype: list
+    :return: ``site-packages`` directories of the prefix, or ``[path]``
+             when it is not a prefix
+    :param str path: prefix of an environment, or an import path
+    """
+    found = sorted(glob.glob(os.path.join(path, 'lib', 'python*',
+                                          'site-packages')))
+    found += sorted(glob.glob(os.path.join(path, 'Lib', 'site-packages')))
+    return found or [path]
+
+
+def scan(paths=None):
+    """Read the metadata of the distributions in one pass.
+
+    The first distribution of a name on the paths wins, as import.
+
+    :rtype: dict
+    :return: metadata by canonical name, ``name``, ``version``, ``url``
+             and ``requires_dist``
+    :param list paths: import paths (default: ``sys.path``)
+    """
+    dists = {}
+    for dist in importlib_metadata.distributions(
+            path=sys.path if paths is None else list(paths)):
+        meta = dist.metadata
+        name = meta['Name']
+        if not name or canonical_name(name) in dists:
+            continue
+        dists[canonical_name(name)] = dict(
+            name=name,
+            version=meta['Version'],
+            url=home_page(dict(home_page=meta['Home-page'],
+                               project_url=meta.get_all('Project-URL',
+                                                        []))),
+            requires_dist=dist.requires or [])
+    return dists
+
+
+class Environment:
+    """Installed distributions of an environment.
+
+    Renders the trees of all top level distributions as one graph with
+    :func:`py_deps.graph.router`, as :class:`py_deps.deps.Requirements`.
+    """
+
+    #: render the shared nodes once
+    union = True
+
+    def __init__(self, paths=None, names=None, environment=None,
+                 bounds=None):
+        """Initialize.
+
+        :param list paths: prefixes of environments or import paths
+                           (default: ``sys.path``)
+        :param list names: packages of the trees
+                           (default: top level distributions)
+        :param dict environment: marker variables (default: current)
+        :param bounds: bounds of the trees
+        :type bounds: :class:`py_deps.bounds.Bounds`
+        """
+        #: name of the environment
+        self.name = 'environment' if paths is None else ' '.join(paths)
+        self.version = None
+        if paths is not None:
+            paths = [path for prefix in paths
+                     for path in site_packages(prefix)]
+        self.environment = environment
+        #: metadata by canonical name
+        self.dists = scan(paths)
+        #: bounds of the trees
+        self.bounds = Bounds() if bounds is None else bounds
+        if names is None:
+            names = self.top_level()
+        #: root nodes of the trees
+        self.traced_chain = self.nodes(names, self.bounds)
+
+    def required(self, dist, extras=()):
+        """Return requirements of a distribution installed.
+
+        :rtype: list
+        """
+        return [
+            requirement for requirement
+            in requirements(dist['requires_dist'], self.environment, extras)
+            if canonical_name(requirement.name) in self.dists]
+
+    def top_level(self):
+        """Return names of distributions required by no other.
+
+        :rtype: list
+        :return: names sorted by canonical name
+        """
+        required = {canonical_name(requirement.name)
+                    for dist in self.dists.values()
+                    for requirement in self.required(dist)}
+        return [self.dists[key]['name'] for key in sorted(self.dists)
+                if key not in required]
+
+    def nodes(self, names, bounds=None):
+        """Build trees of the distributions installed.
+
+        :rtype: list
+        :return: List of `deps.Node`
+        :param list names: package names of the roots
+        :param bounds: bounds of the trees
+        :type bounds: :class:`py_deps.bounds.Bounds`
+        """
+        return nodes_from_metadata(
+            [(canonical_name(name), ()) for name in names], self.dists,
+            self.environment, bounds)
+
+    def store(self, container, update_force=False):
+        """Store the tree of every root to the cache.
+
+        The trees are stored under the keys of the bounds, as
+        :class:`py_deps.deps.Package`, and the keys of the trees cut by
+        the deadline are the partial keys.
+
+        :rtype: int
+        :return: number of trees stored
+
+        :param container: cache backend
+        :type container: :class:`py_deps.cache.Container`
+        :param bool update_force: replace the trees already cached
+        """
+        mapping = {}
+        for node in self.traced_chain:
+            key = self.bounds.key((node.name, node.version))
+            if self.bounds.cut:
+                key = partial_key(key)
+            mapping[key] = [node]
+        if not update_force:
+            cached = container.read_many(list(mapping))
+            mapping = {key: chain_data for key, chain_data in mapping.items()
+                       if cached.get(key) is None}
+        container.store_many(mapping)
+        return len(mapping)
+
+    def draw(self, draw_type=None, link_prefix=None):
+        """Generate drawing data.
+
+        :param str draw_type: [dot|blockdiag|linkdraw]
+        """
+        return graph.router(self, draw_type=draw_type, link_prefix=link_prefix)
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""py_deps.envpool module.
+
+Pool of the scratch directories where pip installs the packages to
+resolve. The directories are kept among :class:`py_deps.deps.Package`
+objects and processes, and emptied when released.
+
+Each directory is leased with an exclusive :func:`fcntl.flock` of its
+lock file, so that the concurrent resolvers neither share nor remove
+the directories in use. The lock is released by the kernel when the
+process exits, so the directories of crashed resolvers are leased
+again. The pool is placed on tmpfs (``/dev/shm``) when available.
+
+Since the pool directory has a predictable name in a world-writable
+directory, it is created when the first directory is leased, and used
+only when it is a directory of the user with mode ``0700``. Symbolic
+links in the pool are never followed.
+"""
+import fcntl
+import os
+import shutil
+import stat
+import tempfile
+
+#: tmpfs directory
+TMPFS = '/dev/shm'
+#: default number of directories kept
+DEFAULT_SIZE = 4
+#: flags of opening lock files, not following symbolic links
+LOCK_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_NOFOLLOW
+
+
+def default_root():
+    """Return default directory of pool.
+
+    :rtype: str
+    :return: ``/dev/shm`` when writable, otherwise the temporary directory
+    """
+    if os.path.isdir(TMPFS) and os.access(TMPFS, os.W_OK):
+        return TMPFS
+    return tempfile.gettempdir()
+
+
+def is_directory(path):
+    """Return whether the path is a directory, not a symbolic link.
+
+    :rtype: bool
+    """
+    try:
+        return stat.S_ISDIR(os.lstat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+def private_directory(path):
+    """Create a directory only the user accesses, or check the existing one.
+
+    :param str path: directory
+    :raises: :class:`PermissionError` when the existing path is
+             a symbolic link, owned by another user or accessed by others
+    """
+    try:
+        os.mkdir(path, 0o700)
+        os.chmod(path, 0o700)
+        return
+    except FileExistsError:
+        pass
+    status = os.lstat(path)
+    if not all([stat.S_ISDIR(status.st_mode),
+                status.st_uid == os.getuid(),
+                stat.S_IMODE(status.st_mode) == 0o700]):
+        raise PermissionError(f'not a private directory: {path}')
+
+
+def empty(path):
+    """Remove the contents of directory.
+
+    :param str path: directory
+    """
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            os.remove(entry.path)
+
+
+class Lease:
+    """Leased directory."""
+
+    def __init__(self, pool, path, lockfile):
+        """Initialize.
+
+        :param pool: pool leasing the directory
+        :type pool: :class:`EnvPool`
+        :param str path: directory
+        :param lockfile: locked file object
+        """
+        self.pool = pool
+        #: directory
+        self.path = path
+        self.lockfile = lockfile
+
+    def release(self):
+        """Empty the directory and return it to the pool."""
+        if self.lockfile is None:
+            return
+        empty(self.path)
+        self.pool.discard_surplus(self)
+        fcntl.flock(self.lockfile, fcntl.LOCK_UN)
+        self.lockfile.close()
+        self.lockfile = None
+
+    def __enter__(self):
+        """Return the directory."""
+        return self.path
+
+    def __exit__(self, *exc_info):
+        """Release the directory."""
+        self.release()
+
+
+class EnvPool:
+    """Pool of scratch directories."""
+
+    def __init__(self, root=None, size=DEFAULT_SIZE):
+        """Initialize.
+
+        :param str root: parent directory (default: :func:`default_root`)
+        :param int size: number of directories kept, surplus directories
+                         leased by concurrent resolvers are removed
+                         when released.
+        """
+        #: pool directory
+        self.path = os.path.join(root or default_root(),
+                                 f'py_deps-{os.getuid()}')
+        self.size = size
+
+    def _slot(self, num):
+        return os.path.join(self.path, f'env-{num}')
+
+    def _trylock(self, num):
+        """Lock the directory without blocking.
+
+        :rtype: file object
+        :return: locked file object, or ``None`` when leased
+        """
+        descriptor = os.open(self._slot(num) + '.lock', LOCK_FLAGS, 0o600)
+        lockfile = os.fdopen(descriptor, 'a')
+        try:
+            fcntl.flock(lockfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lockfile.close()
+            return None
+        return lockfile
+
+    def lease(self):
+        """Lease an empty directory.
+
+        :rtype: :class:`Lease`
+        """
+        private_directory(self.path)
+        num = 0
+        while True:
+            lockfile = self._trylock(num)
+            if lockfile is not None:
+                break
+            num += 1
+        path = self._slot(num)
+        if is_directory(path):
+            # left by a crashed resolver
+            empty(path)
+        else:
+            if os.path.lexists(path):
+                os.remove(path)
+            os.mkdir(path, 0o700)
+        return Lease(self, path, lockfile)
+
+    def discard_surplus(self, lease):
+        """Remove the directory of lease over the pool size.
+
+        :param lease: leased directory, still locked
+        :type lease: :class:`Lease`
+        """
+        if lease.path not in [self._slot(num) for num in range(self.size)]:
+            shutil.rmtree(lease.path, ignore_errors=True)
+
+    def clear(self):
+        """Remove the directories not leased.
+
+        :rtype: list
+        :return: removed directories
+        """
+        removed = []
+        if not is_directory(self.path):
+            return removed
+        private_directory(self.path)
+        for entry in sorted(os.listdir(self.path)):
+            if not entry.endswith('.lock'):
+                continue
+            num = int(entry[len('env-'):-len('.lock')])
+            lockfile = self._trylock(num)
+            if lockfile is None:
+                continue
+            try:
+                if is_directory(self._slot(num)):
+                    shutil.rmtree(self._slot(num), ignore_errors=True)
+                    removed.append(self._slot(num))
+            finally:
+                fcntl.flock(lockfile, fcntl.LOCK_UN)
+                lockfile.close()
+        return removed
+
+
+#: pools by root directory
+POOLS = {}
+
+
+def get_pool(root=None):
+    """Return pool shared in the process.
+
+    :rtype: :class:`EnvPool`
+    :param root: parent directory, or :class:`EnvPool` object
+    """
+    if isinstance(root, EnvPool):
+        return root
+    if root not in POOLS:
+        POOLS[root] = EnvPool(root)
+    return POOLS[root]
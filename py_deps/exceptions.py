@@ -20,3 +20,7 @@ class InvalidMetadata(Error):
 
 class BackendFailure(Error):
     """PyPI service down."""
+
+
+class DaemonFailure(Error):
+    """Resolver daemon returns error."""
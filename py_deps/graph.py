@@ -9,13 +9,17 @@ def router(package, draw_type=None, link_prefix=None):
     if draw_type == 'networkx':
         nwx = Networkx(package, link_prefix)
         return nwx.generate_data()
-    if draw_type == 'blockdiag':
-        pass
+    if draw_type == 'dot':
+        draw_data = Dot(package, link_prefix).generate_data()
+    elif draw_type == 'blockdiag':
+        draw_data = Blockdiag(package, link_prefix).generate_data()
     elif draw_type == 'linkdraw':
         linkdraw = Linkdraw(package, link_prefix)
         draw_data = linkdraw.generate_data()
     else:
-        draw_data = '\n'.join(pretty_print(package.traced_chain))
+        draw_data = '\n'.join(pretty_print(package.traced_chain,
+                                           unique=getattr(package, 'union',
+                                                          False)))
     return draw_data
 
 
@@ -24,24 +28,68 @@ def edge_key(source_node, target_node):
     return f'{source_node.name}=>{target_node.name}'
 
 
-def generate_data(chain_data, func):
-    """Generate dependencies graph."""
+def generate_data(chain_data, func, seen=None):
+    """Generate dependencies graph.
+
+    :param set seen: names and versions of the nodes generated,
+                     to generate the shared nodes once
+    """
     lines = list()
     for node in chain_data:
         if len(node.targets) > 0:
+            if seen is not None:
+                if (node.name, node.version) in seen:
+                    continue
+                seen.add((node.name, node.version))
             lines.append(func(node))
-            lines += generate_data(node.targets, func)
+            lines += generate_data(node.targets, func, seen)
     return lines
 
 
-def pretty_print(chain_data):
+def walk(chain_data):
+    """Walk the nodes and edges once, without recursion.
+
+    The targets of a node are walked at the first node of the name,
+    as :meth:`Graph._generate_nodes`.
+
+    :rtype: generator
+    :return: ``(node, None)`` of every node name, and
+             ``(source node, target node)`` of every edge
+    :param list chain_data: List of `deps.Node`
+    """
+    nodes = set()
+    edges = set()
+    stack = list(reversed(chain_data))
+    while stack:
+        node = stack.pop()
+        if node.name in nodes:
+            continue
+        nodes.add(node.name)
+        yield node, None
+        for target in node.targets:
+            if (node.name, target.name) not in edges:
+                edges.add((node.name, target.name))
+                yield node, target
+        stack += reversed(node.targets)
+
+
+def quote(text):
+    """Quote ID of DOT and blockdiag."""
+    text = str(text).replace('\\', '\\\\').replace('"', '\\"')
+    text = text.replace('\n', '\\n')
+    return f'"{text}"'
+
+
+def pretty_print(chain_data, unique=False):
     """Pretty print on terminal.
 
     :param list chain_data: List of `deps.Node`
+    :param bool unique: print the shared nodes once
     """
     def node_edge(node):
         return f'{node} -> {node.targets}'
-    return generate_data(chain_data, func=node_edge)
+    return generate_data(chain_data, func=node_edge,
+                         seen=set() if unique else None)
 
 
 class Graph:
@@ -138,8 +186,9 @@ class Linkdraw(Graph):
         """Generate Linkdraw data."""
         nodes = self._generate_nodes(self.chain_data)
         self.check_set.clear()
-        lines = self.__generate_edges(self.chain_data[0],
-                                      self.chain_data[0].targets)
+        lines = []
+        for root in self.chain_data:
+            lines += self.__generate_edges(root, root.targets)
         self.check_set.clear()
         return dict(time=self.time,
                     descr=self.descr,
@@ -164,23 +213,64 @@ class Networkx(Graph):
         """Generate edges data."""
         self.graph.add_edges_from([(self._normalize_name(node.name),
                                     self._normalize_name(target.name))
-                                   for node in self.chain_data
-                                   for target in node.targets],
+                                   for node, target in walk(self.chain_data)
+                                   if target is not None],
                                   color=self.requires_color)
 
     def generate_data(self):
         """Generate networkx graph data."""
-        for node in self._generate_nodes(self.chain_data):
-            self.graph.add_node(node['name'],
-                                version=node['version'],
-                                link=self._normalize_url(node['link'],
-                                                         node['name'],
-                                                         node['version']),
-                                depth=node['depth'])
+        self.graph.add_nodes_from(
+            (node['name'], dict(version=node['version'],
+                                link=node['link'],
+                                depth=node['depth']))
+            for node in self._generate_nodes(self.chain_data))
         self.generate_edges()
         return self.graph
 
 
+class Dot(Graph):
+    """Graphviz DOT object class."""
+
+    header = 'digraph {0} {{'
+    node_format = '  {name} [label={label}, URL={link}, color={color}];'
+    edge_format = '  {source} -> {target};'
+
+    def generate_lines(self):
+        """Generate lines in one pass of the tree.
+
+        :rtype: generator
+        """
+        yield self.header.format(quote(self.package.name))
+        for node, target in walk(self.chain_data):
+            if target is None:
+                name = self._normalize_name(node.name)
+                label = name if node.version is None else (
+                    f'{name}\n{node.version}')
+                yield self.node_format.format(
+                    name=quote(name),
+                    label=quote(label),
+                    link=quote(self._normalize_url(node.url, name,
+                                                   node.version)),
+                    color=quote(color(node.depth)))
+            else:
+                yield self.edge_format.format(
+                    source=quote(self._normalize_name(node.name)),
+                    target=quote(self._normalize_name(target.name)))
+        yield '}'
+
+    def generate_data(self):
+        """Generate text data."""
+        return '\n'.join(self.generate_lines()) + '\n'
+
+
+class Blockdiag(Dot):
+    """blockdiag object class."""
+
+    header = 'blockdiag {{'
+    node_format = ('  {name} [label = {label}, href = {link}, '
+                   'color = {color}];')
+
+
 def color(depth):
     """Color by depth level.
 
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""py_deps.index module.
+
+Local index of the package names, to search the packages without
+the PyPI XML-RPC API.
+
+The names are kept sorted by the PEP 503 normalized name. Prefix and
+exact lookups are binary searches, and substring lookups scan the
+names joined as one string, up to the limit of the names. The index is
+populated from the listing of the simple repository API (PEP 503 HTML
+or PEP 691 JSON), or a file of the names, and updated incrementally.::
+
+    >>> from py_deps.deps import search
+    >>> from py_deps.index import NameIndex, fetch_simple
+    >>> index = NameIndex()
+    >>> index.update(fetch_simple())
+    >>> index.prefix('py-dep')
+    ['py-deps']
+    >>> index.save('names.txt')
+    >>> search('Py_Deps', exactly=True, index=NameIndex.load('names.txt'))
+    [{'name': 'py-deps'}]
+"""
+import bisect
+import itertools
+import json
+import os
+import re
+import urllib.request
+from py_deps.metadata import canonical_name
+
+#: listing of the simple repository API
+SIMPLE_URL = 'https://pypi.org/simple/'
+#: media types of the simple repository API, JSON preferred
+SIMPLE_ACCEPT = ('application/vnd.pypi.simple.v1+json, '
+                 'application/vnd.pypi.simple.v1+html;q=0.2, '
+                 'text/html;q=0.1')
+#: anchors of PEP 503 listing
+ANCHOR = re.compile(r'<a\s[^>]*>\s*([^<]+?)\s*</a>', re.IGNORECASE)
+
+
+def parse_simple(text):
+    """Parse the project listing of the simple repository API.
+
+    :rtype: list
+    :return: project names
+
+    :param str text: PEP 691 JSON, PEP 503 HTML, or lines of a name
+    """
+    if text.lstrip().startswith('{'):
+        return [project['name']
+                for project in json.loads(text).get('projects', [])]
+    if '<a' in text.lower():
+        return ANCHOR.findall(text)
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def fetch_simple(url=SIMPLE_URL, timeout=60):
+    """Fetch the project names of the simple repository API.
+
+    :rtype: list
+    :param str url: URL of the listing, or a local file of
+                    :func:`parse_simple`
+    :param float timeout: seconds
+    """
+    if os.path.exists(url):
+        with open(url, encoding='utf-8') as fobj:
+            return parse_simple(fobj.read())
+    req = urllib.request.Request(url, headers={'Accept': SIMPLE_ACCEPT})
+    with urllib.request.urlopen(req, timeout=timeout) as res:
+        return parse_simple(res.read().decode('utf-8'))
+
+
+class NameIndex:
+    """Sorted index of package names."""
+
+    def __init__(self, names=()):
+        """Initialize.
+
+        :param names: iterable of package names
+        """
+        #: normalized names, sorted
+        self.keys = []
+        #: display names by normalized name
+        self.names = {}
+        self._text = None
+        self._offsets = None
+        self.update(names)
+
+    def __len__(self):
+        """Return number of names."""
+        return len(self.keys)
+
+    def update(self, names):
+        """Add names not indexed yet.
+
+        :rtype: int
+        :return: number of names added
+        :param names: iterable of package names
+        """
+        added = {}
+        for name in names:
+            key = canonical_name(name)
+            if key not in self.names and key not in added:
+                added[key] = name
+        if not added:
+            return 0
+        self.names.update(added)
+        if len(added) > len(self.keys) // 16:
+            self.keys = sorted(self.names)
+        else:
+            for key in added:
+                bisect.insort(self.keys, key)
+        self._text = None
+        self._offsets = None
+        return len(added)
+
+    def get(self, name):
+        """Return display name of the package.
+
+        :rtype: str
+        :return: display name, or ``None`` when not indexed
+        """
+        return self.names.get(canonical_name(name))
+
+    def prefix(self, text, limit=None):
+        """Return names starting with the text.
+
+        :rtype: list
+        :return: display names in normalized name order
+        :param str text: prefix, normalized as PEP 503
+        :param int limit: maximum number of names
+        """
+        key = canonical_name(text)
+        start = bisect.bisect_left(self.keys, key)
+        stop = bisect.bisect_left(self.keys, key + '\uffff', lo=start)
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return [self.names[name] for name in self.keys[start:stop]]
+
+    def substring(self, text, limit=None):
+        """Return names containing the text.
+
+        :rtype: list
+        :return: display names in normalized name order
+        :param str text: substring, normalized as PEP 503
+        :param int limit: maximum number of names
+        """
+        return list(itertools.islice(self._contains(canonical_name(text)),
+                                     limit))
+
+    def _contains(self, key):
+        """Generate names containing the normalized name, scanning lazily.
+
+        :rtype: generator
+        :return: display names in normalized name order
+        :param str key: normalized substring
+        """
+        if self._text is None:
+            self._text = ''.join(name + '\n' for name in self.keys)
+            self._offsets = [0] * len(self.keys)
+            offset = 0
+            for idx, name in enumerate(self.keys):
+                self._offsets[idx] = offset
+                offset += len(name) + 1
+        pos = self._text.find(key)
+        while pos >= 0:
+            idx = bisect.bisect_right(self._offsets, pos) - 1
+            yield self.names[self.keys[idx]]
+            if idx + 1 == len(self.keys):
+                return
+            pos = self._text.find(key, self._offsets[idx + 1])
+
+    def search(self, text, exactly=False, limit=None):
+        """Search names.
+
+        :rtype: list
+        :return: display names, exact match, names starting with the text,
+                 and the other names containing the text
+        :param str text: package name or a part of it
+        :param bool exactly: exactly match only
+        :param int limit: maximum number of names
+        """
+        name = self.get(text)
+        if exactly:
+            return [] if name is None else [name]
+        result = self.prefix(text, limit)
+        if limit is not None and len(result) >= limit:
+            return result
+        found = set(result)
+        for name in self._contains(canonical_name(text)):
+            if name in found:
+                continue
+            result.append(name)
+            if len(result) == limit:
+                break
+        return result
+
+    def save(self, path):
+        """Save the index to a file atomically.
+
+        :param str path: file of the normalized and display names
+        """
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as fobj:
+            fobj.writelines(f'{key}\t{self.names[key]}\n'
+                            for key in self.keys)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load the index from a file.
+
+        The file is of the lines of :meth:`save`, or the lines of
+        a package name.
+
+        :rtype: :class:`NameIndex`
+        :param str path: index file
+        """
+        index = cls()
+        with open(path, encoding='utf-8') as fobj:
+            lines = [line.rstrip('\n').split('\t') for line in fobj
+                     if line.strip()]
+        if all(len(line) == 2 for line in lines):
+            index.names = dict(lines)
+            index.keys = sorted(index.names)
+        else:
+            index.update(line[-1] for line in lines)
+        return index
+
+
+#: indexes by file, with the modification time
+INDEXES = {}
+
+
+def get_index(path):
+    """Return index loaded in the process, reloaded when the file changes.
+
+    :rtype: :class:`NameIndex`
+    :param path: index file, or :class:`NameIndex` object
+    """
+    if isinstance(path, NameIndex):
+        return path
+    mtime = os.stat(path).st_mtime
+    if path not in INDEXES or INDEXES[path][0] != mtime:
+        INDEXES[path] = (mtime, NameIndex.load(path))
+    return INDEXES[path][1]
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""py_deps.matrix module.
+
+Adjacency matrix of the cached traced chains, for the analytics over
+the whole cache.
+
+Installing NumPy.::
+
+    (venv)$ pip install py-deps[matrix]
+
+The packages are indexed by the canonical name and the version, and the
+edges from the requiring package to the required package are exported
+in CSR (compressed sparse row) format, as the ``indptr`` and
+``indices`` arrays of ``scipy.sparse.csr_matrix``.::
+
+    >>> from py_deps import cache, matrix
+    >>> csr = matrix.from_cache(cache.backend())
+    >>> csr.names[csr.indices[csr.indptr[0]:csr.indptr[1]]]
+    array(['networkx', 'pip', 'setuptools', 'wheel'], dtype='<U10')
+    >>> scipy.sparse.csr_matrix(
+    ...     (numpy.ones(len(csr.indices)), csr.indices, csr.indptr))
+"""
+from array import array
+from collections import namedtuple
+try:
+    import numpy
+except ImportError:
+    pass
+from py_deps.metadata import canonical_name
+
+#: adjacency in CSR format, and the arrays of the packages by index
+CSR = namedtuple('CSR', ['indptr', 'indices', 'names', 'versions', 'depth'])
+
+
+class AdjacencyBuilder:
+    """Builder of adjacency matrix.
+
+    The traced chains are flattened to integer arrays as added, and
+    converted to NumPy arrays in batch by :meth:`build`.
+    """
+
+    def __init__(self):
+        """Initialize."""
+        #: index by (canonical name, version)
+        self.index = {}
+        #: names by index
+        self.names = []
+        #: versions by index
+        self.versions = []
+        self._depth = array('l')
+        self._sources = array('l')
+        self._targets = array('l')
+
+    def _node(self, node):
+        """Return index of node."""
+        key = (canonical_name(node.name), node.version)
+        idx = self.index.get(key)
+        if idx is None:
+            idx = self.index[key] = len(self.names)
+            self.names.append(key[0])
+            self.versions.append('' if node.version is None
+                                 else str(node.version))
+            self._depth.append(node.depth)
+        elif node.depth < self._depth[idx]:
+            self._depth[idx] = node.depth
+        return idx
+
+    def add_chain(self, chain_data):
+        """Add a traced chain.
+
+        :param list chain_data: List of `deps.Node`
+        """
+        stack = [(self._node(node), node) for node in chain_data]
+        while stack:
+            idx, node = stack.pop()
+            for target in node.targets:
+                target_idx = self._node(target)
+                self._sources.append(idx)
+                self._targets.append(target_idx)
+                stack.append((target_idx, target))
+
+    def build(self):
+        """Build adjacency matrix.
+
+        Duplicated edges are merged.
+
+        :rtype: :class:`CSR`
+        """
+        size = len(self.names)
+        sources = numpy.array(self._sources, dtype=numpy.int64)
+        targets = numpy.array(self._targets, dtype=numpy.int64)
+        edges = numpy.unique(sources * size + targets)
+        sources, indices = numpy.divmod(edges, max(size, 1))
+        indptr = numpy.zeros(size + 1, dtype=numpy.int64)
+        numpy.cumsum(numpy.bincount(sources, minlength=size),
+                     out=indptr[1:])
+        return CSR(indptr,
+                   indices.astype(numpy.int32),
+                   numpy.array(self.names, dtype=str),
+                   numpy.array(self.versions, dtype=str),
+                   numpy.array(self._depth, dtype=numpy.int32))
+
+
+def from_chains(chains):
+    """Build adjacency matrix of traced chains.
+
+    :rtype: :class:`CSR`
+    :param chains: iterable of List of `deps.Node`
+    """
+    builder = AdjacencyBuilder()
+    for chain_data in chains:
+        builder.add_chain(chain_data)
+    return builder.build()
+
+
+def from_cache(container, keys=None, batch_size=1000):
+    """Build adjacency matrix of cached traced chains.
+
+    :rtype: :class:`CSR`
+
+    :param container: cache backend
+    :type container: :class:`py_deps.cache.Container`
+    :param list keys: keys of package name, version
+                      (default: all keys of the cache)
+    :param int batch_size: number of keys read at once
+    """
+    if keys is None:
+        keys = [key for key in container.list_keys() if len(key) == 2]
+    builder = AdjacencyBuilder()
+    for start in range(0, len(keys), batch_size):
+        for chain_data in container.read_many(
+                keys[start:start + batch_size]).values():
+            builder.add_chain(chain_data)
+    return builder.build()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""py_deps.metadata module.
+
+Parsing the package metadata without installing the packages, such as
+the installation report of pip (``pip install --dry-run --report``).
+"""
+from pip._vendor.packaging.markers import default_environment
+from pip._vendor.packaging.requirements import (InvalidRequirement,
+                                                Requirement)
+from pip._vendor.packaging.utils import canonicalize_name
+
+
+def canonical_name(name):
+    """Normalize package name as PEP 503.
+
+    :rtype: str
+    :return: lower case name, runs of ``-``, ``_`` and ``.`` as ``-``
+
+    :param str name: package name
+    """
+    return canonicalize_name(name)
+
+
+def parse_requirement(spec, environment=None, extras=()):
+    """Parse a requirement of ``Requires-Dist``.
+
+    :rtype: :class:`pip._vendor.packaging.requirements.Requirement`
+    :return: requirement, or ``None`` when the marker does not match
+             or the requirement is invalid
+
+    :param str spec: requirement specifier, such as
+                     ``PySocks>=1.5.6; extra == "socks"``
+    :param dict environment: marker variables (default: current)
+    :param extras: extras requested of the requiring package
+    """
+    try:
+        requirement = Requirement(spec)
+    except InvalidRequirement:
+        return None
+    if requirement.marker is not None:
+        environment = dict(environment or default_environment())
+        if not any(requirement.marker.evaluate(dict(environment, extra=extra))
+                   for extra in list(extras) or ['']):
+            return None
+    return requirement
+
+
+def requirements(requires_dist, environment=None, extras=()):
+    """Return requirements matching the environment.
+
+    :rtype: list
+    :return: list of :class:`Requirement`
+
+    :param list requires_dist: ``Requires-Dist`` values
+    :param dict environment: marker variables (default: current)
+    :param extras: extras requested of the requiring package
+    """
+    result = []
+    for spec in requires_dist or []:
+        requirement = parse_requirement(spec, environment, extras)
+        if requirement is not None:
+            result.append(requirement)
+    return result
+
+
+def home_page(metadata):
+    """Return project URL of metadata.
+
+    :rtype: str
+    :param dict metadata: metadata as JSON of PEP 566
+    """
+    if metadata.get('home_page'):
+        return metadata.get('home_page')
+    for project_url in metadata.get('project_url', []):
+        label, _, url = project_url.partition(',')
+        if label.strip().lower() in ('homepage', 'home', 'source'):
+            return url.strip()
+    return None
+
+
+def nodes_from_report(report, bounds=None):
+    """Create nodes from the installation report of pip.
+
+    :rtype: list
+    :return: List of `deps.Node` of the requested packages
+
+    :param dict report: installation report of pip
+    :param bounds: bounds of the tree
+    :type bounds: :class:`py_deps.bounds.Bounds`
+    """
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from py_deps.bounds import Bounds
+    if bounds is None:
+        bounds = Bounds()
+    dists = {}
+    roots = []
+    for item in report.get('install', []):
+        metadata = item['metadata']
+        if bounds.excludes(metadata['name']):
+            continue
+        key = canonical_name(metadata['name'])
+        dists[key] = dict(name=metadata.get('name'),
+                          version=metadata.get('version'),
+                          url=home_page(metadata),
+                          requires_dist=metadata.get('requires_dist'))
+        if item.get('requested'):
+            roots.append((key, item.get('requested_extras') or ()))
+    return nodes_from_metadata(roots, dists, report.get('environment'),
+                               bounds)
+
+
+def nodes_from_metadata(roots, dists, environment=None, bounds=None):
+    """Create nodes from the metadata of the distributions.
+
+    The trees are built without recursion. Requirements already on the
+    path from the root are not followed again, to stop at circular
+    dependencies, and requirements not in ``dists`` are left out.
+
+    :rtype: list
+    :return: List of `deps.Node` of the roots
+
+    :param list roots: canonical names and extras of the roots
+    :param dict dists: metadata by canonical name, ``name``, ``version``,
+                       ``url`` and ``requires_dist``
+    :param dict environment: marker variables (default: current)
+    :param bounds: bounds of the trees
+    :type bounds: :class:`py_deps.bounds.Bounds`
+    """
+    # pylint: disable=import-outside-toplevel,cyclic-import,too-many-locals
+    from py_deps.bounds import Bounds
+    from py_deps.deps import Node
+    if bounds is None:
+        bounds = Bounds()
+    kept = dists.keys() - bounds.exclude
+    nodes = []
+    stack = [(key, extras, 0, nodes, frozenset())
+             for key, extras in reversed(roots) if key in dists]
+    while stack:
+        key, extras, depth, targets, ancestors = stack.pop()
+        dist = dists[key]
+        required = [
+            requirement for requirement
+            in requirements(dist['requires_dist'], environment, extras)
+            if canonical_name(requirement.name) in kept]
+        node = Node(dist['name'], dist['version'], url=dist['url'],
+                    requires=[requirement.name for requirement in required],
+                    depth=depth)
+        targets.append(node)
+        if required and not bounds.expands(node.name, depth):
+            node.incomplete = True
+            continue
+        ancestors = ancestors | {key}
+        stack += reversed([
+            (canonical_name(requirement.name), requirement.extras,
+             depth + 1, node.targets, ancestors)
+            for requirement in required
+            if canonical_name(requirement.name) not in ancestors])
+    return nodes
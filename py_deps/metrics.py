@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""py_deps.metrics module.
+
+Instrumentation of the resolution phases.
+
+:class:`py_deps.deps.Package` reports to the module level
+:data:`instrument`, as follows.
+
+=========================  ========  ====================================
+metric                     type      labels
+=========================  ========  ====================================
+``phase_seconds``          summary   ``phase``: ``cache_read``,
+                                     ``install``, ``pip``, ``load_path``,
+                                     ``create_nodes``, ``restore_path``,
+                                     ``store_data``, ``cleanup``
+``cache_hits``             counter   ``backend``
+``cache_misses``           counter   ``backend``
+``negative_hits``          counter   ``backend``
+``deadlines``              counter
+``tier_hits``              counter   ``tier`` (:class:`cache.Tiered`)
+``tier_misses``            counter
+``nodes``                  summary
+``tree_depth``             summary
+=========================  ========  ====================================
+
+Register callbacks to receive every sample with the package name and
+version, or export the aggregated samples as Prometheus text format.::
+
+    >>> from py_deps import metrics
+    >>> metrics.instrument.register(print)
+    >>> print(metrics.instrument.export())
+"""
+import time
+from contextlib import contextmanager
+
+#: metric name prefix of Prometheus text format
+PREFIX = 'py_deps_'
+
+
+def count_nodes(chain_data):
+    """Count nodes of traced chain.
+
+    :rtype: int
+    :param list chain_data: List of `deps.Node`
+    """
+    count = 0
+    stack = list(chain_data)
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack += node.targets
+    return count
+
+
+def tree_depth(chain_data):
+    """Return depth of traced chain.
+
+    :rtype: int
+    :return: number of levels, zero with empty chain
+    :param list chain_data: List of `deps.Node`
+    """
+    depth = 0
+    stack = [(node, 1) for node in chain_data]
+    while stack:
+        node, level = stack.pop()
+        depth = max(depth, level)
+        stack += [(target, level + 1) for target in node.targets]
+    return depth
+
+
+class Instrument:
+    """Instrumentation class."""
+
+    def __init__(self):
+        """Initialize."""
+        #: callbacks called as ``callback(metric, value, labels)``
+        self.callbacks = []
+        #: counters, keyed by (metric, labels)
+        self.counters = {}
+        #: summaries of [count, sum], keyed by (metric, labels)
+        self.summaries = {}
+
+    def register(self, callback):
+        """Register callback.
+
+        :param callback: called as ``callback(metric, value, labels)``
+                         with labels including ``context``.
+        """
+        self.callbacks.append(callback)
+
+    def unregister(self, callback):
+        """Unregister callback."""
+        if callback in self.callbacks:
+            self.callbacks.remove(callback)
+
+    def reset(self):
+        """Clear aggregated samples."""
+        self.counters.clear()
+        self.summaries.clear()
+
+    def _notify(self, metric, value, labels, context):
+        if self.callbacks:
+            labels = dict(context or {}, **labels)
+            for callback in self.callbacks:
+                callback(metric, value, labels)
+
+    def count(self, metric, value=1, context=None, **labels):
+        """Increment counter.
+
+        :param str metric: metric name
+        :param value: increment
+        :param dict context: labels passed to callbacks only
+        :param labels: labels of metric
+        """
+        key = (metric, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + value
+        self._notify(metric, value, labels, context)
+
+    def observe(self, metric, value, context=None, **labels):
+        """Observe a sample of summary.
+
+        :param str metric: metric name
+        :param value: sample
+        :param dict context: labels passed to callbacks only
+        :param labels: labels of metric
+        """
+        key = (metric, tuple(sorted(labels.items())))
+        summary = self.summaries.setdefault(key, [0, 0])
+        summary[0] += 1
+        summary[1] += value
+        self._notify(metric, value, labels, context)
+
+    @contextmanager
+    def timer(self, phase, context=None):
+        """Observe elapsed seconds of phase as ``phase_seconds``.
+
+        :param str phase: phase name
+        :param dict context: labels passed to callbacks only
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe('phase_seconds', time.perf_counter() - start,
+                         context=context, phase=phase)
+
+    def export(self):
+        """Export aggregated samples as Prometheus text format.
+
+        :rtype: str
+        """
+        lines = []
+        for metric in sorted({key[0] for key in self.counters}):
+            lines.append(f'# TYPE {PREFIX}{metric}_total counter')
+            lines += [f'{PREFIX}{metric}_total{_labels(labels)} {value}'
+                      for (name, labels), value in sorted(
+                          self.counters.items())
+                      if name == metric]
+        for metric in sorted({key[0] for key in self.summaries}):
+            lines.append(f'# TYPE {PREFIX}{metric} summary')
+            for (name, labels), (count, total) in sorted(
+                    self.summaries.items()):
+                if name == metric:
+                    lines.append(f'{PREFIX}{metric}_count{_labels(labels)}'
+                                 f' {count}')
+                    lines.append(f'{PREFIX}{metric}_sum{_labels(labels)}'
+                                 f' {total}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels):
+    """Format labels of Prometheus text format."""
+    if not labels:
+        return ''
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        pairs.append(f'{key}="{value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+#: default instrument
+instrument = Instrument()
@@ -0,0 +1,459 @@
+# -*- coding: utf-8 -*-
+"""py_deps.mirror module.
+
+Local mirror of the package index metadata, the releases, the latest
+version and ``Requires-Dist`` of the packages, in a SQLite database.
+
+The mirror is synchronized incrementally with the change log serials of
+the index. Only the packages changed since the last synchronization are
+fetched again, and the packages not mirrored yet are added by name.::
+
+    >>> from py_deps.mirror import Mirror, PyPIFeed
+    >>> mirror = Mirror('/srv/py-deps-mirror.db')
+    >>> mirror.sync(PyPIFeed(), names=['py-deps', 'requests'])
+    2
+    >>> mirror.latest_version('py-deps')
+    '1.0.1'
+
+The latest version, search and the metadata only resolution are
+answered from the mirror without the network.::
+
+    >>> from py_deps.deps import Package, latest_version
+    >>> latest_version('requests', mirror=mirror)
+    '2.28.1'
+    >>> pkg = Package('requests', resolver='mirror', mirror=mirror)
+
+Only ``Requires-Dist`` of the latest release is fetched. The nodes of
+the other releases are not expanded, and marked ``incomplete``. The
+trees of such nodes are cut, and cached under the partial keys as the
+trees cut by the deadline, so that the resolvers installing the
+packages do not read them as complete.
+"""
+import json
+import sqlite3
+import urllib.error
+import urllib.request
+import xmlrpc.client as xmlrpclib
+from contextlib import closing
+from pip._vendor.packaging.specifiers import InvalidSpecifier, SpecifierSet
+from pip._vendor.packaging.version import InvalidVersion, Version
+from py_deps.exceptions import BackendFailure, NotFound
+from py_deps.metadata import canonical_name, requirements
+
+#: XML-RPC API of PyPI with the change log
+XMLRPC_URL = 'https://pypi.org/pypi'
+#: JSON API of PyPI
+JSON_URL = 'https://pypi.org/pypi/{0}/json'
+
+
+def sort_key(version):
+    """Return sort key of version, invalid versions first.
+
+    :rtype: tuple
+    """
+    try:
+        return (1, Version(version))
+    except InvalidVersion:
+        return (0, version)
+
+
+class Feed:
+    """Feed of the index metadata abstract class."""
+
+    def last_serial(self):
+        """Return the last change log serial.
+
+        :rtype: int
+        """
+        raise NotImplementedError
+
+    def changes(self, serial):
+        """Return names of the packages changed after serial.
+
+        :rtype: tuple
+        :return: set of names, and the last serial of the changes
+        :param int serial: change log serial
+        """
+        raise NotImplementedError
+
+    def project(self, name):
+        """Return metadata of the package.
+
+        :rtype: dict
+        :return: ``name``, ``version`` (latest), ``summary``, ``url``,
+                 ``releases`` (list of versions) and ``requires_dist``
+                 of the latest release
+        :raises NotFound: the package is not found, or removed
+        """
+        raise NotImplementedError
+
+
+class PyPIFeed(Feed):
+    """Feed of PyPI, the change log of XML-RPC and JSON API."""
+
+    def __init__(self, xmlrpc_url=XMLRPC_URL, json_url=JSON_URL,
+                 timeout=60):
+        """Initialize.
+
+        :param str xmlrpc_url: XML-RPC API
+        :param str json_url: JSON API, ``{0}`` as the package name
+        :param float timeout: seconds of JSON API
+        """
+        self.client = xmlrpclib.ServerProxy(xmlrpc_url)
+        self.json_url = json_url
+        self.timeout = timeout
+
+    def last_serial(self):
+        """Return the last change log serial."""
+        try:
+            return self.client.changelog_last_serial()
+        except (OSError, xmlrpclib.ProtocolError) as exc:
+            raise BackendFailure(exc) from exc
+
+    def changes(self, serial):
+        """Return names of the packages changed after serial."""
+        try:
+            entries = self.client.changelog_since_serial(serial)
+        except (OSError, xmlrpclib.ProtocolError) as exc:
+            raise BackendFailure(exc) from exc
+        return ({entry[0] for entry in entries},
+                max([serial] + [entry[4] for entry in entries]))
+
+    def project(self, name):
+        """Return metadata of the package."""
+        try:
+            with urllib.request.urlopen(self.json_url.format(name),
+                                        timeout=self.timeout) as res:
+                data = json.load(res)
+        except urllib.error.HTTPError as exc:
+            if exc.code == 404:
+                raise NotFound(name) from exc
+            raise BackendFailure(exc) from exc
+        except OSError as exc:
+            raise BackendFailure(exc) from exc
+        info = data['info']
+        return dict(name=info['name'],
+                    version=info['version'],
+                    summary=info.get('summary'),
+                    url=info.get('home_page') or info.get('project_url'),
+                    releases=list(data.get('releases', {})),
+                    requires_dist=info.get('requires_dist') or [])
+
+
+class Mirror:
+    """Index metadata mirror on SQLite database file.
+
+    Every operation opens a connection, as
+    :class:`py_deps.workqueue.SQLiteBroker`.
+    """
+
+    def __init__(self, path):
+        """Initialize.
+
+        :param str path: database file
+        """
+        self.path = path
+        #: name index of :meth:`search`, and the serial it is built at
+        self._index = (None, None)
+        with self.connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS projects ('
+                         'key TEXT PRIMARY KEY, name TEXT, version TEXT, '
+                         'summary TEXT, url TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS releases ('
+                         'key TEXT, version TEXT, requires_dist TEXT, '
+                         'PRIMARY KEY (key, version))')
+            conn.execute('CREATE TABLE IF NOT EXISTS state ('
+                         'id INTEGER PRIMARY KEY, serial INTEGER)')
+
+    def connect(self):
+        """Open a connection.
+
+        :rtype: :class:`sqlite3.Connection`
+        """
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return closing(conn)
+
+    def serial(self):
+        """Return the change log serial synchronized.
+
+        :rtype: int
+        :return: serial, or ``None`` before the first synchronization
+        """
+        with self.connect() as conn:
+            row = conn.execute('SELECT serial FROM state '
+                               'WHERE id = 0').fetchone()
+        return None if row is None else row[0]
+
+    def store(self, project):
+        """Store metadata of a package.
+
+        ``Requires-Dist`` of the other releases already stored are kept.
+
+        :param dict project: metadata of :meth:`Feed.project`
+        """
+        key = canonical_name(project['name'])
+        with self.connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            known = dict(conn.execute('SELECT version, requires_dist '
+                                      'FROM releases WHERE key = ?', (key,)))
+            known[project['version']] = json.dumps(project['requires_dist'])
+            versions = set(project['releases'])
+            versions.add(project['version'])
+            conn.execute('DELETE FROM releases WHERE key = ?', (key,))
+            conn.executemany('INSERT INTO releases VALUES (?, ?, ?)',
+                             [(key, version, known.get(version))
+                              for version in versions])
+            conn.execute('INSERT OR REPLACE INTO projects '
+                         'VALUES (?, ?, ?, ?, ?)',
+                         (key, project['name'], project['version'],
+                          project.get('summary'), project.get('url')))
+            conn.execute('COMMIT')
+        self._index = (None, None)
+
+    def remove(self, name):
+        """Remove a package."""
+        key = canonical_name(name)
+        with self.connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM releases WHERE key = ?', (key,))
+            conn.execute('DELETE FROM projects WHERE key = ?', (key,))
+            conn.execute('COMMIT')
+        self._index = (None, None)
+
+    def names(self):
+        """Return names of the packages mirrored.
+
+        :rtype: list
+        """
+        with self.connect() as conn:
+            return [row[0] for row in conn.execute(
+                'SELECT name FROM projects ORDER BY key')]
+
+    def sync(self, feed, names=(), follow_all=False):
+        """Synchronize with the change log of the feed.
+
+        :rtype: int
+        :return: number of packages fetched
+
+        :param feed: index metadata
+        :type feed: :class:`Feed`
+        :param names: packages to add to the mirror
+        :param bool follow_all: fetch all packages changed, not only
+                                the packages mirrored
+        """
+        serial = self.serial()
+        if serial is None:
+            changed, last = set(), feed.last_serial()
+        else:
+            changed, last = feed.changes(serial)
+        if not follow_all:
+            mirrored = {canonical_name(name) for name in self.names()}
+            changed = {name for name in changed
+                       if canonical_name(name) in mirrored}
+        fetched = {canonical_name(name): name for name in changed}
+        fetched.update((canonical_name(name), name) for name in names)
+        for name in fetched.values():
+            try:
+                self.store(feed.project(name))
+            except NotFound:
+                self.remove(name)
+        with self.connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO state VALUES (0, ?)',
+                         (last,))
+        return len(fetched)
+
+    def project(self, name):
+        """Return metadata of the package.
+
+        :rtype: dict
+        :return: ``name``, ``version`` (latest), ``summary`` and ``url``,
+                 or ``None`` when not mirrored
+        """
+        with self.connect() as conn:
+            row = conn.execute('SELECT name, version, summary, url '
+                               'FROM projects WHERE key = ?',
+                               (canonical_name(name),)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('name', 'version', 'summary', 'url'), row))
+
+    def latest_version(self, name):
+        """Return the latest version.
+
+        :rtype: str
+        :return: latest version, or ``None`` when not mirrored
+        """
+        return self.latest_versions([name]).get(name)
+
+    def latest_versions(self, names):
+        """Return the latest versions of many packages in one query.
+
+        :rtype: dict
+        :return: latest versions by the names mirrored
+        :param list names: package names
+        """
+        keys = {canonical_name(name): name for name in names}
+        result = {}
+        with self.connect() as conn:
+            conn.execute('CREATE TEMP TABLE wanted (key TEXT PRIMARY KEY)')
+            conn.executemany('INSERT OR IGNORE INTO wanted VALUES (?)',
+                             [(key,) for key in keys])
+            for key, version in conn.execute(
+                    'SELECT projects.key, version FROM projects '
+                    'JOIN wanted ON projects.key = wanted.key'):
+                result[keys[key]] = version
+        return result
+
+    def releases(self, name):
+        """Return versions of the package, oldest first.
+
+        :rtype: list
+        """
+        with self.connect() as conn:
+            versions = [row[0] for row in conn.execute(
+                'SELECT version FROM releases WHERE key = ?',
+                (canonical_name(name),))]
+        return sorted(versions, key=sort_key)
+
+    def name_index(self):
+        """Return the name index of the packages mirrored.
+
+        The index is built once per synchronization, and built again
+        when another process synchronizes the mirror.
+
+        :rtype: :class:`py_deps.index.NameIndex`
+        """
+        # pylint: disable=import-outside-toplevel,cyclic-import
+        from py_deps.index import NameIndex
+        serial = self.serial()
+        index, built = self._index
+        if index is None or built != serial:
+            index = NameIndex(self.names())
+            self._index = (index, serial)
+        return index
+
+    def search(self, pkg_name, exactly=False):
+        """Search packages mirrored, as :func:`py_deps.deps.search`.
+
+        :rtype: list
+        :return: ``name``, ``version`` and ``summary``
+        """
+        result = []
+        for name in self.name_index().search(pkg_name, exactly):
+            project = self.project(name)
+            result.append(dict(name=project['name'],
+                               version=project['version'],
+                               summary=project['summary']))
+        return result
+
+    @staticmethod
+    def _release(conn, name, version=None, specifier=None):
+        """Return release chosen by version or specifier.
+
+        :rtype: tuple
+        :return: name, version, url and ``Requires-Dist`` (``None`` when
+                 not mirrored), or ``None`` when no release matches
+        """
+        key = canonical_name(name)
+        project = conn.execute('SELECT name, version, url FROM projects '
+                               'WHERE key = ?', (key,)).fetchone()
+        if project is None:
+            return None
+        if version is None and specifier:
+            versions = [row[0] for row in conn.execute(
+                'SELECT version FROM releases WHERE key = ?', (key,))]
+            try:
+                matched = list(SpecifierSet(str(specifier)).filter(
+                    versions))
+            except InvalidSpecifier:
+                matched = []
+            if not matched:
+                return None
+            version = max(matched, key=sort_key)
+        elif version is None:
+            version = project[1]
+        row = conn.execute('SELECT requires_dist FROM releases '
+                           'WHERE key = ? AND version = ?',
+                           (key, version)).fetchone()
+        if row is None:
+            return None
+        return (project[0], version, project[2],
+                None if row[0] is None else json.loads(row[0]))
+
+    def nodes(self, name, version=None, environment=None, bounds=None):
+        """Resolve dependencies from the mirror, without the network.
+
+        The release of a requirement is the latest release matching
+        the specifier. The nodes of the releases without
+        ``Requires-Dist``, and of the packages not mirrored, are not
+        expanded, marked ``incomplete``, and cut the tree as
+        :attr:`py_deps.bounds.Bounds.cut`.
+
+        :rtype: list
+        :return: List of `deps.Node`
+
+        :param str name: package name
+        :param str version: version (default: latest)
+        :param dict environment: marker variables (default: current)
+        :param bounds: bounds of the tree
+        :type bounds: :class:`py_deps.bounds.Bounds`
+        :raises NotFound: the package or the version is not mirrored
+        """
+        # pylint: disable=import-outside-toplevel,cyclic-import,too-many-locals
+        from py_deps.bounds import Bounds
+        from py_deps.deps import Node
+        if bounds is None:
+            bounds = Bounds()
+        nodes = []
+        with self.connect() as conn:
+            release = self._release(conn, name, version)
+            if release is None:
+                raise NotFound(f'{name} {version or ""} is not mirrored')
+            stack = [(release, (), 0, nodes, frozenset())]
+            while stack:
+                release, extras, depth, targets, ancestors = stack.pop()
+                pkg_name, pkg_version, url, requires_dist = release
+                required = [
+                    requirement for requirement
+                    in requirements(requires_dist, environment, extras)
+                    if not bounds.excludes(requirement.name)]
+                node = Node(pkg_name, pkg_version, url=url,
+                            requires=(None if requires_dist is None else
+                                      [req.name for req in required]),
+                            depth=depth,
+                            incomplete=requires_dist is None)
+                targets.append(node)
+                if requires_dist is None:
+                    bounds.cut = True
+                if required and not bounds.expands(node.name, depth):
+                    node.incomplete = True
+                    continue
+                ancestors = ancestors | {canonical_name(pkg_name)}
+                for requirement in reversed(required):
+                    if canonical_name(requirement.name) in ancestors:
+                        continue
+                    release = self._release(conn, requirement.name,
+                                            specifier=requirement.specifier)
+                    if release is None:
+                        release = (requirement.name, None, None, None)
+                    stack.append((release, requirement.extras, depth + 1,
+                                  node.targets, ancestors))
+        return nodes
+
+
+#: mirrors by database file
+MIRRORS = {}
+
+
+def get_mirror(path):
+    """Return mirror shared in the process.
+
+    :rtype: :class:`Mirror`
+    :param path: database file, or :class:`Mirror` object
+    """
+    if isinstance(path, Mirror):
+        return path
+    if path not in MIRRORS:
+        MIRRORS[path] = Mirror(path)
+    return MIRRORS[path]
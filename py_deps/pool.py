@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""py_deps.pool module.
+
+Multi-process resolver pool.
+
+:class:`py_deps.deps.Package` changes ``sys.path`` and the global
+``pkg_resources.working_set``, so the resolutions run in a new process
+per job. The workers lease their own install directories, and send
+the traced chains serialized by
+:class:`py_deps.serializer.BinarySerializer` to the parent, which
+stores them once to the shared cache backend, under the keys of
+the bounds as :class:`py_deps.deps.Package`. The packages not found or
+failed to install are stored as negative cache entries.
+
+A job exceeding the timeout is terminated with the processes it
+started, as pip, in its process group, and a crashed job is reported
+without stopping the other jobs.::
+
+    >>> from py_deps.pool import ResolverPool
+    >>> pool = ResolverPool(workers=4, timeout=600)
+    >>> for result in pool.run([('py-deps', None), ('requests', '2.28.1')]):
+    ...     print(result.name, result.status)
+"""
+import multiprocessing
+import os
+import signal
+import time
+from collections import namedtuple
+from multiprocessing.connection import wait
+from py_deps import cache
+from py_deps.bounds import Bounds, partial_key
+from py_deps.deps import FAILURE_TTL, FAILURES, read_failure, store_failure
+from py_deps.serializer import BinarySerializer, loads
+
+#: resolved in the worker
+OK = 'ok'
+#: read from the cache without the worker
+CACHED = 'cached'
+#: raised an exception in the worker
+FAILED = 'failed'
+#: terminated over the timeout
+TIMEOUT = 'timeout'
+#: worker exited without result
+CRASHED = 'crashed'
+
+#: result of a job
+Result = namedtuple('Result', ['name', 'version', 'status', 'chain', 'error'])
+
+
+def resolve_chain(name, version, **kwargs):
+    """Resolve dependencies in the worker process.
+
+    The worker does not store to the cache, the parent stores
+    the result to the shared cache backend instead.
+
+    :rtype: tuple
+    :return: traced dependency chain, and whether the tree is cut by
+             the deadline
+
+    :param kwargs: parameters of :class:`py_deps.deps.Package`
+    """
+    # pylint: disable=import-outside-toplevel
+    from py_deps.deps import Package
+    pkg = Package(name, version=version, cache=cache.Container(), **kwargs)
+    return pkg.traced_chain, pkg.incomplete
+
+
+def kill(process):
+    """Terminate the worker and its process group.
+
+    The group of the worker is the processes it started, as pip, so
+    that they do not keep writing to the install directory leased.
+
+    :param process: worker process
+    :type process: :class:`multiprocessing.Process`
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.terminate()
+    process.join()
+
+
+def work(func, name, version, conn, kwargs):
+    """Run the job and send the serialized result.
+
+    :param func: resolver function, called as
+                 ``func(name, version, **kwargs)`` as :func:`resolve_chain`
+    :param conn: connection to the parent
+    """
+    try:
+        os.setpgid(0, 0)
+        chain, incomplete = func(name, version, **kwargs)
+        conn.send((OK, (BinarySerializer().dumps(chain), incomplete)))
+    except Exception as exc:  # pylint: disable=broad-except
+        conn.send((FAILED, (type(exc).__name__, str(exc))))
+    finally:
+        conn.close()
+
+
+class ResolverPool:
+    """Multi-process resolver pool."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, workers=None, timeout=None, container=None,
+                 func=resolve_chain, context=None, **kwargs):
+        """Initialize.
+
+        :param int workers: number of concurrent processes
+                            (default: number of CPUs)
+        :param float timeout: seconds per job, ``None`` is unbounded
+        :param container: cache backend
+                          (default: :func:`py_deps.cache.backend`)
+        :type container: :class:`py_deps.cache.Container`
+        :param func: resolver function, called as
+                     ``func(name, version, **package_kwargs)``
+                     in the worker as :func:`resolve_chain`
+        :param context: :mod:`multiprocessing` context
+        :param kwargs: parameters of :func:`py_deps.cache.backend`,
+                       and ``package_kwargs`` of
+                       :class:`py_deps.deps.Package` in the workers
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.package_kwargs = kwargs.pop('package_kwargs', {})
+        #: bounds of the cache keys
+        self.bounds = Bounds(max_depth=self.package_kwargs.get('max_depth'),
+                             exclude=self.package_kwargs.get('exclude'),
+                             stub=self.package_kwargs.get('stub'))
+        if container is None:
+            container = cache.backend(**kwargs)
+        self.container = container
+        self.func = func
+        self.context = context or multiprocessing.get_context()
+
+    def _start(self, job):
+        name, version = job
+        receiver, sender = self.context.Pipe(duplex=False)
+        process = self.context.Process(
+            target=work,
+            args=(self.func, name, version, sender, self.package_kwargs),
+            daemon=True)
+        process.start()
+        try:
+            # also in the parent, not to kill before the worker sets it
+            os.setpgid(process.pid, process.pid)
+        except OSError:
+            pass
+        sender.close()
+        deadline = None
+        if self.timeout is not None:
+            deadline = time.monotonic() + self.timeout
+        return receiver, (name, version, process, deadline)
+
+    def _finish(self, receiver, name, version, process):
+        try:
+            status, payload = receiver.recv()
+        except EOFError:
+            status, payload = CRASHED, None
+        receiver.close()
+        process.join()
+        if status == CRASHED:
+            return Result(name, version, CRASHED, None,
+                          f'exit code {process.exitcode}')
+        if status == FAILED:
+            error, detail = payload
+            if error in FAILURES:
+                store_failure(self.container, (name, version),
+                              FAILURES[error](detail),
+                              self.package_kwargs.get('failure_ttl',
+                                                      FAILURE_TTL))
+            return Result(name, version, FAILED, None, f'{error}: {detail}')
+        raw, incomplete = payload
+        chain = loads(raw)
+        key = self.bounds.key((name, version))
+        if incomplete:
+            key = partial_key(key)
+        self.container.store_data(key, chain)
+        return Result(name, version, OK, chain, None)
+
+    def _cached(self, name, version):
+        """Return cached result as :class:`py_deps.deps.Package`.
+
+        :rtype: :class:`Result`
+        :return: cached tree or failure, or ``None`` when not cached
+        """
+        key = self.bounds.key((name, version))
+        chain = self.container.read_data(key)
+        if chain is None and self.package_kwargs.get('allow_partial'):
+            chain = self.container.read_data(partial_key(key))
+        if chain is not None:
+            return Result(name, version, CACHED, chain, None)
+        failure = read_failure(self.container, (name, version))
+        if failure is not None:
+            return Result(name, version, FAILED, None,
+                          f'{type(failure).__name__}: {failure}')
+        return None
+
+    def run(self, jobs, update_force=False):
+        """Resolve the jobs.
+
+        :rtype: generator
+        :return: :class:`Result` in completion order
+
+        :param jobs: iterable of ``(name, version)``, a job taken
+                     when a worker is free
+        :param bool update_force: resolve even if cached
+        """
+        pending = iter(jobs)
+        running = {}
+        try:
+            while pending is not None or running:
+                while pending is not None and len(running) < self.workers:
+                    job = next(pending, None)
+                    if job is None:
+                        pending = None
+                        break
+                    name, version = job
+                    cached = None
+                    if not update_force:
+                        cached = self._cached(name, version)
+                    if cached is not None:
+                        yield cached
+                        continue
+                    receiver, job = self._start((name, version))
+                    running[receiver] = job
+                if not running:
+                    continue
+                deadlines = [job[3] for job in running.values()
+                             if job[3] is not None]
+                timeout = None
+                if deadlines:
+                    timeout = max(0, min(deadlines) - time.monotonic())
+                for receiver in wait(list(running), timeout):
+                    name, version, process, _ = running.pop(receiver)
+                    yield self._finish(receiver, name, version, process)
+                now = time.monotonic()
+                for receiver, job in list(running.items()):
+                    name, version, process, deadline = job
+                    if deadline is not None and deadline <= now:
+                        del running[receiver]
+                        kill(process)
+                        receiver.close()
+                        yield Result(name, version, TIMEOUT, None,
+                                     f'timeout after {self.timeout} seconds')
+        finally:
+            for receiver, (_, _, process, _) in running.items():
+                kill(process)
+                receiver.close()
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""py_deps.profiling module.
+
+Opt-in profiling of the resolution and the graph export with
+:mod:`cProfile` and :mod:`tracemalloc`.
+
+Enable it with ``profile`` parameter of :class:`py_deps.deps.Package`,
+or :data:`PROFILE_ENV` environment variable, as the directory of
+the dumps. Only ``rate`` fraction of the packages are profiled,
+:data:`RATE_ENV` environment variable in default, and the resolution
+and the graph export of a sampled package are profiled.
+
+Every profiled phase writes ``<name>-<version>-<phase>-...`` files,
+``.prof`` of :mod:`pstats` and ``.tracemalloc`` of the snapshot::
+
+    $ export PY_DEPS_PROFILE=/tmp/profiles PY_DEPS_PROFILE_RATE=0.01
+    $ py-deps http --workers 4
+    $ py-deps profile-summary /tmp/profiles --limit 10
+"""
+import cProfile
+import glob
+import os
+import pstats
+import random
+import re
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+#: environment variable of the directory of the dumps
+PROFILE_ENV = 'PY_DEPS_PROFILE'
+#: environment variable of the sampling rate
+RATE_ENV = 'PY_DEPS_PROFILE_RATE'
+#: characters replaced in the file names
+UNSAFE = re.compile(r'[^A-Za-z0-9._-]+')
+
+
+class Profiler:
+    """Profiler writing the dumps per package and phase."""
+
+    def __init__(self, directory, rate=1.0, memory=True, frames=10):
+        """Initialize.
+
+        :param str directory: directory of the dumps
+        :param float rate: fraction of the resolutions profiled
+        :param bool memory: take tracemalloc snapshots
+        :param int frames: frames of the allocation tracebacks
+        """
+        self.directory = directory
+        self.rate = rate
+        self.memory = memory
+        self.frames = frames
+
+    def sampled(self):
+        """Return whether to profile a package.
+
+        :rtype: bool
+        """
+        return self.rate >= 1 or random.random() < self.rate
+
+    def prefix(self, name, version, phase):
+        """Return the path prefix of the dumps.
+
+        :rtype: str
+        """
+        label = UNSAFE.sub('_', f'{name}-{version or "latest"}-{phase}')
+        return os.path.join(self.directory,
+                            f'{label}-{os.getpid()}-{time.time_ns()}')
+
+    @contextmanager
+    def profile(self, name, version, phase):
+        """Profile the block.
+
+        :param str name: package name
+        :param str version: package version
+        :param str phase: ``resolve`` or ``draw``
+        """
+        started = False
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            started = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            os.makedirs(self.directory, exist_ok=True)
+            prefix = self.prefix(name, version, phase)
+            profiler.dump_stats(f'{prefix}.prof')
+            if self.memory and tracemalloc.is_tracing():
+                tracemalloc.take_snapshot().dump(f'{prefix}.tracemalloc')
+            if started:
+                tracemalloc.stop()
+
+
+def get_profiler(profiler=None):
+    """Return profiler of a package, sampled.
+
+    :rtype: :class:`Profiler`
+    :return: profiler, or ``None`` when profiling is disabled or
+             the package is not sampled
+    :param profiler: directory or :class:`Profiler`
+                     (default: :data:`PROFILE_ENV`)
+    """
+    if not isinstance(profiler, Profiler):
+        directory = profiler or os.environ.get(PROFILE_ENV)
+        if not directory:
+            return None
+        profiler = Profiler(directory,
+                            rate=float(os.environ.get(RATE_ENV, 1)))
+    return profiler if profiler.sampled() else None
+
+
+@contextmanager
+def profile(profiler, name, version, phase):
+    """Profile the block with the profiler, or not when ``None``.
+
+    :param profiler: profiler
+    :type profiler: :class:`Profiler`
+    """
+    if profiler is None:
+        yield
+        return
+    with profiler.profile(name, version, phase):
+        yield
+
+
+def summarize_memory(paths):
+    """Aggregate allocated bytes and blocks by source line.
+
+    :rtype: dict
+    :return: ``line``, ``size`` and ``count`` by source line
+    :param list paths: tracemalloc snapshot files
+    """
+    memory = {}
+    for path in paths:
+        snapshot = tracemalloc.Snapshot.load(path).filter_traces(
+            [tracemalloc.Filter(False, tracemalloc.__file__)])
+        for stat in snapshot.statistics('lineno'):
+            frame = stat.traceback[0]
+            line = f'{frame.filename}:{frame.lineno}'
+            item = memory.setdefault(line, dict(line=line, size=0, count=0))
+            item['size'] += stat.size
+            item['count'] += stat.count
+    return memory
+
+
+def summarize(directory, limit=20):
+    """Aggregate the top hot spots of the dumps.
+
+    :rtype: dict
+    :return: ``dumps`` number of the profiles, ``cpu`` of function,
+             calls, total and cumulative seconds, and ``memory`` of
+             source line, allocated bytes and blocks, sorted by
+             cumulative seconds and bytes
+    :param str directory: directory of the dumps
+    :param int limit: number of hot spots
+    """
+    profiles = sorted(glob.glob(os.path.join(directory, '*.prof')))
+    cpu = []
+    if profiles:
+        stats = pstats.Stats(*profiles)
+        for func, (_, calls, total, cumulative, _) in stats.stats.items():
+            cpu.append(dict(function=pstats.func_std_string(func),
+                            calls=calls, total=total,
+                            cumulative=cumulative))
+        cpu.sort(key=lambda item: item['cumulative'], reverse=True)
+    memory = summarize_memory(
+        sorted(glob.glob(os.path.join(directory, '*.tracemalloc'))))
+    return dict(dumps=len(profiles),
+                cpu=cpu[:limit],
+                memory=sorted(memory.values(), key=lambda item: item['size'],
+                              reverse=True)[:limit])
@@ -0,0 +1,395 @@
+# -*- coding: utf-8 -*-
+"""py_deps.serializer module.
+
+Serializers of the cached values.
+
+Serialized values start with a header of :data:`MAGIC`, the format
+version, the codec and the compression. Values without the header are
+read as pickle, so that the data cached by previous versions remain
+readable.
+
+=========  ==============================================================
+codec      value
+=========  ==============================================================
+``c``      traced chain, flattened to a string table and integers, as
+           JSON
+``j``      other built-in values as JSON, with the tuples, sets and bytes
+           tagged
+``b``      traced chain of format version 1 and 2, with :mod:`marshal`
+``m``      other values of format version 1 and 2, with :mod:`marshal`
+``p``      pickle
+=========  ==============================================================
+
+JSON is readable by any Python version, and safe to read from a cache
+shared with others. The values of :mod:`marshal`, specific to the
+Python version, and pickle are read only with ``allow_pickle``.
+Values of the other codecs, versions or compressions are refused.
+
+Values larger than ``threshold`` bytes are compressed with
+``zstd`` (zstandard), ``lz4`` (lz4) or ``zlib``.
+"""
+import base64
+import json
+import marshal
+import pickle
+import zlib
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None  # pylint: disable=invalid-name
+from py_deps.exceptions import InvalidMetadata
+
+#: header of serialized value
+MAGIC = b'PYDP'
+#: format version, 2 adds the flags of nodes, 3 replaces marshal with JSON
+FORMAT_VERSION = 3
+#: node flag of ``incomplete``
+INCOMPLETE = 1
+#: header length
+HEADER_SIZE = len(MAGIC) + 3
+#: compression identifiers
+COMPRESSIONS = {None: b'n', 'zlib': b'z', 'zstd': b's', 'lz4': b'l'}
+#: codecs of the trusted values only, by format version
+TRUSTED_CODECS = {1: b'bmp', 2: b'bmp', 3: b'p'}
+#: tags of the values JSON does not have, decoded from the items
+TAGS = {'\0t': tuple,
+        '\0s': set,
+        '\0f': frozenset,
+        '\0b': base64.b64decode,
+        '\0d': dict}
+
+
+def available(method):
+    """Return whether the library of the compression is installed.
+
+    :rtype: bool
+    :param str method: ``zlib``, ``zstd``, ``lz4`` or ``None``
+    """
+    if method == 'zstd':
+        return zstandard is not None
+    if method == 'lz4':
+        return lz4 is not None
+    return True
+
+
+def compress(method, data):
+    """Compress data.
+
+    :rtype: bytes
+    :param str method: ``zlib``, ``zstd`` or ``lz4``
+    :param bytes data: data
+    """
+    if method == 'zstd':
+        return zstandard.ZstdCompressor().compress(data)
+    if method == 'lz4':
+        return lz4.frame.compress(data)
+    return zlib.compress(data)
+
+
+def decompress(identifier, data):
+    """Decompress data.
+
+    :rtype: bytes
+    :param bytes identifier: compression identifier
+    :param bytes data: compressed data
+    """
+    if identifier == COMPRESSIONS['zstd']:
+        return zstandard.ZstdDecompressor().decompress(data)
+    if identifier == COMPRESSIONS['lz4']:
+        return lz4.frame.decompress(data)
+    if identifier == COMPRESSIONS['zlib']:
+        return zlib.decompress(data)
+    if identifier == COMPRESSIONS[None]:
+        return data
+    raise InvalidMetadata(f'unknown compression: {identifier}')
+
+
+def to_json(value):
+    """Return JSON compatible value, the other built-in values tagged.
+
+    :rtype: object
+    :raises TypeError: the value is not a built-in value
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [to_json(item) for item in value]
+    if isinstance(value, dict):
+        if all(isinstance(key, str) and not key.startswith('\0')
+               for key in value):
+            return {key: to_json(item) for key, item in value.items()}
+        return {'\0d': [[to_json(key), to_json(item)]
+                        for key, item in value.items()]}
+    if isinstance(value, (bytes, bytearray)):
+        return {'\0b': base64.b64encode(value).decode('ascii')}
+    for tag, kind in (('\0t', tuple), ('\0f', frozenset), ('\0s', set)):
+        if isinstance(value, kind):
+            return {tag: [to_json(item) for item in value]}
+    raise TypeError(f'{type(value).__name__} is not serializable')
+
+
+def from_json(obj):
+    """Decode a tagged value of :func:`to_json`, as ``object_hook``."""
+    if len(obj) == 1:
+        tag, items = next(iter(obj.items()))
+        if tag in TAGS:
+            if tag == '\0d':
+                items = [tuple(item) for item in items]
+            return TAGS[tag](items)
+    return obj
+
+
+def is_chain(data):
+    """Return whether the data is a traced chain.
+
+    :rtype: bool
+    """
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from py_deps.deps import Node
+    if not isinstance(data, list):
+        return False
+    return all(isinstance(node, Node) for node in data)
+
+
+def flatten_chain(chain_data):
+    """Flatten traced chain to a string table and integers.
+
+    The nodes are flattened in preorder, without recursion, as
+    ``name, version, url, depth, flags, len(requires), *requires,
+    len(targets)`` with indexes of the string table, and ``-1`` as
+    ``None``.
+
+    :rtype: tuple
+    :return: tuple of strings and tuple of integers
+    :param list chain_data: List of `deps.Node`
+    """
+    strings = {}
+
+    def index(value):
+        if value is None:
+            return -1
+        return strings.setdefault(value, len(strings))
+
+    ints = [len(chain_data)]
+    stack = list(reversed(chain_data))
+    while stack:
+        node = stack.pop()
+        ints += (index(node.name), index(node.version), index(node.url),
+                 node.depth, INCOMPLETE if node.incomplete else 0)
+        if node.requires is None:
+            ints.append(-1)
+        else:
+            ints.append(len(node.requires))
+            ints += [index(require) for require in node.requires]
+        ints.append(len(node.targets))
+        stack += reversed(node.targets)
+    return tuple(strings), tuple(ints)
+
+
+def restore_node(strings, ints, pos, version=FORMAT_VERSION):
+    """Restore a node without the targets from :func:`flatten_chain` result.
+
+    :rtype: tuple
+    :return: `deps.Node` and the position of the number of its targets
+    :param int pos: position of the node
+    :param int version: format version, ``1`` without the flags
+    """
+    # pylint: disable=import-outside-toplevel,cyclic-import
+    from py_deps.deps import Node
+
+    def string(idx):
+        return None if idx < 0 else strings[idx]
+
+    name, node_version, url, depth = ints[pos:pos + 4]
+    pos += 4
+    flags = 0
+    if version > 1:
+        flags = ints[pos]
+        pos += 1
+    size = ints[pos]
+    pos += 1
+    if size < 0:
+        requires = None
+    else:
+        requires = [strings[idx] for idx in ints[pos:pos + size]]
+        pos += size
+    node = Node(string(name), string(node_version), url=string(url),
+                requires=requires, depth=depth,
+                incomplete=bool(flags & INCOMPLETE))
+    return node, pos
+
+
+def restore_chain(strings, ints, version=FORMAT_VERSION):
+    """Restore traced chain from :func:`flatten_chain` result.
+
+    :rtype: list
+    :return: List of `deps.Node`
+    :param int version: format version, ``1`` without the flags
+    """
+    chain_data = []
+    stack = [[chain_data, ints[0]]]
+    pos = 1
+    while stack:
+        if stack[-1][1] == 0:
+            stack.pop()
+            continue
+        stack[-1][1] -= 1
+        node, pos = restore_node(strings, ints, pos, version)
+        stack[-1][0].append(node)
+        size = ints[pos]
+        pos += 1
+        if size:
+            stack.append([node.targets, size])
+    return chain_data
+
+
+def loads(raw, allow_pickle=True):
+    """Deserialize a value of any serializer.
+
+    :rtype: object
+    :return: deserialized value, or ``raw`` when it is not bytes
+             (stored as is, or deserialized by the client library).
+
+    :param raw: serialized value
+    :param bool allow_pickle: load pickle and legacy values
+    """
+    if not isinstance(raw, (bytes, bytearray, memoryview)):
+        return raw
+    raw = bytes(raw)
+    if not raw.startswith(MAGIC):
+        return load_trusted(b'p', raw, allow_pickle)
+    if len(raw) < HEADER_SIZE:
+        raise InvalidMetadata('truncated header')
+    version, codec, identifier = raw[len(MAGIC):HEADER_SIZE]
+    if version not in TRUSTED_CODECS:
+        raise InvalidMetadata(f'unsupported format version: {version}')
+    codec = bytes([codec])
+    payload = decompress(bytes([identifier]), raw[HEADER_SIZE:])
+    if codec in TRUSTED_CODECS[version]:
+        return load_trusted(codec, payload, allow_pickle, version)
+    try:
+        if codec == b'c' and version == FORMAT_VERSION:
+            return restore_chain(*json.loads(payload), version=version)
+        if codec == b'j' and version == FORMAT_VERSION:
+            return json.loads(payload, object_hook=from_json)
+    except (ValueError, TypeError, IndexError, KeyError) as exc:
+        raise InvalidMetadata(f'broken value: {exc}') from exc
+    raise InvalidMetadata(f'unknown codec: {codec} of version {version}')
+
+
+def load_trusted(codec, payload, allow_pickle, version=FORMAT_VERSION):
+    """Deserialize a value of pickle or :mod:`marshal`.
+
+    :rtype: object
+    :raises InvalidMetadata: the values are not allowed
+    """
+    if not allow_pickle:
+        raise InvalidMetadata('pickle and marshal values are not allowed')
+    if codec == b'b':
+        return restore_chain(*marshal.loads(payload), version=version)
+    if codec == b'm':
+        return marshal.loads(payload)
+    return pickle.loads(payload)
+
+
+class Serializer:
+    """Serializer abstract class."""
+
+    #: default compression threshold in bytes
+    default_threshold = 4096
+
+    def __init__(self, compression=None, threshold=None, allow_pickle=True):
+        """Initialize.
+
+        :param str compression: ``zlib``, ``zstd``, ``lz4`` or ``None``
+        :param int threshold: compress values larger than this bytes
+        :param bool allow_pickle: load pickle and legacy values
+        """
+        if compression not in COMPRESSIONS:
+            raise ValueError(f'unknown compression: {compression}')
+        if not available(compression):
+            raise ValueError(f'compression library of {compression} '
+                             'is not installed')
+        self.compression = compression
+        if threshold is None:
+            threshold = self.default_threshold
+        self.threshold = threshold
+        self.allow_pickle = allow_pickle
+
+    def encode(self, data):
+        """Encode data.
+
+        :rtype: tuple
+        :return: codec identifier and payload
+        """
+        raise NotImplementedError
+
+    def dumps(self, data):
+        """Serialize data.
+
+        :rtype: bytes
+        """
+        codec, payload = self.encode(data)
+        identifier = COMPRESSIONS[None]
+        if self.compression and len(payload) > self.threshold:
+            identifier = COMPRESSIONS[self.compression]
+            payload = compress(self.compression, payload)
+        header = MAGIC + bytes([FORMAT_VERSION]) + codec + identifier
+        return header + payload
+
+    def loads(self, raw):
+        """Deserialize data.
+
+        :rtype: object
+        """
+        return loads(raw, allow_pickle=self.allow_pickle)
+
+
+class PickleSerializer(Serializer):
+    """Pickle serializer."""
+
+    def encode(self, data):
+        """Encode data with pickle."""
+        return b'p', pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+
+class BinarySerializer(Serializer):
+    """Binary serializer of traced chains."""
+
+    def encode(self, data):
+        """Encode data with the traced chain schema or JSON."""
+        if is_chain(data):
+            return b'c', json.dumps(flatten_chain(data),
+                                    separators=(',', ':')).encode('utf-8')
+        try:
+            return b'j', json.dumps(to_json(data),
+                                    separators=(',', ':')).encode('utf-8')
+        except TypeError:
+            if not self.allow_pickle:
+                raise
+            return b'p', pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+
+#: serializer classes by name
+SERIALIZERS = dict(pickle=PickleSerializer, binary=BinarySerializer)
+
+
+def get_serializer(name=None, **kwargs):
+    """Return serializer.
+
+    :rtype: :class:`Serializer`
+    :return: serializer, or ``None`` to store values as is
+
+    :param name: ``pickle``, ``binary``, ``None``,
+                 or :class:`Serializer` object
+    :param kwargs: parameters of :class:`Serializer`
+    """
+    if name is None or isinstance(name, Serializer):
+        return name
+    if name not in SERIALIZERS:
+        raise ValueError(f'unknown serializer: {name}')
+    return SERIALIZERS[name](**kwargs)
@@ -0,0 +1,422 @@
+# -*- coding: utf-8 -*-
+"""py_deps.service module.
+
+Asynchronous HTTP service of resolving and drawing dependencies.
+
+=======================================  ==========================
+``GET /resolve/<name>[/<version>]``      dependency tree as JSON
+``GET /draw/<type>/<name>[/<version>]``  drawing data
+``GET /search/<name>[?exactly=1]``       search result of PyPI, or
+                                         the local name index
+``GET /latest/<name>``                   latest version of PyPI, or
+                                         the index metadata mirror
+``GET /metrics``                         queueing metrics as JSON
+``GET /metrics/prometheus``              :mod:`py_deps.metrics` samples
+=======================================  ==========================
+
+The draw types are ``pretty``, ``linkdraw``, ``networkx`` (node-link
+JSON), ``dot`` and ``blockdiag`` as :func:`py_deps.graph.router`.
+
+Responses of ``resolve`` and ``draw`` carry an ETag derived from the
+package name, version, render type and the tree held, so that it
+changes with a new release or a refreshed cache. ``If-None-Match``
+requests of the trees held are answered with ``304 Not Modified``
+without rendering.
+
+Cold resolutions run in a bounded process pool. When the pool and its
+queue are full, requests are rejected with ``503 Service Unavailable``.
+
+Packages failed to resolve are kept as negative cache entries for
+``failure_ttl`` seconds, and answered with ``404 Not Found`` or
+``502 Bad Gateway`` without resolving again. Names found neither by
+``search`` nor by ``latest`` on PyPI are kept the same way, and
+answered empty without asking PyPI again.
+"""
+import asyncio
+import hashlib
+import json
+import re
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+from networkx.readwrite import json_graph
+from py_deps import cache, graph, metrics, profiling
+from py_deps.bounds import partial_key
+from py_deps.deps import (FAILURE_TTL, LATEST, SEARCH, latest_version,
+                          read_failure, search, store_failure, u2h)
+from py_deps.exceptions import BrokenPackage, NotFound
+from py_deps.pool import resolve_chain
+
+#: render types of ``/draw``
+DRAW_TYPES = {'pretty': None,
+              'linkdraw': 'linkdraw',
+              'networkx': 'networkx',
+              'dot': 'dot',
+              'blockdiag': 'blockdiag'}
+REASONS = {200: 'OK',
+           304: 'Not Modified',
+           400: 'Bad Request',
+           404: 'Not Found',
+           405: 'Method Not Allowed',
+           501: 'Not Implemented',
+           502: 'Bad Gateway',
+           503: 'Service Unavailable'}
+
+#: entity tag of ``If-None-Match``, weak or strong, or ``*``
+ENTITY_TAG = re.compile(r'\*|(?:W/)?"[^"]*"')
+#: HTTP response
+Response = namedtuple('Response', ['status', 'body', 'headers'])
+#: package of a traced chain held, rendered by :func:`py_deps.graph.router`
+Resolved = namedtuple('Resolved', ['name', 'version', 'traced_chain'])
+
+
+class Overloaded(Exception):
+    """Worker pool and its queue are full."""
+
+
+def etag(name, version, render_type, tree):
+    """Return entity tag of the rendered package.
+
+    :rtype: str
+    :return: quoted entity tag
+
+    :param str name: package name
+    :param str version: package version
+    :param str render_type: ``resolve`` or draw type
+    :param list tree: dependency tree, :meth:`py_deps.deps.Node.to_dict`
+                      of the root nodes
+    """
+    source = '\0'.join([name, version or '', render_type,
+                        json.dumps(tree, sort_keys=True)])
+    return f'"{hashlib.sha1(source.encode("utf-8")).hexdigest()}"'
+
+
+def if_none_match(header):
+    """Parse ``If-None-Match`` header of RFC 9110.
+
+    The entity tags are compared weakly, without ``W/`` prefix.
+
+    :rtype: set
+    :return: quoted opaque tags, or ``*`` matching any entity
+    :param str header: header value
+    """
+    return {tag[2:] if tag.startswith('W/') else tag
+            for tag in ENTITY_TAG.findall(header or '')}
+
+
+def json_response(data, status=200, headers=None):
+    """Return JSON response."""
+    headers = dict(headers or {})
+    headers['Content-Type'] = 'application/json'
+    return Response(status, json.dumps(data).encode('utf-8'), headers)
+
+
+def text_response(text, status=200, headers=None):
+    """Return plain text response."""
+    headers = dict(headers or {})
+    headers['Content-Type'] = 'text/plain; charset=utf-8'
+    return Response(status, text.encode('utf-8'), headers)
+
+
+def error_response(status, message=None):
+    """Return error response."""
+    return json_response(dict(error=message or REASONS[status]), status)
+
+
+# pylint: disable=too-many-instance-attributes
+class Service:
+    """HTTP service class."""
+
+    def __init__(self, workers=1, max_queue=16, **kwargs):
+        """Initialize.
+
+        :param int workers: number of resolver processes
+        :param int max_queue: number of cold resolutions waiting a worker
+        :param kwargs: parameters of :func:`py_deps.cache.backend`,
+                       ``failure_ttl`` seconds to keep the failures,
+                       ``index`` file of
+                       :class:`py_deps.index.NameIndex` to search, and
+                       ``mirror`` database file of
+                       :class:`py_deps.mirror.Mirror` to search and
+                       to read the latest versions
+        """
+        self.container = cache.backend(**kwargs)
+        #: seconds to keep negative cache entries
+        self.failure_ttl = kwargs.get('failure_ttl', FAILURE_TTL)
+        #: local name index to search
+        self.index = kwargs.get('index')
+        #: index metadata mirror
+        self.mirror = kwargs.get('mirror')
+        self.workers = workers
+        self.max_queue = max_queue
+        self.executor = None
+        #: one thread of the blocking cache reads and writes
+        self.cache_executor = ThreadPoolExecutor(max_workers=1)
+        self.semaphore = None
+        #: cold resolutions in progress, keyed by (name, version)
+        self.inflight = {}
+        #: queueing metrics
+        self.metrics = dict(requests=0,
+                            not_modified=0,
+                            cache_hits=0,
+                            resolved=0,
+                            failed=0,
+                            negative_hits=0,
+                            rejected=0,
+                            queued=0,
+                            active=0)
+
+    @property
+    def pending(self):
+        """Return number of queued and active cold resolutions."""
+        return self.metrics['queued'] + self.metrics['active']
+
+    async def traced_chain(self, name, version):
+        """Return traced chain from cache or resolve it in the pool.
+
+        Concurrent requests of the same package share one resolution.
+
+        :rtype: list
+        """
+        key = (name, version)
+        chain = await self.cached(self.container.read_data, key)
+        if chain is not None:
+            self.metrics['cache_hits'] += 1
+            return chain
+        failure = await self.cached(read_failure, self.container, key)
+        if failure is not None:
+            self.metrics['negative_hits'] += 1
+            raise failure
+        if key not in self.inflight:
+            if self.pending >= self.workers + self.max_queue:
+                self.metrics['rejected'] += 1
+                raise Overloaded(key)
+            self.inflight[key] = asyncio.ensure_future(self._resolve(key))
+        return await asyncio.shield(self.inflight[key])
+
+    async def _resolve(self, key):
+        """Resolve in the worker pool and store the result."""
+        loop = asyncio.get_event_loop()
+        self.metrics['queued'] += 1
+        try:
+            async with self.semaphore:
+                self.metrics['queued'] -= 1
+                self.metrics['active'] += 1
+                try:
+                    chain, incomplete = await loop.run_in_executor(
+                        self.executor, resolve_chain, *key)
+                finally:
+                    self.metrics['active'] -= 1
+            await self.cached(self.container.store_data,
+                              partial_key(key) if incomplete else key, chain)
+            self.metrics['resolved'] += 1
+            return chain
+        except (NotFound, BrokenPackage) as exc:
+            self.metrics['failed'] += 1
+            await self.cached(store_failure, self.container, key, exc,
+                              self.failure_ttl)
+            raise
+        except Exception:
+            self.metrics['failed'] += 1
+            raise
+        finally:
+            self.inflight.pop(key, None)
+
+    async def dispatch(self, method, target, headers):
+        """Dispatch a request.
+
+        :rtype: :class:`Response`
+
+        :param str method: HTTP method
+        :param str target: request target
+        :param dict headers: request headers with lower case keys
+        """
+        self.metrics['requests'] += 1
+        if method not in ('GET', 'HEAD'):
+            return error_response(405)
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        path = [unquote(part) for part in url.path.split('/') if part]
+        try:
+            if path == ['metrics']:
+                response = json_response(self.metrics)
+            elif path == ['metrics', 'prometheus']:
+                response = text_response(metrics.instrument.export())
+            elif len(path) in (2, 3) and path[0] == 'resolve':
+                response = await self.resolve(path[1:], headers)
+            elif len(path) in (3, 4) and path[0] == 'draw':
+                response = await self.draw(path[1], path[2:], headers,
+                                           query.get('link_prefix', [None])[0])
+            elif len(path) == 2 and path[0] == 'search':
+                response = await self.search(
+                    path[1], query.get('exactly', [''])[0] in ('1', 'true'))
+            elif len(path) == 2 and path[0] == 'latest':
+                response = await self.latest(path[1])
+            else:
+                response = error_response(404)
+        except NotFound as exc:
+            response = error_response(404, f'NotFound: {exc}')
+        except Overloaded:
+            response = error_response(503)
+            response.headers['Retry-After'] = '1'
+        # pylint: disable=broad-except
+        except Exception as exc:
+            response = error_response(502, f'{type(exc).__name__}: {exc}')
+        return response
+
+    @staticmethod
+    async def blocking(func, *args, **kwargs):
+        """Run blocking PyPI request in thread."""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None,
+                                          lambda: func(*args, **kwargs))
+
+    async def cached(self, func, *args):
+        """Run blocking read or write of the cache in thread.
+
+        The cache backend is used by one thread, as it may not be
+        thread safe.
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.cache_executor, func, *args)
+
+    def not_modified(self, tag, headers):
+        """Return 304 response if the client has the entity held."""
+        tags = if_none_match(headers.get('if-none-match'))
+        if '*' in tags or tag in tags:
+            self.metrics['not_modified'] += 1
+            return Response(304, b'', {'ETag': tag})
+        return None
+
+    async def search(self, pkg_name, exactly):
+        """Return packages searched.
+
+        The name index and the mirror are searched on the event loop,
+        and the index of PyPI in thread.
+        """
+        if self.index is not None or self.mirror is not None:
+            return json_response(search(pkg_name, exactly=exactly,
+                                        index=self.index,
+                                        mirror=self.mirror))
+        key = (u2h(pkg_name), SEARCH)
+        if await self.cached(read_failure, self.container, key) is not None:
+            return json_response([])
+        result = await self.blocking(search, pkg_name, exactly=exactly)
+        if not result and not exactly:
+            await self.not_found(key, f'{pkg_name} not on PyPI')
+        return json_response(result)
+
+    async def latest(self, pkg_name):
+        """Return the latest version."""
+        if self.mirror is not None:
+            return json_response(latest_version(pkg_name,
+                                                mirror=self.mirror))
+        key = (u2h(pkg_name), LATEST)
+        if await self.cached(read_failure, self.container, key) is not None:
+            return json_response('')
+        result = await self.blocking(latest_version, pkg_name)
+        if not result:
+            await self.not_found(key, f'{pkg_name} has no releases on PyPI')
+        return json_response(result)
+
+    async def not_found(self, key, detail):
+        """Store negative cache entry of a name not found on PyPI."""
+        await self.cached(store_failure, self.container, key,
+                          NotFound(detail), self.failure_ttl)
+
+    async def resolve(self, name_version, headers):
+        """Return dependency tree."""
+        name, version = (name_version + [None])[:2]
+        tree = [node.to_dict()
+                for node in await self.traced_chain(name, version)]
+        tag = etag(name, version, 'resolve', tree)
+        response = self.not_modified(tag, headers)
+        if response is None:
+            response = json_response(
+                dict(name=name, version=version, tree=tree),
+                headers={'ETag': tag})
+        return response
+
+    async def draw(self, draw_type, name_version, headers, link_prefix):
+        """Return drawing data."""
+        if draw_type not in DRAW_TYPES:
+            return error_response(404, f'unknown draw type: {draw_type}')
+        name, version = (name_version + [None])[:2]
+        chain = await self.traced_chain(name, version)
+        tag = etag(name, version, draw_type,
+                   [node.to_dict() for node in chain])
+        response = self.not_modified(tag, headers)
+        if response is None:
+            with profiling.profile(profiling.get_profiler(), name, version,
+                                   'draw'):
+                data = graph.router(Resolved(name, version, chain),
+                                    draw_type=DRAW_TYPES[draw_type],
+                                    link_prefix=link_prefix)
+            if draw_type in ('pretty', 'dot', 'blockdiag'):
+                response = text_response(data, headers={'ETag': tag})
+            elif draw_type == 'networkx':
+                response = json_response(json_graph.node_link_data(data),
+                                         headers={'ETag': tag})
+            else:
+                response = json_response(data, headers={'ETag': tag})
+        return response
+
+    async def handle(self, reader, writer):
+        """Handle a HTTP connection."""
+        try:
+            method, target, _ = (await reader.readline()).decode(
+                'latin-1').split(' ', 2)
+            headers = {}
+            line = await reader.readline()
+            while line.strip():
+                key, _, value = line.decode('latin-1').partition(':')
+                headers[key.strip().lower()] = value.strip()
+                line = await reader.readline()
+            response = await self.dispatch(method, target, headers)
+        except ValueError:
+            method = 'GET'
+            response = error_response(400)
+        head = [f'HTTP/1.1 {response.status} {REASONS[response.status]}',
+                f'Content-Length: {len(response.body)}',
+                'Connection: close']
+        head += [f'{key}: {value}' for key, value in response.headers.items()]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+        if method != 'HEAD':
+            writer.write(response.body)
+        await writer.drain()
+        writer.close()
+
+    def start(self, executor=None):
+        """Start the worker pool.
+
+        :param executor: executor of resolutions
+                         (default: :class:`ProcessPoolExecutor`)
+        """
+        self.semaphore = asyncio.Semaphore(self.workers)
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        self.executor = executor
+
+    async def serve(self, host='127.0.0.1', port=8080):
+        """Serve HTTP until cancelled."""
+        self.start()
+        try:
+            server = await asyncio.start_server(self.handle, host, port)
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown()
+            self.cache_executor.shutdown()
+
+
+def run(host='127.0.0.1', port=8080, workers=1, max_queue=16, **kwargs):
+    """Run HTTP service.
+
+    :param str host: listen address
+    :param int port: listen port
+    :param int workers: number of resolver processes
+    :param int max_queue: number of cold resolutions waiting a worker
+    :param kwargs: parameters of :func:`py_deps.cache.backend`
+    """
+    service = Service(workers=workers, max_queue=max_queue, **kwargs)
+    asyncio.run(service.serve(host, port))
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""py_deps.snapshot module.
+
+Read-only snapshot of the cache entries, mapped in memory and shared by
+the worker processes. ``snapshot`` command publishes it::
+
+    $ py-deps snapshot /dev/shm/py-deps.snapshot
+    $ py-deps --snapshot /dev/shm/py-deps.snapshot http --workers 4
+"""
+import json
+import mmap
+import os
+import struct
+import time
+from py_deps.cache import Container
+from py_deps.serializer import BinarySerializer
+
+
+class Snapshot(Container):
+    """Cache backend is a read-only snapshot file mapped in memory.
+
+    The entries are stored sorted by key in a file of a header, a table
+    of the offsets and the serialized keys and values, without pointers.
+    The processes map the file with :mod:`mmap` and share its pages. Keys
+    are looked up by binary search on the table in place, but every read
+    copies the value out of the map and deserializes it again, since the
+    values read are not kept.
+
+    :meth:`publish` replaces the file atomically, and the readers map the
+    new file at the next read after ``check_interval`` seconds. Writes are
+    ignored, so use it as the first tier of :class:`py_deps.cache.Tiered`.
+    The entries read are not promoted to the faster tiers, not to copy
+    the shared pages to every process.
+    """
+
+    #: the entries are shared by the processes already
+    promote = False
+    #: header, magic, format version and number of entries
+    header = struct.Struct('<4sHxxQ')
+    #: offset table entry, offsets and lengths of key and value
+    entry = struct.Struct('<QQII')
+    #: magic of snapshot file
+    magic = b'PYDS'
+    #: snapshot file format version
+    file_format = 1
+
+    def __init__(self, cache_name, check_interval=1.0):
+        """Initialize.
+
+        :param str cache_name: snapshot file name
+        :param float check_interval: seconds between checks of the file
+        """
+        super().__init__(cache_name)
+        self.check_interval = check_interval
+        #: mapped file and number of entries
+        self.mapped = (None, 0)
+        self._stat = None
+        self._checked = None
+
+    @staticmethod
+    def _key(key):
+        """Return snapshot key of package name, version."""
+        return json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+
+    @classmethod
+    def publish(cls, mapping, cache_name, serializer=None):
+        """Write the entries to a snapshot file atomically.
+
+        :rtype: int
+        :return: number of entries written
+
+        :param dict mapping: traced dependency chain data by key
+        :param str cache_name: snapshot file name
+        :param serializer: serializer of values (default: binary)
+        """
+        serializer = serializer or BinarySerializer()
+        items = sorted((cls._key(key), serializer.dumps(data))
+                       for key, data in mapping.items() if data is not None)
+        offset = cls.header.size + cls.entry.size * len(items)
+        table = []
+        for key, value in items:
+            table.append(cls.entry.pack(offset, offset + len(key),
+                                        len(key), len(value)))
+            offset += len(key) + len(value)
+        tmp = f'{cache_name}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as fobj:
+            fobj.write(cls.header.pack(cls.magic, cls.file_format,
+                                       len(items)))
+            fobj.writelines(table)
+            for key, value in items:
+                fobj.write(key)
+                fobj.write(value)
+        os.replace(tmp, cache_name)
+        return len(items)
+
+    def _refresh(self):
+        """Map the snapshot file when it is replaced."""
+        now = time.monotonic()
+        if self._checked is not None:
+            if now - self._checked < self.check_interval:
+                return
+        self._checked = now
+        try:
+            stat = os.stat(self.cache_name)
+        except FileNotFoundError:
+            self.mapped, self._stat = (None, 0), None
+            return
+        stat = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stat == self._stat:
+            return
+        with open(self.cache_name, 'rb') as fobj:
+            mapped = mmap.mmap(fobj.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = self.header.unpack_from(mapped)
+        if magic != self.magic or version != self.file_format:
+            raise ValueError(f'not a snapshot: {self.cache_name}')
+        # the previous map is closed when the readers release it
+        self.mapped, self._stat = (mapped, count), stat
+
+    def _entry(self, mapped, idx):
+        return self.entry.unpack_from(
+            mapped, self.header.size + self.entry.size * idx)
+
+    def store_data(self, key, data):
+        """Ignore writes, the snapshot is read-only."""
+
+    def read_data(self, key):
+        """Read traced_chain data.
+
+        :rtype: list
+        :return: dependency chain list
+
+        :param tuple key: package name, version
+        """
+        self._refresh()
+        mapped, count = self.mapped
+        target = self._key(key)
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            key_offset, _, key_length, _ = self._entry(mapped, middle)
+            if mapped[key_offset:key_offset + key_length] < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low == count:
+            return None
+        key_offset, value_offset, key_length, value_length = self._entry(
+            mapped, low)
+        if mapped[key_offset:key_offset + key_length] != target:
+            return None
+        return self.loads(mapped[value_offset:value_offset + value_length])
+
+    def list_data(self):
+        """Return dictionary stored package metadata.
+
+        :rtype: dict
+        :return: packages metadata
+        """
+        self._refresh()
+        mapped, count = self.mapped
+        result = {}
+        for idx in range(count):
+            key_offset, value_offset, key_length, value_length = self._entry(
+                mapped, idx)
+            key = tuple(json.loads(mapped[key_offset:key_offset + key_length]))
+            result[key] = self.loads(
+                mapped[value_offset:value_offset + value_length])
+        return result
+
+    def list_keys(self):
+        """Return keys of the snapshot, without decoding the values.
+
+        :rtype: list
+        :return: keys of package name, version
+        """
+        self._refresh()
+        mapped, count = self.mapped
+        keys = []
+        for idx in range(count):
+            key_offset, _, key_length, _ = self._entry(mapped, idx)
+            keys.append(tuple(json.loads(
+                mapped[key_offset:key_offset + key_length])))
+        return keys
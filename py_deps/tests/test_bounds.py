@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_bounds module."""
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from mock import patch
+from py_deps import bounds, cache, deps, metadata
+from py_deps.tests.test_metadata import load_report
+
+
+class BoundsTests(unittest.TestCase):
+
+    """Tests of Bounds."""
+
+    def test_key(self):
+        """Test keys of bounded trees."""
+        self.assertEqual(bounds.Bounds(deadline=60).key(('py-deps', None)),
+                         ('py-deps', None))
+        self.assertEqual(
+            bounds.Bounds(max_depth=2, stub=['Setuptools', 'pip']).key(
+                ('py-deps', None)),
+            ('py-deps', None, bounds.BOUNDED, 2, '', 'pip,setuptools'))
+        self.assertEqual(bounds.partial_key(('py-deps', None)),
+                         ('py-deps', None, bounds.PARTIAL))
+
+    def test_expands(self):
+        """Test nodes expanded by depth and stubs."""
+        bound = bounds.Bounds(max_depth=2, stub=['setuptools'])
+        self.assertTrue(bound.expands('requests', 1))
+        self.assertFalse(bound.expands('requests', 2))
+        self.assertFalse(bound.expands('Setuptools', 0))
+        self.assertFalse(bound.cut)
+
+    def test_deadline(self):
+        """Test nodes not expanded after the deadline."""
+        self.assertIsNone(bounds.Bounds().remaining())
+        bound = bounds.Bounds(deadline=0)
+        self.assertTrue(bound.expired())
+        self.assertFalse(bound.expands('requests', 0))
+        self.assertTrue(bound.cut)
+
+    def test_nodes_from_report(self):
+        """Test bounded tree of installation report."""
+        report = load_report()
+        nodes = metadata.nodes_from_report(
+            report, bounds.Bounds(exclude=['IDNA']))
+        self.assertEqual([node.name for node in nodes[0].targets],
+                         ['charset-normalizer', 'urllib3', 'certifi'])
+        nodes = metadata.nodes_from_report(report,
+                                           bounds.Bounds(max_depth=0))
+        self.assertEqual(nodes[0].targets, [])
+        self.assertTrue(nodes[0].incomplete)
+
+
+@patch('py_deps.deps.subprocess.run')
+class DeadlineTests(unittest.TestCase):
+
+    """Tests of Package cut by the deadline."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.kwargs = dict(cache_name=os.path.join(self.tempdir,
+                                                   'py-deps.pickle'),
+                           envpool=self.tempdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_partial(self, _mock):
+        """Test partial tree is cached under the partial key."""
+        _mock.side_effect = subprocess.TimeoutExpired('pip', 10)
+        pkg = deps.Package('py-deps', deadline=10, **self.kwargs)
+        self.assertLessEqual(_mock.call_args[1]['timeout'], 10)
+        self.assertTrue(pkg.incomplete)
+        self.assertTrue(pkg.traced_chain[0].incomplete)
+        container = cache.backend(**self.kwargs)
+        self.assertIsNone(container.read_data(('py-deps', None)))
+        self.assertEqual(container.read_data(
+            bounds.partial_key(('py-deps', None)))[0].name, 'py-deps')
+        pkg = deps.Package('py-deps', allow_partial=True, **self.kwargs)
+        self.assertTrue(pkg.incomplete)
+        self.assertEqual(_mock.call_count, 1)
+        deps.Package('py-deps', deadline=10, **self.kwargs)
+        self.assertEqual(_mock.call_count, 2)
+
+    def test_bounded_key(self, _mock):
+        """Test bounded tree does not shadow complete tree."""
+        container = cache.backend(**self.kwargs)
+        chain = [deps.Node('py-deps')]
+        container.store_data(('py-deps', None, bounds.BOUNDED, 1, '', ''),
+                             chain)
+        pkg = deps.Package('py-deps', max_depth=1, cache=container)
+        self.assertFalse(pkg.incomplete)
+        self.assertEqual(pkg.traced_chain[0].name, 'py-deps')
+        _mock.assert_not_called()
+        self.assertIsNone(container.read_data(('py-deps', None)))
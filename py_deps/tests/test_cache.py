@@ -0,0 +1,455 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_cache module."""
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from mock import patch
+from py_deps import cache
+from py_deps.exceptions import BackendFailure, InvalidMetadata
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+KEY = ('backup2swift', None)
+
+
+class StandInClient:
+
+    """Stand-in of pylibmc.Client, counting round trips."""
+
+    def __init__(self):
+        self.data = {}
+        self.behaviors = {}
+        self.round_trips = 0
+
+    def get(self, key):
+        self.round_trips += 1
+        value = self.data.get(key)
+        return None if value is None else pickle.loads(value[0])
+
+    def gets(self, key):
+        self.round_trips += 1
+        value = self.data.get(key)
+        if value is None:
+            return None, None
+        return pickle.loads(value[0]), value[1]
+
+    def add(self, key, value):
+        self.round_trips += 1
+        if key in self.data:
+            return False
+        self.data[key] = (pickle.dumps(value), 1)
+        return True
+
+    def cas(self, key, value, cas_id):
+        self.round_trips += 1
+        if self.data[key][1] != cas_id:
+            return False
+        self.data[key] = (pickle.dumps(value), cas_id + 1)
+        return True
+
+    def get_multi(self, keys):
+        self.round_trips += 1
+        return {key: pickle.loads(self.data[key][0])
+                for key in keys if key in self.data}
+
+    def set_multi(self, mapping):
+        self.round_trips += 1
+        for key, value in mapping.items():
+            version = self.data.get(key, (None, 0))[1]
+            self.data[key] = (pickle.dumps(value), version + 1)
+        return []
+
+
+class PickleTests(unittest.TestCase):
+
+    """Tests of Pickle backend."""
+
+    def setUp(self):
+        self.chain = cache.backend(cache_name=CACHE_NAME).read_data(KEY)
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_name = os.path.join(self.tempdir, 'py-deps.pickle')
+        shutil.copy(CACHE_NAME, self.cache_name)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_legacy_file(self):
+        """Test reading and rewriting the file of previous versions."""
+        container = cache.Pickle(self.cache_name)
+        self.assertEqual(container.read_data(KEY)[0].name, 'backup2swift')
+        self.assertEqual(container.access[KEY]['hits'], 1)
+        container.store_data(('swiftsc', None), self.chain[0].targets[:1])
+        self.assertListEqual(os.listdir(self.tempdir), ['py-deps.pickle'])
+        reopened = cache.Pickle(self.cache_name)
+        self.assertEqual(reopened.access[KEY]['hits'], 1)
+        self.assertEqual(len(reopened.list_data()), len(container.container))
+
+    def test_lru(self):
+        """Test evicting least recently used entries."""
+        container = cache.Pickle(self.cache_name, max_entries=2)
+        container.store_data(('a', None), self.chain)
+        container.read_data(KEY)
+        container.store_data(('b', None), self.chain)
+        self.assertListEqual(sorted(container.container, key=str),
+                             [('b', None), KEY])
+
+    def test_lfu(self):
+        """Test evicting least frequently used entries."""
+        container = cache.Pickle(self.cache_name, max_entries=2,
+                                 policy='lfu')
+        container.store_data(('a', None), self.chain)
+        container.read_data(('a', None))
+        container.read_data(KEY)
+        container.read_data(('a', None))
+        container.store_data(('b', None), self.chain)
+        self.assertIsNone(container.read_data(KEY))
+        self.assertIsNotNone(container.read_data(('a', None)))
+
+    def test_max_bytes(self):
+        """Test evicting entries over total size."""
+        container = cache.Pickle(self.cache_name, serializer=None)
+        size = container.size(KEY)
+        container.max_bytes = size * 2
+        container.store_data(('a', None), self.chain)
+        container.store_data(('b', None), self.chain)
+        self.assertEqual(len(container.container), 2)
+        self.assertNotIn(KEY, container.container)
+
+    @patch('time.time')
+    def test_ttl(self, _mock):
+        """Test expired entries are not read and dropped."""
+        _mock.return_value = 1000
+        container = cache.Pickle(self.cache_name, ttl=60)
+        _mock.return_value = 1061
+        self.assertIsNone(container.read_data(KEY))
+        container.store_data(('a', None), self.chain)
+        self.assertListEqual(list(container.container), [('a', None)])
+
+    def test_compact(self):
+        """Test compaction drops unreadable entries."""
+        container = cache.Pickle(self.cache_name)
+        container.container[('broken', None)] = b'PYDP\x09bn'
+        container.container[('empty', None)] = None
+        container.access[('broken', None)] = dict(container.access[KEY])
+        container.access[('empty', None)] = dict(container.access[KEY])
+        self.assertEqual(container.compact(), 2)
+        self.assertListEqual(list(cache.Pickle(self.cache_name).container),
+                             [KEY])
+
+
+class MemcachedTests(unittest.TestCase):
+
+    """Tests of Memcached backend."""
+
+    def setUp(self):
+        self.chain = cache.backend(cache_name=CACHE_NAME).read_data(KEY)
+        self.client = StandInClient()
+        self.memcached = cache.Memcached(client=self.client,
+                                         serializer=None)
+
+    def test_behaviors(self):
+        """Test CAS behavior is enabled."""
+        self.assertDictEqual(self.client.behaviors, dict(cas=True))
+
+    def test_store_and_read(self):
+        """Test store and read."""
+        self.memcached.store_data(KEY, self.chain)
+        self.assertEqual(self.memcached.read_data(KEY)[0].name,
+                         'backup2swift')
+        self.assertIsNone(self.memcached.read_data(('py-deps', None)))
+
+    def test_failure_key(self):
+        """Test negative cache keys are distinct."""
+        self.memcached.store_data(('py-deps', None, 'failure'),
+                                  dict(error='NotFound'))
+        self.assertIsNone(self.memcached.read_data(('py-deps', None)))
+        self.assertEqual(
+            self.memcached.read_data(('py-deps', None, 'failure')),
+            dict(error='NotFound'))
+
+    def test_many(self):
+        """Test read_many and store_many in a round trip."""
+        keys = [(f'p{i}', '1.0') for i in range(500)]
+        self.memcached.store_many({key: self.chain for key in keys})
+        self.client.round_trips = 0
+        result = self.memcached.read_many(keys + [('missing', None)])
+        self.assertEqual(self.client.round_trips, 1)
+        self.assertEqual(len(result), 500)
+
+    def test_list_data(self):
+        """Test listing registered keys."""
+        self.memcached.store_data(KEY, self.chain)
+        self.memcached.store_data(('swiftsc', '0.7.2'),
+                                  self.chain[0].targets[:1])
+        self.assertListEqual(sorted(self.memcached.list_data(), key=str),
+                             [KEY, ('swiftsc', '0.7.2')])
+        self.client.round_trips = 0
+        self.assertListEqual(self.memcached.list_keys(),
+                             [KEY, ('swiftsc', '0.7.2')])
+        self.assertEqual(self.client.round_trips, 1)
+
+    def test_registry_shards(self):
+        """Test keys are registered to the shards."""
+        keys = [(f'p{i}', '1.0') for i in range(500)]
+        self.memcached.store_many({key: self.chain for key in keys})
+        shards = [key for key in self.client.data
+                  if key.startswith('py-deps:keys:')]
+        self.assertEqual(len(shards), cache.Memcached.registry_shards)
+        self.assertEqual(len(self.memcached.list_data()), 500)
+
+    def test_legacy_registry(self):
+        """Test listing keys of the registry of previous versions."""
+        self.client.set_multi({'py-deps:keys': {KEY},
+                               'backup2swift None': self.chain})
+        self.assertListEqual(list(self.memcached.list_data()), [KEY])
+
+    def test_registry_failure(self):
+        """Test failure of registering keys is raised."""
+        self.client.add = lambda key, value: False
+        with self.assertRaises(BackendFailure):
+            self.memcached.store_data(KEY, self.chain)
+
+    def test_near_cache(self):
+        """Test near-cache saves round trips."""
+        memcached = cache.Memcached(client=self.client, near_cache_size=2)
+        memcached.store_data(KEY, self.chain)
+        self.client.round_trips = 0
+        self.assertIs(memcached.read_data(KEY), self.chain)
+        self.assertEqual(self.client.round_trips, 0)
+
+    def test_backend(self):
+        """Test backend with servers."""
+        with patch('py_deps.cache.pylibmc', create=True) as _mock:
+            _mock.Client.return_value = self.client
+            memcached = cache.backend(servers=['127.0.0.1'],
+                                      near_cache_size=10)
+        self.assertIs(memcached.container, self.client)
+        self.assertEqual(memcached.near_cache.maxsize, 10)
+
+    def test_backend_allow_pickle(self):
+        """Test backend with servers refuses pickle in default."""
+        with patch('py_deps.cache.pylibmc', create=True) as _mock:
+            _mock.Client.return_value = self.client
+            memcached = cache.backend(servers=['127.0.0.1'])
+            self.assertFalse(memcached.serializer.allow_pickle)
+            with self.assertRaises(InvalidMetadata):
+                memcached.loads(b'PYDP\x02pn' + pickle.dumps(self.chain))
+            memcached = cache.backend(servers=['127.0.0.1'],
+                                      allow_pickle=True)
+            self.assertIsNone(memcached.serializer)
+
+
+class LRUTests(unittest.TestCase):
+
+    """Tests of LRU class."""
+
+    def test_evict(self):
+        """Test evicting least recently used entry."""
+        lru = cache.LRU(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(len(lru), 2)
+
+    @patch('time.monotonic')
+    def test_ttl(self, _mock):
+        """Test expiration."""
+        _mock.return_value = 100
+        lru = cache.LRU(2, ttl=10)
+        lru.set('a', 1)
+        _mock.return_value = 111
+        self.assertIsNone(lru.get('a'))
+
+    def test_max_bytes(self):
+        """Test evicting entries over total size."""
+        lru = cache.LRU(10, max_bytes=10)
+        lru.set('a', 1, size=4)
+        lru.set('b', 2, size=4)
+        lru.set('c', 3, size=4)
+        self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.size, 8)
+        lru.set('d', 4, size=11)
+        self.assertIsNone(lru.get('d'))
+        self.assertEqual(len(lru), 2)
+
+    def test_disabled(self):
+        """Test zero size disables caching."""
+        lru = cache.LRU(0)
+        lru.set('a', 1)
+        self.assertIsNone(lru.get('a'))
+
+
+class WatchError(Exception):
+
+    """Stand-in of redis.WatchError."""
+
+
+class StandInRedis:
+
+    """Stand-in of redis.Redis."""
+
+    def __init__(self):
+        self.data = {}
+        self.versions = {}
+        self.expirations = {}
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.versions[key] = self.versions.get(key, 0) + 1
+        self.expirations[key] = ex
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def scan_iter(self, match=None, count=None):
+        return iter([key.encode('utf-8') for key in self.data
+                     if key.startswith(match.rstrip('*'))])
+
+    def pipeline(self, transaction=True):
+        return StandInPipeline(self)
+
+
+class StandInPipeline:
+
+    """Stand-in of redis.client.Pipeline."""
+
+    def __init__(self, client):
+        self.client = client
+        self.watched = {}
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def watch(self, key):
+        self.watched[key] = self.client.versions.get(key)
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def multi(self):
+        self.commands = []
+
+    def set(self, *args, **kwargs):
+        self.commands.append((args, kwargs))
+
+    def execute(self):
+        commands, self.commands = self.commands, []
+        watched, self.watched = self.watched, {}
+        for key, version in watched.items():
+            if self.client.versions.get(key) != version:
+                raise WatchError(key)
+        for args, kwargs in commands:
+            self.client.set(*args, **kwargs)
+
+
+@patch('py_deps.cache.redis', create=True, WatchError=WatchError)
+class RedisTests(unittest.TestCase):
+
+    """Tests of Redis backend."""
+
+    def setUp(self):
+        self.chain = cache.backend(cache_name=CACHE_NAME).read_data(KEY)
+        self.client = StandInRedis()
+        self.redis = cache.Redis(client=self.client, ttl=60)
+
+    def test_store_and_read(self, _mock):
+        """Test store and read with TTL."""
+        self.redis.store_data(KEY, self.chain)
+        self.assertEqual(self.redis.read_data(KEY)[0].name, 'backup2swift')
+        self.assertIsInstance(self.client.data['py-deps:["backup2swift", '
+                                               'null]'], bytes)
+        self.assertEqual(set(self.client.expirations.values()), {60})
+
+    def test_refuse_pickle(self, _mock):
+        """Test raw pickle values are refused in default."""
+        key = 'py-deps:["backup2swift", null]'
+        self.client.data[key] = pickle.dumps(self.chain)
+        with self.assertRaises(InvalidMetadata):
+            self.redis.read_data(KEY)
+        allowed = cache.Redis(client=self.client, allow_pickle=True)
+        self.assertEqual(allowed.read_data(KEY)[0].name, 'backup2swift')
+
+    def test_many(self, _mock):
+        """Test store_many and read_many."""
+        keys = [(f'p{i}', '1.0') for i in range(10)]
+        self.redis.store_many({key: self.chain for key in keys})
+        self.assertEqual(len(self.redis.read_many(keys + [KEY])), 10)
+        self.assertEqual(sorted(self.redis.list_data()), sorted(keys))
+
+    def test_update_data(self, _mock):
+        """Test update is retried on concurrent write."""
+        calls = []
+
+        def append(data):
+            calls.append(data)
+            if len(calls) == 1:
+                self.redis.store_data(KEY, [])
+            return (data or []) + self.chain
+
+        self.redis.update_data(KEY, append)
+        self.assertEqual(calls[0], None)
+        self.assertListEqual(calls[1], [])
+        self.assertEqual(len(self.redis.read_data(KEY)), 1)
+
+    def test_backend(self, _mock):
+        """Test backend shares connection pool."""
+        cache.POOLS.clear()
+        self.addCleanup(cache.POOLS.clear)
+        cache.backend(redis_url='redis://localhost:6379/1')
+        cache.backend(redis_url='redis://localhost:6379/1')
+        _mock.ConnectionPool.from_url.assert_called_once_with(
+            'redis://localhost:6379/1')
+        self.assertEqual(_mock.Redis.call_count, 2)
+
+
+class TieredTests(unittest.TestCase):
+
+    """Tests of Tiered backend."""
+
+    def setUp(self):
+        self.chain = cache.backend(cache_name=CACHE_NAME).read_data(KEY)
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_name = os.path.join(self.tempdir, 'py-deps.pickle')
+        self.remote = cache.Memcached(client=StandInClient())
+        self.tiered = cache.Tiered([cache.Memory(),
+                                    cache.Pickle(self.cache_name),
+                                    self.remote])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_promote(self):
+        """Test reads promote entries to faster tiers."""
+        self.remote.store_data(KEY, self.chain)
+        self.assertEqual(self.tiered.read_data(KEY)[0].name, 'backup2swift')
+        self.assertEqual(self.tiered.read_data(KEY)[0].name, 'backup2swift')
+        self.assertIsNone(self.tiered.read_data(('py-deps', None)))
+        self.assertDictEqual(self.tiered.hits,
+                             dict(Memory=1, Pickle=0, Memcached=1, miss=1))
+        self.assertIsNotNone(
+            cache.Pickle(self.cache_name).read_data(KEY))
+
+    def test_write_through(self):
+        """Test writes go through all tiers."""
+        self.tiered.store_data(KEY, self.chain)
+        for tier in self.tiered.tiers:
+            self.assertIsNotNone(tier.read_data(KEY))
+        self.assertListEqual(list(self.tiered.list_data()), [KEY])
+
+    def test_backend(self):
+        """Test tiered backend."""
+        tiered = cache.backend(cache_name=self.cache_name, tiered=True,
+                               memory_bytes=1024)
+        self.assertListEqual(tiered.names, ['Memory', 'Pickle'])
+        self.assertEqual(tiered.tiers[0].container.max_bytes, 1024)
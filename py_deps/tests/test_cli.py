@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_cli module."""
+import io
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+from mock import patch
+from py_deps import cli
+from py_deps.daemon import Daemon
+from py_deps.exceptions import DaemonFailure
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+
+
+class ParseOptionsTests(unittest.TestCase):
+
+    """Tests of command line arguments."""
+
+    def test_draw(self):
+        """Test draw command."""
+        args = cli.parse_options(['draw', 'backup2swift',
+                                  '--type', 'linkdraw'])
+        self.assertDictEqual(cli.payload_from_args(args),
+                             dict(command='draw',
+                                  name='backup2swift',
+                                  version=None,
+                                  link_prefix=None,
+                                  draw_type='linkdraw'))
+
+    def test_pretty_print(self):
+        """Test draw command without type."""
+        args = cli.parse_options(['draw', 'backup2swift'])
+        self.assertIsNone(cli.payload_from_args(args).get('draw_type'))
+
+    @patch.dict(os.environ, {cli.SOCKET_ENV: '/tmp/py-deps.sock'})
+    def test_socket_env(self):
+        """Test socket path from environment variable."""
+        self.assertEqual(cli.parse_options(['list-cache']).socket,
+                         '/tmp/py-deps.sock')
+
+
+class MainTests(unittest.TestCase):
+
+    """Tests of local execution."""
+
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_draw(self, _stdout):
+        """Test draw command."""
+        self.assertEqual(cli.main(['--cache-name', CACHE_NAME,
+                                   'draw', 'backup2swift']), 0)
+        self.assertTrue(_stdout.getvalue().startswith('backup2swift -> ['))
+
+    @patch('sys.stderr', new_callable=io.StringIO)
+    def test_serve_without_socket(self, _stderr):
+        """Test serve command requires socket path."""
+        with patch.dict(os.environ, clear=True):
+            self.assertEqual(cli.main(['serve']), 2)
+
+
+class DaemonTests(unittest.TestCase):
+
+    """Tests of resolver daemon."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'py-deps.sock')
+        self.daemon = Daemon(self.path, cache_name=CACHE_NAME)
+        self.thread = threading.Thread(target=self.daemon.serve)
+        self.thread.start()
+
+    def tearDown(self):
+        cli.request(self.path, dict(command='shutdown'))
+        self.thread.join()
+        shutil.rmtree(self.tempdir)
+
+    def test_resolve(self):
+        """Test resolve command via daemon."""
+        result = cli.request(self.path, dict(command='resolve',
+                                             name='backup2swift'))
+        self.assertEqual(result['tree'][0]['name'], 'backup2swift')
+        self.assertEqual(len(result['tree'][0]['targets']), 2)
+
+    def test_list_cache(self):
+        """Test list-cache command via daemon."""
+        self.assertIn(['backup2swift', None],
+                      cli.request(self.path, dict(command='list-cache')))
+
+    def test_error(self):
+        """Test error response of daemon."""
+        with self.assertRaises(DaemonFailure):
+            cli.request(self.path, dict(command='unknown'))
+
+    def test_socket_mode(self):
+        """Test the socket is accessible only by the owner."""
+        self.assertEqual(stat.S_IMODE(os.stat(self.path).st_mode), 0o600)
+
+    def test_not_socket(self):
+        """Test a file other than a socket is not removed."""
+        path = os.path.join(self.tempdir, 'file')
+        with open(path, 'w', encoding='utf-8') as fobj:
+            fobj.write('keep')
+        with self.assertRaises(OSError):
+            Daemon(path, cache_name=CACHE_NAME)
+        with open(path, encoding='utf-8') as fobj:
+            self.assertEqual(fobj.read(), 'keep')
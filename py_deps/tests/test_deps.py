@@ -3,9 +3,13 @@
 import unittest
 import itertools
 import os
+import shutil
+import subprocess
+import tempfile
+import xmlrpc.client as xmlrpclib
 from mock import patch
-from py_deps import deps
-from py_deps.exceptions import BackendFailure
+from py_deps import cache, deps, envpool
+from py_deps.exceptions import BackendFailure, BrokenPackage, NotFound
 
 
 class SearchTests(unittest.TestCase):
@@ -73,6 +77,40 @@ class SearchTests(unittest.TestCase):
         with self.assertRaises(BackendFailure):
             deps.latest_version('py-deps')
 
+    @patch('xmlrpc.client.ServerProxy')
+    def test_latest_version_not_found(self, _mock):
+        """Test packages without releases are cached until expired."""
+        container = cache.Memory()
+        client_mock = _mock.return_value
+        client_mock.package_releases.return_value = []
+        self.assertEqual(deps.latest_version('no_such', cache=container), '')
+        self.assertEqual(deps.latest_version('no-such', cache=container), '')
+        self.assertEqual(client_mock.package_releases.call_count, 1)
+        self.assertIsInstance(
+            deps.read_failure(container, ('no-such', deps.LATEST)), NotFound)
+        with patch('py_deps.deps.time.time', return_value=1e12):
+            deps.latest_version('no-such', cache=container)
+        self.assertEqual(client_mock.package_releases.call_count, 2)
+
+    @patch('xmlrpc.client.ServerProxy')
+    def test_search_not_found(self, _mock):
+        """Test names not found are cached, and failures are not."""
+        container = cache.Memory()
+        client_mock = _mock.return_value
+        client_mock.search.side_effect = xmlrpclib.Fault(1, 'rate limited')
+        with self.assertRaises(BackendFailure):
+            deps.search('no-such', cache=container)
+        client_mock.search.side_effect = None
+        client_mock.search.return_value = []
+        self.assertListEqual(deps.search('no-such', cache=container), [])
+        self.assertListEqual(
+            deps.search('no-such', exactly=True, cache=container), [])
+        self.assertEqual(client_mock.search.call_count, 2)
+        client_mock.search.return_value = self.search_result
+        self.assertListEqual(deps.search('deps', cache=container),
+                             self.search_result)
+        self.assertIsNone(deps.read_failure(container, ('deps', deps.SEARCH)))
+
     def test_u2h(self):
         """teest convert underscore to hyphen."""
         self.assertEqual(deps.u2h('foo_bar'), 'foo-bar')
@@ -90,7 +128,7 @@ class PackageTests(unittest.TestCase):
         """Test contstructor."""
         self.assertEqual(self.pkg.name, 'backup2swift')
         self.assertIsNone(self.pkg.version)
-        self.assertFalse(os.path.isdir(self.pkg.tempdir))
+        self.assertIsNone(self.pkg.tempdir)
         self.assertEqual(len(self.pkg.traced_chain), 1)
         self.assertEqual(self.pkg.traced_chain[0].name, 'backup2swift')
         self.assertEqual(len(self.pkg.traced_chain[0].targets), 2)
@@ -107,3 +145,66 @@ class PackageTests(unittest.TestCase):
                     draw_type='linkdraw', link_prefix='/graph'
                 ).get('nodes')
             ), 9)
+
+
+def pip_error(stderr):
+    """Return failure of pip command."""
+    return subprocess.CalledProcessError(1, ['pip', 'install'],
+                                         stderr=stderr.encode('utf-8'))
+
+
+class FailureTests(unittest.TestCase):
+
+    """Tests of negative caching."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.kwargs = dict(cache_name=os.path.join(self.tempdir,
+                                                   'py-deps.pickle'),
+                           envpool=self.tempdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_classify(self):
+        """Test classifying errors of pip."""
+        error = deps.classify(pip_error(
+            'ERROR: No matching distribution found for no-such-pkg'))
+        self.assertIsInstance(error, NotFound)
+        error = deps.classify(pip_error(
+            'WARNING: Retrying after connection broken: '
+            'Max retries exceeded with url\n'
+            'ERROR: No matching distribution found for py-deps'))
+        self.assertIsInstance(error, BackendFailure)
+        error = deps.classify(pip_error(
+            'error: subprocess-exited-with-error\n'
+            'ERROR: Failed building wheel for broken'))
+        self.assertIsInstance(error, BrokenPackage)
+        self.assertEqual(str(error).splitlines()[-1],
+                         'ERROR: Failed building wheel for broken')
+
+    @patch('py_deps.deps.subprocess.run')
+    def test_negative_cache(self, _mock):
+        """Test failures are cached until expired."""
+        _mock.side_effect = pip_error(
+            'ERROR: No matching distribution found for no-such-pkg')
+        with self.assertRaises(NotFound):
+            deps.Package('no-such-pkg', **self.kwargs)
+        with self.assertRaises(NotFound):
+            deps.Package('no-such-pkg', **self.kwargs)
+        self.assertEqual(_mock.call_count, 1)
+        with envpool.get_pool(self.tempdir).lease() as path:
+            self.assertTrue(path.endswith('env-0'))
+        with patch('py_deps.deps.time.time', return_value=1e12):
+            with self.assertRaises(NotFound):
+                deps.Package('no-such-pkg', **self.kwargs)
+        self.assertEqual(_mock.call_count, 2)
+
+    @patch('py_deps.deps.subprocess.run')
+    def test_backend_failure(self, _mock):
+        """Test network failures are not cached."""
+        _mock.side_effect = pip_error('Temporary failure in name resolution')
+        with self.assertRaises(BackendFailure):
+            deps.Package('py-deps', **self.kwargs)
+        container = cache.backend(**self.kwargs)
+        self.assertIsNone(deps.read_failure(container, ('py-deps', None)))
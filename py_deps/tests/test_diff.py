@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_diff module."""
+import copy
+import unittest
+from mock import patch
+from py_deps import cache, daemon, diff
+from py_deps.deps import Node
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+KEY = ('backup2swift', None)
+
+
+def find(chain_data, name):
+    """Return the first node of name."""
+    stack = list(chain_data)
+    while stack:
+        node = stack.pop(0)
+        if node.name == name:
+            return node
+        stack += node.targets
+    return None
+
+
+class DiffTests(unittest.TestCase):
+
+    """Tests of diff function."""
+
+    def setUp(self):
+        self.old = cache.backend(cache_name=CACHE_NAME).read_data(KEY)
+        self.new = copy.deepcopy(self.old)
+        find(self.new, 'requests').version = '2.24.0'
+        swiftsc = find(self.new, 'swiftsc')
+        swiftsc.targets = [node for node in swiftsc.targets
+                           if node.name != 'python-magic']
+        swiftsc.targets.append(Node('packaging', '20.4', depth=2))
+
+    def test_identical(self):
+        """Test identical chains."""
+        self.assertEqual(diff.diff(self.old, copy.deepcopy(self.old)),
+                         diff.Diff([], [], [], [], []))
+
+    def test_diff(self):
+        """Test added, removed and changed nodes and edges."""
+        result = diff.diff(self.old, self.new)
+        self.assertEqual(result.added, [('packaging', '20.4')])
+        self.assertEqual(result.removed, [('python-magic', '0.4.18')])
+        self.assertEqual(result.changed,
+                         [('requests', '2.23.0', '2.24.0')])
+        self.assertEqual(result.added_edges, [('swiftsc', 'packaging')])
+        self.assertEqual(result.removed_edges, [('swiftsc', 'python-magic')])
+
+    def test_skip_identical_subtrees(self):
+        """Test identical subtrees are not walked."""
+        old, new = diff.TreeIndex(self.old), diff.TreeIndex(self.new)
+        with patch('py_deps.diff.collect') as _collect:
+            diff.diff(old, new)
+        walked = [call[0][0].name for call in _collect.call_args_list]
+        self.assertEqual(sorted(walked), ['packaging', 'python-magic'])
+        self.assertEqual(old.hashes[id(find(self.old, 'setuptools'))],
+                         new.hashes[id(find(self.new, 'setuptools'))])
+
+    def test_execute(self):
+        """Test diff command of the daemon."""
+        container = cache.Memory()
+        container.store_data(('backup2swift', '0.9.5'), self.old)
+        container.store_data(('backup2swift', '0.9.6'), self.new)
+        result = daemon.execute(dict(command='diff', name='backup2swift',
+                                     old_version='0.9.5',
+                                     new_version='0.9.6'), container)
+        self.assertEqual(result['changed'],
+                         [('requests', '2.23.0', '2.24.0')])
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_environment module."""
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from py_deps import cache, cli
+from py_deps.bounds import Bounds, partial_key
+from py_deps.environment import Environment, site_packages
+
+DISTS = [('py-deps', '1.0.1', ['networkx', 'pip']),
+         ('networkx', '2.5', ['decorator (<5,>=4.3)',
+                              "numpy ; extra == 'all'"]),
+         ('decorator', '4.4.2', []),
+         ('numpy', '1.19.2', []),
+         ('pip', '20.2.3', []),
+         ('Requests', '2.28.1', ['idna', 'PySocks ; extra == "socks"'])]
+
+
+def write_dist(path, name, version, requires):
+    """Write metadata of a distribution installed."""
+    dist_info = os.path.join(path, f'{name.lower()}-{version}.dist-info')
+    os.makedirs(dist_info)
+    with open(os.path.join(dist_info, 'METADATA'), 'w') as fobj:
+        fobj.write(f'Metadata-Version: 2.1\nName: {name}\n'
+                   f'Version: {version}\n'
+                   f'Home-page: https://example.com/{name}\n')
+        fobj.writelines(f'Requires-Dist: {spec}\n' for spec in requires)
+
+
+class EnvironmentTests(unittest.TestCase):
+
+    """Tests of Environment."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'lib', 'python3.8',
+                                 'site-packages')
+        for name, version, requires in DISTS:
+            write_dist(self.path, name, version, requires)
+        self.env = Environment([self.tempdir])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_site_packages(self):
+        """Test import paths of prefix."""
+        self.assertEqual(site_packages(self.tempdir), [self.path])
+        self.assertEqual(site_packages(self.path), [self.path])
+
+    def test_top_level(self):
+        """Test trees of distributions required by no other."""
+        self.assertEqual(len(self.env.dists), 6)
+        self.assertEqual([node.name for node in self.env.traced_chain],
+                         ['numpy', 'py-deps', 'Requests'])
+        py_deps = self.env.traced_chain[1]
+        self.assertEqual([node.name for node in py_deps.targets],
+                         ['networkx', 'pip'])
+        self.assertEqual(py_deps.targets[0].targets[0].name, 'decorator')
+        self.assertEqual(py_deps.targets[0].targets[0].depth, 2)
+        self.assertEqual(py_deps.url, 'https://example.com/py-deps')
+        self.assertEqual(self.env.traced_chain[2].targets, [])
+
+    def test_names_bounds(self):
+        """Test trees of names with bounds."""
+        env = Environment([self.path], names=['networkx'],
+                          bounds=Bounds(max_depth=0))
+        self.assertEqual([node.name for node in env.traced_chain],
+                         ['networkx'])
+        self.assertTrue(env.traced_chain[0].incomplete)
+
+    def test_store(self):
+        """Test trees are stored to the cache once."""
+        container = cache.Memory()
+        self.assertEqual(self.env.store(container), 3)
+        self.assertEqual(self.env.store(container), 0)
+        self.assertEqual(self.env.store(container, update_force=True), 3)
+        chain = container.read_data(('py-deps', '1.0.1'))
+        self.assertEqual(len(chain[0].targets), 2)
+
+    def test_store_bounds(self):
+        """Test bounded trees never shadow the complete trees."""
+        container = cache.Memory()
+        bounds = Bounds(max_depth=0)
+        env = Environment([self.path], names=['networkx'], bounds=bounds)
+        self.assertEqual(env.store(container), 1)
+        self.assertIsNone(container.read_data(('networkx', '2.5')))
+        key = bounds.key(('networkx', '2.5'))
+        self.assertTrue(container.read_data(key)[0].incomplete)
+        env = Environment([self.path], names=['networkx'],
+                          bounds=Bounds(deadline=0))
+        self.assertEqual(env.store(container), 1)
+        self.assertIsNone(container.read_data(('networkx', '2.5')))
+        self.assertEqual(
+            container.read_data(partial_key(('networkx', '2.5')))[0].name,
+            'networkx')
+
+    def test_draw(self):
+        """Test union graph of environment."""
+        data = self.env.draw('linkdraw')
+        self.assertEqual(len(data['nodes']), 6)
+        self.assertEqual(len(data['lines']), 3)
+
+    def test_scan_command(self):
+        """Test scan command stores to the cache."""
+        cache_name = os.path.join(self.tempdir, 'py-deps.pickle')
+        stream = io.StringIO()
+        with redirect_stdout(stream):
+            self.assertEqual(cli.main(['--cache-name', cache_name, 'scan',
+                                       self.tempdir]), 0)
+        self.assertEqual([item['name']
+                          for item in json.loads(stream.getvalue())],
+                         ['numpy', 'py-deps', 'Requests'])
+        container = cache.backend(cache_name=cache_name)
+        self.assertIsNotNone(container.read_data(('Requests', '2.28.1')))
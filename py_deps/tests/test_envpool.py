@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_envpool module."""
+import os
+import shutil
+import tempfile
+import unittest
+from py_deps import deps
+from py_deps.envpool import EnvPool
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+
+
+class EnvPoolTests(unittest.TestCase):
+
+    """Tests of EnvPool class."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.pool = EnvPool(self.tempdir, size=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_lease(self):
+        """Test concurrent leases get distinct directories."""
+        lease1 = self.pool.lease()
+        lease2 = self.pool.lease()
+        self.assertNotEqual(lease1.path, lease2.path)
+        with open(os.path.join(lease1.path, 'installed'), 'w'):
+            pass
+        lease1.release()
+        lease2.release()
+        self.assertEqual(os.listdir(lease1.path), [])
+        self.assertFalse(os.path.isdir(lease2.path))
+        with self.pool.lease() as path:
+            self.assertEqual(path, lease1.path)
+
+    def test_clear(self):
+        """Test clear keeps the leased directories."""
+        with self.pool.lease() as path:
+            with self.pool.lease() as other:
+                os.makedirs(os.path.join(path, 'pkg'))
+            self.assertEqual(self.pool.clear(), [])
+            self.assertTrue(os.path.isdir(os.path.join(path, 'pkg')))
+        self.assertEqual(self.pool.clear(), [path])
+        self.assertFalse(os.path.isdir(other))
+
+    def test_cache_hit(self):
+        """Test Package does not lease on cache hit."""
+        pkg = deps.Package('backup2swift', cache_name=CACHE_NAME,
+                           envpool=self.pool)
+        self.assertIsNone(pkg.tempdir)
+        self.assertFalse(os.path.lexists(self.pool.path))
+
+    def test_private_root(self):
+        """Test pool directory is created private."""
+        self.assertEqual(self.pool.clear(), [])
+        self.assertFalse(os.path.lexists(self.pool.path))
+        with self.pool.lease():
+            self.assertEqual(os.stat(self.pool.path).st_mode & 0o777, 0o700)
+
+    def test_planted_root(self):
+        """Test pool directory of others or a symbolic link is refused."""
+        victim = os.path.join(self.tempdir, 'victim')
+        os.mkdir(victim, 0o700)
+        os.symlink(victim, self.pool.path)
+        with self.assertRaises(PermissionError):
+            self.pool.lease()
+        os.remove(self.pool.path)
+        os.mkdir(self.pool.path, 0o777)
+        os.chmod(self.pool.path, 0o777)
+        with self.assertRaises(PermissionError):
+            self.pool.lease()
+
+    def test_planted_slot(self):
+        """Test symbolic link of a slot is not followed."""
+        victim = os.path.join(self.tempdir, 'victim')
+        os.mkdir(victim)
+        with open(os.path.join(victim, 'data'), 'w'):
+            pass
+        os.mkdir(self.pool.path, 0o700)
+        os.symlink(victim, os.path.join(self.pool.path, 'env-0'))
+        with self.pool.lease() as path:
+            self.assertFalse(os.path.islink(path))
+        self.assertEqual(os.listdir(victim), ['data'])
@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 """py_deps.tests.test_deps module."""
+import copy
 import unittest
-from py_deps import deps, graph
+from py_deps import cache, deps, graph
 
 
 class GraphFunctionTests(unittest.TestCase):
@@ -39,5 +40,85 @@ class GraphFunctionTests(unittest.TestCase):
         )
         self.assertEqual(
             graph.router(self.pkg, draw_type='networkx').number_of_edges(),
-            2
+            9
         )
+
+    def test_router_dot(self):
+        """Test router with draw_type=dot."""
+        lines = graph.router(self.pkg, draw_type='dot').splitlines()
+        self.assertEqual(lines[0], 'digraph "backup2swift" {')
+        self.assertEqual(lines[-1], '}')
+        self.assertEqual(len([line for line in lines if '->' in line]), 9)
+        self.assertIn('  "swiftsc" [label="swiftsc\\n0.7.2", '
+                      'URL="https://github.com/mkouhei/swiftsc", '
+                      'color="#a4c1f4"];', lines)
+
+    def test_router_blockdiag(self):
+        """Test router with draw_type=blockdiag."""
+        data = graph.router(self.pkg, draw_type='blockdiag',
+                            link_prefix='/graph')
+        self.assertTrue(data.startswith('blockdiag {\n'))
+        self.assertIn('  "requests" -> "urllib3";\n', data)
+        self.assertIn('href = "/graph/requests/2.23.0"', data)
+
+    def test_walk(self):
+        """Test nodes and edges are walked once."""
+        pairs = list(graph.walk(self.pkg.traced_chain))
+        self.assertEqual(len([pair for pair in pairs if pair[1] is None]), 9)
+        self.assertEqual(len([pair for pair in pairs if pair[1]]), 9)
+
+    def test_quote(self):
+        """Test quoting IDs."""
+        self.assertEqual(graph.quote('a"b\nc'), '"a\\"b\\nc"')
+
+
+class RequirementsTests(unittest.TestCase):
+
+    """Tests of union graph of Requirements."""
+
+    def setUp(self):
+        container = cache.Memory()
+        chain = cache.backend(
+            cache_name='py_deps/tests/data/py-deps.pickle').read_data(
+                ('backup2swift', None))
+        swiftsc = copy.deepcopy(chain[0].targets[0])
+        container.store_data(('backup2swift', None), chain)
+        container.store_data(('swiftsc', None), [swiftsc])
+        self.requirements = deps.Requirements(cache=container)
+        self.requirements.add('backup2swift')
+        self.requirements.add('swiftsc')
+
+    def test_traced_chain(self):
+        """Test roots are added incrementally."""
+        self.assertEqual([node.name
+                          for node in self.requirements.traced_chain],
+                         ['backup2swift', 'swiftsc'])
+        self.assertEqual(len(self.requirements.packages), 2)
+
+    def test_pretty_print(self):
+        """Test shared nodes are printed once."""
+        self.assertEqual(
+            [line.split(' ')[0]
+             for line in self.requirements.draw().splitlines()],
+            ['backup2swift', 'swiftsc', 'requests'])
+
+    def test_pretty_print_versions(self):
+        """Test shared names of other versions are printed."""
+        swiftsc = self.requirements.traced_chain[1]
+        swiftsc.version = 'other'
+        self.assertEqual(
+            [line.split(' ')[0]
+             for line in self.requirements.draw().splitlines()],
+            ['backup2swift', 'swiftsc', 'requests', 'swiftsc'])
+
+    def test_linkdraw(self):
+        """Test shared nodes and edges are emitted once."""
+        data = self.requirements.draw('linkdraw')
+        self.assertEqual(data['descr'], 'requirements dependencies')
+        self.assertEqual(len(data['nodes']), 9)
+        self.assertEqual(len(data['lines']), 9)
+
+    def test_linkdraw_roots(self):
+        """Test edges of every root are emitted."""
+        self.requirements.traced_chain.reverse()
+        self.assertEqual(len(self.requirements.draw('linkdraw')['lines']), 9)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_index module."""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+from py_deps import cli, deps, index
+
+NAMES = ['py-deps', 'Py_Deps_Extra', 'deps', 'pydeps', 'requests',
+         'zope.interface', 'backup2swift']
+
+
+class NameIndexTests(unittest.TestCase):
+
+    """Tests of NameIndex."""
+
+    def setUp(self):
+        self.index = index.NameIndex(NAMES)
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_update(self):
+        """Test names are added incrementally once."""
+        self.assertEqual(len(self.index), 7)
+        self.assertEqual(self.index.update(['PY.DEPS', 'aaa', 'zzz']), 2)
+        self.assertEqual(self.index.keys, sorted(self.index.keys))
+        self.assertEqual(self.index.substring('zz'), ['zzz'])
+
+    def test_get(self):
+        """Test normalized name lookup."""
+        self.assertEqual(self.index.get('ZOPE_Interface'), 'zope.interface')
+        self.assertIsNone(self.index.get('zope'))
+
+    def test_prefix(self):
+        """Test prefix lookup."""
+        self.assertEqual(self.index.prefix('Py_Deps'),
+                         ['py-deps', 'Py_Deps_Extra'])
+        self.assertEqual(self.index.prefix('py', limit=1), ['py-deps'])
+        self.assertEqual(self.index.prefix('x'), [])
+
+    def test_substring(self):
+        """Test substring lookup."""
+        self.assertEqual(self.index.substring('deps'),
+                         ['deps', 'py-deps', 'Py_Deps_Extra', 'pydeps'])
+        self.assertEqual(self.index.substring('swift', limit=1),
+                         ['backup2swift'])
+
+    def test_search(self):
+        """Test prefix matches before substring matches."""
+        self.assertEqual(self.index.search('deps'),
+                         ['deps', 'py-deps', 'Py_Deps_Extra', 'pydeps'])
+        self.assertEqual(self.index.search('py-deps', exactly=True),
+                         ['py-deps'])
+        self.assertEqual(self.index.search('py', limit=3),
+                         ['py-deps', 'Py_Deps_Extra', 'pydeps'])
+        self.assertEqual(deps.search('py_deps', exactly=True,
+                                     index=self.index),
+                         [dict(name='py-deps')])
+
+    def test_search_limit(self):
+        """Test the substring scan stops at the limit."""
+        scanned = []
+        contains = self.index._contains  # pylint: disable=protected-access
+
+        def counted(key):
+            for name in contains(key):
+                scanned.append(name)
+                yield name
+
+        with patch.object(self.index, '_contains', side_effect=counted):
+            self.assertEqual(self.index.search('e', limit=2),
+                             ['deps', 'py-deps'])
+        self.assertEqual(scanned, ['deps', 'py-deps'])
+
+    def test_save_load(self):
+        """Test index file."""
+        path = os.path.join(self.tempdir, 'names.txt')
+        self.index.save(path)
+        loaded = index.get_index(path)
+        self.assertEqual(loaded.names, self.index.names)
+        self.assertIs(index.get_index(path), loaded)
+
+    def test_parse_simple(self):
+        """Test listings of simple repository API."""
+        self.assertEqual(index.parse_simple(
+            '<html><body><a href="/simple/py-deps/">py-deps</a>\n'
+            '<a href="/simple/zope-interface/">zope.interface</a>'
+            '</body></html>'), ['py-deps', 'zope.interface'])
+        self.assertEqual(index.parse_simple(json.dumps(dict(
+            meta={'api-version': '1.0'},
+            projects=[dict(name='py-deps')]))), ['py-deps'])
+        self.assertEqual(index.parse_simple('py-deps\n\nrequests\n'),
+                         ['py-deps', 'requests'])
+
+    def test_index_command(self):
+        """Test index command updates the index file."""
+        source = os.path.join(self.tempdir, 'simple.html')
+        with open(source, 'w') as fobj:
+            fobj.write('<a href="/simple/py-deps/">py-deps</a>')
+        path = os.path.join(self.tempdir, 'names.txt')
+        self.assertEqual(cli.main(['index', path, '--source', source]), 0)
+        with open(source, 'w') as fobj:
+            fobj.write('requests\npy-deps\n')
+        self.assertEqual(cli.main(['index', path, '--source', source]), 0)
+        self.assertEqual(index.NameIndex.load(path).keys,
+                         ['py-deps', 'requests'])
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_matrix module."""
+import copy
+import unittest
+import numpy
+from mock import patch
+from py_deps import cache, matrix
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+KEY = ('backup2swift', None)
+
+
+class MatrixTests(unittest.TestCase):
+
+    """Tests of adjacency matrix."""
+
+    def setUp(self):
+        self.chain = cache.backend(cache_name=CACHE_NAME).read_data(KEY)
+        self.csr = matrix.from_chains([self.chain])
+
+    def targets(self, name):
+        """Return names required by name."""
+        idx = list(self.csr.names).index(name)
+        return sorted(self.csr.names[
+            self.csr.indices[self.csr.indptr[idx]:self.csr.indptr[idx + 1]]])
+
+    def test_shape(self):
+        """Test nodes and deduplicated edges."""
+        self.assertEqual(len(self.csr.names), 9)
+        self.assertEqual(len(self.csr.indptr), 10)
+        self.assertEqual(len(self.csr.indices), 9)
+        self.assertEqual(self.csr.indptr[-1], 9)
+
+    def test_targets(self):
+        """Test rows of adjacency."""
+        self.assertEqual(self.targets('backup2swift'),
+                         ['setuptools', 'swiftsc'])
+        self.assertEqual(self.targets('requests'),
+                         ['certifi', 'chardet', 'idna', 'urllib3'])
+        self.assertEqual(self.targets('certifi'), [])
+
+    def test_versions_depth(self):
+        """Test version and minimum depth of nodes."""
+        names = list(self.csr.names)
+        self.assertEqual(self.csr.versions[names.index('requests')],
+                         '2.23.0')
+        self.assertEqual(self.csr.depth[names.index('setuptools')], 1)
+        self.assertEqual(self.csr.depth[names.index('urllib3')], 3)
+
+    def test_versions_indexed(self):
+        """Test versions of a name are indexed separately."""
+        other = copy.deepcopy(self.chain)
+        other[0].version = '0.9.4'
+        csr = matrix.from_chains([self.chain, other])
+        self.assertEqual(len(csr.names), 10)
+        self.assertEqual(len(csr.indices), 11)
+
+    def test_from_cache(self):
+        """Test reading the cache in batches."""
+        container = cache.Memory()
+        other = copy.deepcopy(self.chain[0].targets[0])
+        container.store_data(KEY, self.chain)
+        container.store_data(('swiftsc', None), [other])
+        container.store_data(('missing', None, 'failure'), {})
+        with patch.object(container, 'list_data') as list_data:
+            csr = matrix.from_cache(container, batch_size=1)
+        list_data.assert_not_called()
+        self.assertEqual(len(csr.names), 9)
+        self.assertEqual(len(csr.indices), 9)
+        numpy.testing.assert_array_equal(csr.indptr, self.csr.indptr)
+
+    def test_empty(self):
+        """Test empty matrix."""
+        csr = matrix.from_chains([])
+        self.assertEqual(list(csr.indptr), [0])
+        self.assertEqual(len(csr.indices), 0)
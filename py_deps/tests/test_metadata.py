@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_metadata module."""
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from mock import patch
+from py_deps import cache, deps, metadata
+
+REPORT = 'py_deps/tests/data/report.json'
+
+
+def load_report():
+    """Load the installation report of requests."""
+    with open(REPORT) as fobj:
+        return json.load(fobj)
+
+
+class FunctionTests(unittest.TestCase):
+
+    """Tests of metadata functions."""
+
+    def setUp(self):
+        self.report = load_report()
+
+    def test_canonical_name(self):
+        """Test PEP 503 normalization."""
+        self.assertEqual(metadata.canonical_name('Charset_Normalizer'),
+                         'charset-normalizer')
+        self.assertEqual(metadata.canonical_name('zope.interface'),
+                         'zope-interface')
+
+    def test_parse_requirement(self):
+        """Test markers are evaluated with extras."""
+        spec = "PySocks (!=1.5.7,>=1.5.6) ; extra == 'socks'"
+        environment = self.report['environment']
+        self.assertIsNone(metadata.parse_requirement(spec, environment))
+        self.assertEqual(metadata.parse_requirement(
+            spec, environment, extras=['socks']).name, 'PySocks')
+        self.assertEqual(metadata.parse_requirement('idna>=2.5').name,
+                         'idna')
+        self.assertIsNone(metadata.parse_requirement('not a requirement'))
+
+    def test_nodes_from_report(self):
+        """Test tree of requested package."""
+        nodes = metadata.nodes_from_report(self.report)
+        self.assertEqual(len(nodes), 1)
+        self.assertEqual(nodes[0].name, 'requests')
+        self.assertEqual(nodes[0].url, 'https://requests.readthedocs.io')
+        self.assertEqual([node.name for node in nodes[0].targets],
+                         ['charset-normalizer', 'idna', 'urllib3',
+                          'certifi'])
+        self.assertEqual(nodes[0].targets[0].url,
+                         'https://github.com/ousret/charset_normalizer')
+        self.assertEqual([node.depth for node in nodes[0].targets],
+                         [1, 1, 1, 1])
+
+    def test_nodes_from_report_circular(self):
+        """Test circular dependencies stop at ancestors."""
+        self.report['install'][2]['metadata']['requires_dist'] = [
+            'requests']
+        nodes = metadata.nodes_from_report(self.report)
+        idna = nodes[0].targets[1]
+        self.assertEqual(idna.requires, ['requests'])
+        self.assertEqual(idna.targets, [])
+
+
+@patch('py_deps.deps.subprocess.run')
+class ReportResolverTests(unittest.TestCase):
+
+    """Tests of Package with the report resolver."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_name = os.path.join(self.tempdir, 'py-deps.pickle')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_resolve(self, _mock):
+        """Test dependencies are resolved without install directory."""
+        with open(REPORT, 'rb') as fobj:
+            _mock.return_value = subprocess.CompletedProcess(
+                [], 0, stdout=fobj.read())
+        pkg = deps.Package('requests', version='2.28.1',
+                           cache_name=self.cache_name, resolver='report',
+                           envpool=self.tempdir)
+        cmdline = _mock.call_args[0][0]
+        self.assertIn('--dry-run', cmdline)
+        self.assertEqual(cmdline[-1], 'requests==2.28.1')
+        self.assertIsNone(pkg.tempdir)
+        self.assertFalse(os.path.lexists(pkg.envpool.path))
+        self.assertEqual(len(pkg.traced_chain[0].targets), 4)
+        container = cache.backend(cache_name=self.cache_name)
+        self.assertEqual(len(container.read_data(('requests', '2.28.1'))), 1)
+
+    def test_unknown_resolver(self, _mock):
+        """Test unknown resolver."""
+        with self.assertRaises(ValueError):
+            deps.Package('requests', cache_name=self.cache_name,
+                         resolver='unknown')
+        _mock.assert_not_called()
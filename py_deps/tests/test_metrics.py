@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_metrics module."""
+import unittest
+from py_deps import deps, metrics
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+
+
+class FunctionTests(unittest.TestCase):
+
+    """Tests of traced chain functions."""
+
+    def setUp(self):
+        self.pkg = deps.Package('backup2swift', cache_name=CACHE_NAME)
+
+    def test_count_nodes(self):
+        """Test counting nodes."""
+        self.assertEqual(metrics.count_nodes(self.pkg.traced_chain), 10)
+        self.assertEqual(metrics.count_nodes([]), 0)
+
+    def test_tree_depth(self):
+        """Test depth of tree."""
+        self.assertEqual(metrics.tree_depth(self.pkg.traced_chain), 4)
+        self.assertEqual(metrics.tree_depth([]), 0)
+
+
+class InstrumentTests(unittest.TestCase):
+
+    """Tests of Instrument class."""
+
+    def setUp(self):
+        self.instrument = metrics.Instrument()
+        self.samples = []
+        self.instrument.register(self.record)
+
+    def record(self, *sample):
+        """Record a sample."""
+        self.samples.append(sample)
+
+    def test_export(self):
+        """Test Prometheus text format."""
+        self.instrument.count('cache_hits', backend='Pickle')
+        self.instrument.count('cache_hits', backend='Pickle')
+        self.instrument.observe('nodes', 3)
+        self.instrument.observe('nodes', 5)
+        self.assertEqual(self.instrument.export(),
+                         '# TYPE py_deps_cache_hits_total counter\n'
+                         'py_deps_cache_hits_total{backend="Pickle"} 2\n'
+                         '# TYPE py_deps_nodes summary\n'
+                         'py_deps_nodes_count 2\n'
+                         'py_deps_nodes_sum 8\n')
+
+    def test_callback_context(self):
+        """Test callbacks receive context labels."""
+        with self.instrument.timer('install', dict(name='py-deps')):
+            pass
+        metric, value, labels = self.samples[0]
+        self.assertEqual(metric, 'phase_seconds')
+        self.assertGreaterEqual(value, 0)
+        self.assertDictEqual(labels, dict(name='py-deps', phase='install'))
+        self.assertEqual(list(self.instrument.summaries),
+                         [('phase_seconds', (('phase', 'install'),))])
+
+    def test_package(self):
+        """Test Package reports phases."""
+        metrics.instrument.register(self.record)
+        self.addCleanup(metrics.instrument.unregister, self.record)
+        deps.Package('backup2swift', cache_name=CACHE_NAME)
+        self.assertIn(('cache_hits', 1, dict(name='backup2swift',
+                                             version=None,
+                                             backend='Pickle')),
+                      self.samples)
+        self.assertIn(('nodes', 10, dict(name='backup2swift', version=None)),
+                      self.samples)
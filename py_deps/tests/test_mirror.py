@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_mirror module."""
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+from py_deps import cache, deps, mirror
+from py_deps.bounds import Bounds, partial_key
+from py_deps.exceptions import NotFound
+
+PROJECTS = {
+    'requests': dict(name='requests', version='2.28.1',
+                     summary='Python HTTP for Humans.',
+                     url='https://requests.readthedocs.io',
+                     releases=['2.27.1', '2.28.0', '2.28.1'],
+                     requires_dist=['charset-normalizer (<3,>=2)',
+                                    'idna (<4,>=2.5)',
+                                    'PySocks (!=1.5.7,>=1.5.6) ; '
+                                    'extra == "socks"']),
+    'idna': dict(name='idna', version='3.4', summary=None, url=None,
+                 releases=['2.10', '3.3', '3.4', '4.0rc1'],
+                 requires_dist=[]),
+    'charset-normalizer': dict(name='charset-normalizer', version='3.0.1',
+                               summary=None, url=None,
+                               releases=['2.1.1', '3.0.1'],
+                               requires_dist=[]),
+}
+
+
+class StandInFeed(mirror.Feed):
+    """Stand-in of the index metadata feed."""
+
+    def __init__(self):
+        self.serial = 10
+        self.log = []
+        self.projects = dict(PROJECTS)
+        self.fetched = []
+
+    def last_serial(self):
+        return self.serial
+
+    def changes(self, serial):
+        entries = [entry for entry in self.log if entry[1] > serial]
+        return ({name for name, _ in entries},
+                max([serial] + [entry[1] for entry in entries]))
+
+    def project(self, name):
+        self.fetched.append(name)
+        if name not in self.projects:
+            raise NotFound(name)
+        return self.projects[name]
+
+    def release(self, name, version):
+        """Add a release to the log."""
+        self.serial += 1
+        project = self.projects.get(name, dict(name=name, summary=None,
+                                               url=None, releases=[],
+                                               requires_dist=[]))
+        self.projects[name] = dict(project, version=version,
+                                   releases=project['releases'] + [version])
+        self.log.append((name, self.serial))
+
+
+class MirrorTests(unittest.TestCase):
+
+    """Tests of Mirror."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tempdir, 'mirror.db')
+        self.mirror = mirror.Mirror(self.path)
+        self.feed = StandInFeed()
+        self.mirror.sync(self.feed, names=list(PROJECTS))
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_sync(self):
+        """Test changed packages are fetched incrementally."""
+        self.assertEqual(self.mirror.serial(), 10)
+        self.feed.release('idna', '3.5')
+        self.feed.release('not-mirrored', '1.0')
+        self.feed.fetched = []
+        self.assertEqual(self.mirror.sync(self.feed), 1)
+        self.assertEqual(self.feed.fetched, ['idna'])
+        self.assertEqual(self.mirror.serial(), 12)
+        self.assertEqual(self.mirror.latest_version('IDNA'), '3.5')
+        self.assertEqual(self.mirror.sync(self.feed), 0)
+
+    def test_sync_removed(self):
+        """Test packages removed from the index."""
+        self.feed.serial += 1
+        self.feed.log.append(('idna', self.feed.serial))
+        del self.feed.projects['idna']
+        self.mirror.sync(self.feed)
+        self.assertIsNone(self.mirror.latest_version('idna'))
+
+    def test_latest_versions(self):
+        """Test bulk latest versions."""
+        self.assertEqual(self.mirror.latest_versions(['requests', 'Idna',
+                                                      'unknown']),
+                         {'requests': '2.28.1', 'Idna': '3.4'})
+        self.assertEqual(deps.latest_version('requests', mirror=self.path),
+                         '2.28.1')
+        self.assertEqual(deps.latest_version('unknown', mirror=self.mirror),
+                         '')
+
+    def test_releases(self):
+        """Test releases sorted by version."""
+        self.assertEqual(self.mirror.releases('idna'),
+                         ['2.10', '3.3', '3.4', '4.0rc1'])
+
+    def test_search(self):
+        """Test search of packages mirrored."""
+        self.assertEqual(deps.search('requests', exactly=True,
+                                     mirror=self.mirror),
+                         [dict(name='requests', version='2.28.1',
+                               summary='Python HTTP for Humans.')])
+        self.assertEqual([item['name'] for item in
+                          self.mirror.search('n')],
+                         ['charset-normalizer', 'idna'])
+
+    def test_name_index(self):
+        """Test the name index is built once per synchronization."""
+        index = self.mirror.name_index()
+        self.assertIs(self.mirror.name_index(), index)
+        self.mirror.sync(self.feed, names=['idna'])
+        self.assertIsNot(self.mirror.name_index(), index)
+        other = mirror.Mirror(self.path)
+        other.remove('idna')
+        self.feed.release('six', '1.16.0')
+        other.sync(self.feed)
+        self.assertEqual([item['name'] for item in
+                          self.mirror.search('n')],
+                         ['charset-normalizer'])
+
+    def test_nodes(self):
+        """Test resolution from the mirror."""
+        nodes = self.mirror.nodes('requests')
+        self.assertEqual(nodes[0].version, '2.28.1')
+        self.assertEqual([(node.name, node.version)
+                          for node in nodes[0].targets],
+                         [('charset-normalizer', '2.1.1'), ('idna', '3.4')])
+        self.assertFalse(nodes[0].incomplete)
+        bounds = Bounds(max_depth=0)
+        nodes = self.mirror.nodes('requests', bounds=bounds)
+        self.assertTrue(nodes[0].incomplete)
+        self.assertEqual(nodes[0].targets, [])
+        self.assertFalse(bounds.cut)
+
+    def test_nodes_incomplete(self):
+        """Test releases without Requires-Dist are not expanded."""
+        bounds = Bounds()
+        nodes = self.mirror.nodes('requests', '2.27.1', bounds=bounds)
+        self.assertTrue(nodes[0].incomplete)
+        self.assertIsNone(nodes[0].requires)
+        self.assertTrue(bounds.cut)
+        with self.assertRaises(NotFound):
+            self.mirror.nodes('unknown')
+
+    def test_package(self):
+        """Test mirror resolver of Package."""
+        pkg = deps.Package('requests', resolver='mirror', mirror=self.path,
+                           cache=cache.Memory())
+        self.assertEqual(len(pkg.traced_chain[0].targets), 2)
+        with self.assertRaises(ValueError):
+            deps.Package('requests', resolver='mirror',
+                         cache=cache.Memory())
+
+    def test_package_incomplete(self):
+        """Test incomplete mirror trees do not shadow complete trees."""
+        container = cache.Memory()
+        pkg = deps.Package('requests', resolver='mirror', mirror=self.path,
+                           cache=container)
+        self.assertTrue(pkg.incomplete)
+        self.assertIsNone(container.read_data(('requests', None)))
+        self.assertEqual(
+            container.read_data(partial_key(('requests', None)))[0].name,
+            'requests')
+
+        def resolve(pkg, _context):
+            pkg.requires = [deps.Node('requests', '2.28.1')]
+
+        with patch.object(deps.Package, '_Package__resolve', autospec=True,
+                          side_effect=resolve) as stand_in:
+            pkg = deps.Package('requests', cache=container)
+        self.assertEqual(stand_in.call_count, 1)
+        self.assertFalse(pkg.incomplete)
+        self.assertEqual(pkg.traced_chain[0].targets, [])
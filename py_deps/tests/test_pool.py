@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_pool module."""
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import unittest
+from mock import patch
+from py_deps import cache, cli, pool
+from py_deps.bounds import Bounds, partial_key
+from py_deps.exceptions import NotFound
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+
+
+def stand_in_resolve(name, version, **_kwargs):
+    """Resolve from the test data, or fail as the package name says."""
+    if name == 'slow':
+        time.sleep(60)
+    if name == 'pip':
+        # pylint: disable=consider-using-with
+        child = subprocess.Popen(['sleep', '60'])
+        with open(version, 'w', encoding='utf-8') as fobj:
+            fobj.write(str(child.pid))
+        time.sleep(60)
+    if name == 'crash':
+        os._exit(1)  # pylint: disable=protected-access
+    if name == 'broken':
+        raise RuntimeError('broken sdist')
+    if name == 'missing':
+        raise NotFound('missing')
+    chain = cache.backend(cache_name=CACHE_NAME).read_data(('backup2swift',
+                                                            None))
+    return chain, name == 'partial'
+
+
+def alive(pid):
+    """Return whether the process is running, not a zombie."""
+    try:
+        with open(f'/proc/{pid}/stat', encoding='utf-8') as fobj:
+            return fobj.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+class ResolverPoolTests(unittest.TestCase):
+
+    """Tests of ResolverPool class."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_name = os.path.join(self.tempdir, 'py-deps.pickle')
+        self.pool = pool.ResolverPool(workers=2, timeout=5,
+                                      func=stand_in_resolve,
+                                      cache_name=self.cache_name)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_run(self):
+        """Test results are stored to the shared cache."""
+        results = list(self.pool.run([('backup2swift', None)]))
+        self.assertEqual(results[0].status, pool.OK)
+        self.assertEqual(results[0].chain[0].name, 'backup2swift')
+        container = cache.backend(cache_name=self.cache_name)
+        self.assertEqual(
+            container.read_data(('backup2swift', None))[0].name,
+            'backup2swift')
+        results = list(self.pool.run([('backup2swift', None)]))
+        self.assertEqual(results[0].status, pool.CACHED)
+
+    def test_isolation(self):
+        """Test failures do not stop the other jobs."""
+        self.pool.timeout = 1
+        results = {result.name: result
+                   for result in self.pool.run([('slow', None),
+                                                ('crash', None),
+                                                ('broken', None),
+                                                ('backup2swift', None)])}
+        self.assertEqual(results['slow'].status, pool.TIMEOUT)
+        self.assertEqual(results['crash'].status, pool.CRASHED)
+        self.assertEqual(results['broken'].status, pool.FAILED)
+        self.assertEqual(results['broken'].error,
+                         'RuntimeError: broken sdist')
+        self.assertEqual(results['backup2swift'].status, pool.OK)
+
+    def test_kill_group(self):
+        """Test the processes started by a job are killed on timeout."""
+        self.pool.timeout = 1
+        pid_file = os.path.join(self.tempdir, 'pid')
+        results = list(self.pool.run([('pip', pid_file)]))
+        self.assertEqual(results[0].status, pool.TIMEOUT)
+        with open(pid_file, encoding='utf-8') as fobj:
+            pid = int(fobj.read())
+        for _ in range(50):
+            if not alive(pid):
+                break
+            time.sleep(0.1)
+        self.assertFalse(alive(pid))
+
+    def test_lazy_jobs(self):
+        """Test a job is taken when a worker is free."""
+        taken = []
+
+        def jobs():
+            for version in ('0.7', '0.8', '0.9'):
+                taken.append(version)
+                yield 'backup2swift', version
+
+        results = self.pool.run(jobs())
+        next(results)
+        self.assertEqual(taken, ['0.7', '0.8'])
+        self.assertEqual(len(list(results)), 2)
+        self.assertEqual(taken, ['0.7', '0.8', '0.9'])
+
+    def test_bounds(self):
+        """Test results are stored under the keys of the bounds."""
+        bounded = pool.ResolverPool(workers=2, func=stand_in_resolve,
+                                    cache_name=self.cache_name,
+                                    package_kwargs=dict(max_depth=1))
+        results = list(bounded.run([('backup2swift', None),
+                                    ('partial', None)]))
+        self.assertEqual({result.status for result in results}, {pool.OK})
+        container = cache.backend(cache_name=self.cache_name)
+        key = Bounds(max_depth=1).key(('backup2swift', None))
+        self.assertIsNotNone(container.read_data(key))
+        self.assertIsNone(container.read_data(('backup2swift', None)))
+        key = Bounds(max_depth=1).key(('partial', None))
+        self.assertIsNone(container.read_data(key))
+        self.assertIsNotNone(container.read_data(partial_key(key)))
+        results = list(bounded.run([('backup2swift', None)]))
+        self.assertEqual(results[0].status, pool.CACHED)
+
+    def test_negative_cache(self):
+        """Test failures are stored as negative cache entries."""
+        results = list(self.pool.run([('missing', None)]))
+        self.assertEqual(results[0].error, 'NotFound: missing')
+        with patch.object(self.pool, '_start') as _mock:
+            results = list(self.pool.run([('missing', None)]))
+        _mock.assert_not_called()
+        self.assertEqual(results[0].status, pool.FAILED)
+        self.assertEqual(results[0].error, 'NotFound: missing')
+
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_cli(self, _stdout):
+        """Test batch command."""
+        self.assertEqual(cli.main(['--cache-name', CACHE_NAME, 'batch',
+                                   'backup2swift', '--workers', '1']), 0)
+        self.assertIn('"status": "cached"', _stdout.getvalue())
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_profiling module."""
+import glob
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from mock import patch
+from py_deps import cache, cli, daemon, deps, profiling
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+
+
+def busy():
+    """Allocate and spend time."""
+    return [str(i) * 10 for i in range(10000)]
+
+
+class ProfilingTests(unittest.TestCase):
+
+    """Tests of profiling."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def dumps(self, suffix):
+        """Return dump files."""
+        return glob.glob(os.path.join(self.tempdir, f'*.{suffix}'))
+
+    def test_disabled(self):
+        """Test profiling is disabled in default."""
+        with patch.dict(os.environ, {}, clear=True):
+            self.assertIsNone(profiling.get_profiler())
+        with profiling.profile(None, 'pkg', None, 'resolve'):
+            busy()
+
+    @patch.dict(os.environ, {profiling.RATE_ENV: '0.5'})
+    def test_sampling(self):
+        """Test sampling rate."""
+        with patch.dict(os.environ, {profiling.PROFILE_ENV: self.tempdir}):
+            with patch('py_deps.profiling.random.random', return_value=0.7):
+                self.assertIsNone(profiling.get_profiler())
+            with patch('py_deps.profiling.random.random', return_value=0.3):
+                self.assertEqual(profiling.get_profiler().directory,
+                                 self.tempdir)
+
+    def test_profile(self):
+        """Test dumps and summary."""
+        profiler = profiling.get_profiler(self.tempdir)
+        kept = []
+        for phase in ('resolve', 'draw'):
+            with profiler.profile('my/pkg', '1.0', phase):
+                kept.append(busy())
+        self.assertEqual(len(self.dumps('prof')), 2)
+        self.assertEqual(len(self.dumps('tracemalloc')), 2)
+        self.assertTrue(all(os.path.basename(path).startswith(
+            'my_pkg-1.0-') for path in self.dumps('prof')))
+        summary = profiling.summarize(self.tempdir, limit=5)
+        self.assertEqual(summary['dumps'], 2)
+        self.assertEqual(len(summary['cpu']), 5)
+        self.assertTrue(any('busy' in item['function']
+                            for item in summary['cpu']))
+        self.assertIn('test_profiling.py:', summary['memory'][0]['line'])
+
+    def test_package(self):
+        """Test drawing of package is profiled."""
+        pkg = deps.Package('backup2swift', cache_name=CACHE_NAME,
+                           profile=self.tempdir)
+        pkg.draw('dot')
+        self.assertEqual(len(self.dumps('prof')), 1)
+        self.assertIn('-draw-', self.dumps('prof')[0])
+
+    def test_daemon(self):
+        """Test drawing of the daemon is profiled."""
+        chain = cache.backend(cache_name=CACHE_NAME).read_data(
+            ('backup2swift', None))
+        container = cache.Memory()
+        container.store_data(('backup2swift', None), chain)
+        container.store_data(('swiftsc', None), chain[0].targets[:1])
+        with patch.dict(os.environ, {profiling.PROFILE_ENV: self.tempdir}):
+            daemon.execute(dict(command='draw', name='backup2swift',
+                                others=[['swiftsc', None]]), container)
+        self.assertEqual(len(self.dumps('prof')), 1)
+        self.assertIn('requirements-latest-draw-', self.dumps('prof')[0])
+
+    def test_summary_command(self):
+        """Test profile-summary command."""
+        with profiling.Profiler(self.tempdir, memory=False).profile(
+                'pkg', None, 'resolve'):
+            busy()
+        stream = io.StringIO()
+        with redirect_stdout(stream):
+            self.assertEqual(cli.main(['profile-summary', self.tempdir,
+                                       '--limit', '3']), 0)
+        summary = json.loads(stream.getvalue())
+        self.assertEqual(len(summary['cpu']), 3)
+        self.assertEqual(summary['memory'], [])
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_serializer module."""
+import json
+import marshal
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from mock import patch
+from py_deps import cache, deps, serializer
+from py_deps.exceptions import InvalidMetadata
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+KEY = ('backup2swift', None)
+
+
+class SerializerTests(unittest.TestCase):
+
+    """Tests of serializers."""
+
+    def setUp(self):
+        self.chain = cache.backend(cache_name=CACHE_NAME).read_data(KEY)
+        self.tree = [node.to_dict() for node in self.chain]
+
+    def assert_chain(self, chain):
+        """Assert the chain equals to the test data."""
+        self.assertListEqual([node.to_dict() for node in chain], self.tree)
+        self.assertListEqual([node.requires for node in chain],
+                             [node.requires for node in self.chain])
+
+    def test_binary(self):
+        """Test binary serializer of traced chain."""
+        binary = serializer.BinarySerializer()
+        raw = binary.dumps(self.chain)
+        self.assertTrue(raw.startswith(serializer.MAGIC))
+        self.assertEqual(raw[len(serializer.MAGIC):serializer.HEADER_SIZE],
+                         bytes([serializer.FORMAT_VERSION]) + b'cn')
+        json.loads(raw[serializer.HEADER_SIZE:])
+        self.assertLess(len(raw), len(pickle.dumps(self.chain)))
+        self.assert_chain(binary.loads(raw))
+
+    def test_binary_other_values(self):
+        """Test binary serializer of built-in values."""
+        binary = serializer.BinarySerializer()
+        value = dict(error='NotFound', time=1.5)
+        self.assertDictEqual(binary.loads(binary.dumps(value)), value)
+        value = [{('a', None), ('b', '1.0')}, (1, b'\0'), {1: '\0d'},
+                 {'\0t': [1]}, frozenset([2])]
+        self.assertListEqual(binary.loads(binary.dumps(value)), value)
+        with self.assertRaises(TypeError):
+            serializer.BinarySerializer(allow_pickle=False).dumps(object())
+
+    def test_compression(self):
+        """Test compression above threshold."""
+        binary = serializer.BinarySerializer(compression='zlib',
+                                             threshold=0)
+        raw = binary.dumps(self.chain)
+        self.assertEqual(raw[len(serializer.MAGIC) + 2:
+                             serializer.HEADER_SIZE], b'z')
+        self.assert_chain(binary.loads(raw))
+
+    def test_compression_not_installed(self):
+        """Test compression without the library."""
+        with patch('py_deps.serializer.zstandard', None):
+            with self.assertRaises(ValueError):
+                serializer.BinarySerializer(compression='zstd')
+
+    def test_legacy_pickle(self):
+        """Test loading pickle without header."""
+        raw = pickle.dumps(self.chain)
+        self.assert_chain(serializer.loads(raw))
+        with self.assertRaises(InvalidMetadata):
+            serializer.BinarySerializer(allow_pickle=False).loads(raw)
+
+    def test_refuse_marshal(self):
+        """Test refusing marshal values of previous versions."""
+        header = serializer.MAGIC + bytes([2]) + b'mn'
+        raw = header + marshal.dumps(dict(error='NotFound'))
+        self.assertDictEqual(serializer.loads(raw), dict(error='NotFound'))
+        with self.assertRaises(InvalidMetadata):
+            serializer.BinarySerializer(allow_pickle=False).loads(raw)
+
+    def test_refuse_broken(self):
+        """Test refusing values of other headers and broken values."""
+        binary = serializer.BinarySerializer(allow_pickle=False)
+        version = bytes([serializer.FORMAT_VERSION])
+        for raw in (serializer.MAGIC + version,
+                    serializer.MAGIC + bytes([9]) + b'jn[]',
+                    serializer.MAGIC + version + b'mn' + marshal.dumps(1),
+                    serializer.MAGIC + version + b'xn[]',
+                    serializer.MAGIC + version + b'jx[]',
+                    serializer.MAGIC + version + b'jn[',
+                    serializer.MAGIC + version + b'cn[[],[1,0]]',
+                    serializer.MAGIC + version + b'jn{"\\u0000s":[[1]]}'):
+            with self.assertRaises(InvalidMetadata):
+                binary.loads(raw)
+
+    def test_deep_chain(self):
+        """Test chain deeper than recursion limit."""
+        root = node = deps.Node('p0')
+        for i in range(1, 2000):
+            node.targets.append(deps.Node(f'p{i}', depth=i))
+            node = node.targets[0]
+        binary = serializer.BinarySerializer()
+        chain = binary.loads(binary.dumps([root]))
+        for _ in range(1999):
+            chain = chain[0].targets
+        self.assertEqual(chain[0].name, 'p1999')
+        self.assertEqual(chain[0].depth, 1999)
+
+    def test_incomplete(self):
+        """Test flags of incomplete nodes."""
+        self.chain[0].targets[1].incomplete = True
+        binary = serializer.BinarySerializer()
+        chain = binary.loads(binary.dumps(self.chain))
+        self.assertTrue(chain[0].targets[1].incomplete)
+        self.assertFalse(chain[0].targets[0].incomplete)
+
+    def test_format_version_1(self):
+        """Test reading chains serialized without the flags."""
+        strings, ints = serializer.flatten_chain(self.chain)
+        ints = list(ints)
+        pos = 1
+        while pos < len(ints):
+            del ints[pos + 4]
+            size = ints[pos + 4]
+            pos += 4 + 1 + max(size, 0) + 1
+        header = serializer.MAGIC + bytes([1]) + b'bn'
+        raw = header + marshal.dumps((strings, tuple(ints)))
+        self.assert_chain(serializer.loads(raw))
+
+
+class BackendTests(unittest.TestCase):
+
+    """Tests of cache backends with serializer."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_name = os.path.join(self.tempdir, 'py-deps.pickle')
+        shutil.copy(CACHE_NAME, self.cache_name)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_pickle_backend(self):
+        """Test Pickle backend reads legacy and serialized values."""
+        container = cache.backend(cache_name=self.cache_name,
+                                  serializer='binary')
+        chain = container.read_data(KEY)
+        self.assertEqual(chain[0].name, 'backup2swift')
+        container.store_data(('copy', None), chain)
+        self.assertIsInstance(container.container[('copy', None)], bytes)
+        reopened = cache.backend(cache_name=self.cache_name)
+        self.assertEqual(reopened.read_data(('copy', None))[0].name,
+                         'backup2swift')
+        self.assertEqual(set(reopened.list_data()),
+                         set(container.list_data()))
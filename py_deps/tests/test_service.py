@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_service module."""
+import asyncio
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from mock import patch
+from py_deps import cache, service
+from py_deps.exceptions import NotFound
+from py_deps.index import NameIndex
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+
+
+class EtagTests(unittest.TestCase):
+
+    """Tests of etag function."""
+
+    def test_etag(self):
+        """Test entity tag by name, version, render type and tree."""
+        tree = [dict(name='py-deps', version='1.0.1')]
+        self.assertEqual(service.etag('py-deps', '1.0.1', 'linkdraw', tree),
+                         service.etag('py-deps', '1.0.1', 'linkdraw', tree))
+        self.assertNotEqual(
+            service.etag('py-deps', '1.0.1', 'linkdraw', tree),
+            service.etag('py-deps', '1.0.1', 'pretty', tree))
+        self.assertNotEqual(
+            service.etag('py-deps', '1.0.1', 'linkdraw', tree),
+            service.etag('py-deps', '1.0.0', 'linkdraw', tree))
+
+    def test_if_none_match(self):
+        """Test parsing If-None-Match header."""
+        self.assertSetEqual(service.if_none_match('W/"a", "b,c",W/"d"'),
+                            {'"a"', '"b,c"', '"d"'})
+        self.assertSetEqual(service.if_none_match('*'), {'*'})
+        self.assertSetEqual(service.if_none_match(None), set())
+
+    def test_etag_release(self):
+        """Test entity tag of the latest version changes with a release."""
+        self.assertNotEqual(
+            service.etag('py-deps', None, 'resolve',
+                         [dict(name='py-deps', version='1.0.0')]),
+            service.etag('py-deps', None, 'resolve',
+                         [dict(name='py-deps', version='1.0.1')]))
+
+
+class ServiceTests(unittest.IsolatedAsyncioTestCase):
+
+    """Tests of Service class."""
+
+    def setUp(self):
+        self.service = service.Service(cache_name=CACHE_NAME)
+
+    async def asyncSetUp(self):
+        self.service.start(ThreadPoolExecutor(1))
+
+    async def asyncTearDown(self):
+        self.service.executor.shutdown()
+        self.service.cache_executor.shutdown()
+
+    async def test_resolve(self):
+        """Test resolve from cache."""
+        response = await self.service.dispatch('GET', '/resolve/backup2swift',
+                                               {})
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(response.body)['tree'][0]['name'],
+                         'backup2swift')
+        self.assertEqual(response.headers['ETag'],
+                         service.etag('backup2swift', None, 'resolve',
+                                      json.loads(response.body)['tree']))
+        self.assertEqual(self.service.metrics['cache_hits'], 1)
+
+    async def test_not_modified(self):
+        """Test conditional request."""
+        response = await self.service.dispatch(
+            'GET', '/draw/linkdraw/backup2swift', {})
+        tag = response.headers['ETag']
+        response = await self.service.dispatch(
+            'GET', '/draw/linkdraw/backup2swift', {'if-none-match': tag})
+        self.assertEqual(response.status, 304)
+        self.assertEqual(response.body, b'')
+        for header in (f'"a,b" ,W/{tag}', '*'):
+            response = await self.service.dispatch(
+                'GET', '/draw/linkdraw/backup2swift',
+                {'if-none-match': header})
+            self.assertEqual(response.status, 304)
+        response = await self.service.dispatch(
+            'GET', '/draw/linkdraw/backup2swift',
+            {'if-none-match': '"a, b", "c"'})
+        self.assertEqual(response.status, 200)
+
+    async def test_not_modified_not_held(self):
+        """Test conditional request of a package not held."""
+        self.service.container = cache.Memory()
+        tag = service.etag('no-such-pkg', None, 'resolve', [])
+        with patch('py_deps.service.resolve_chain',
+                   side_effect=NotFound('no-such-pkg')):
+            response = await self.service.dispatch(
+                'GET', '/resolve/no-such-pkg', {'if-none-match': tag})
+        self.assertEqual(response.status, 404)
+        self.assertEqual(self.service.metrics['not_modified'], 0)
+
+    async def test_draw(self):
+        """Test draw types."""
+        response = await self.service.dispatch(
+            'GET', '/draw/linkdraw/backup2swift', {})
+        self.assertEqual(len(json.loads(response.body)['nodes']), 9)
+        response = await self.service.dispatch(
+            'GET', '/draw/pretty/backup2swift', {})
+        self.assertTrue(response.body.startswith(b'backup2swift -> ['))
+        response = await self.service.dispatch(
+            'GET', '/draw/networkx/backup2swift', {})
+        self.assertEqual(len(json.loads(response.body)['nodes']), 9)
+        response = await self.service.dispatch(
+            'GET', '/draw/unknown/backup2swift', {})
+        self.assertEqual(response.status, 404)
+
+    async def test_search_index(self):
+        """Test search of local name index."""
+        self.service.index = NameIndex(['py-deps', 'pydeps'])
+        response = await self.service.dispatch('GET', '/search/py', {})
+        self.assertEqual(json.loads(response.body),
+                         [dict(name='py-deps'), dict(name='pydeps')])
+        response = await self.service.dispatch(
+            'GET', '/search/py_deps?exactly=1', {})
+        self.assertEqual(json.loads(response.body), [dict(name='py-deps')])
+
+    async def test_latest_not_found(self):
+        """Test names not on PyPI are answered from negative entries."""
+        self.service.container = cache.Memory()
+        with patch('py_deps.service.latest_version',
+                   return_value='') as latest_version:
+            for _ in range(2):
+                response = await self.service.dispatch(
+                    'GET', '/latest/no-such-pkg', {})
+                self.assertEqual(json.loads(response.body), '')
+        self.assertEqual(latest_version.call_count, 1)
+        with patch('py_deps.service.search', return_value=[]) as search:
+            for _ in range(2):
+                response = await self.service.dispatch(
+                    'GET', '/search/no-such-pkg', {})
+                self.assertEqual(json.loads(response.body), [])
+        self.assertEqual(search.call_count, 1)
+
+    async def test_overloaded(self):
+        """Test backpressure of cold resolutions."""
+        self.service.max_queue = 0
+        self.service.metrics['active'] = 1
+        response = await self.service.dispatch('GET', '/resolve/py-deps', {})
+        self.assertEqual(response.status, 503)
+        self.assertEqual(self.service.metrics['rejected'], 1)
+
+    async def test_cold_resolution(self):
+        """Test cold resolution is stored to the cache."""
+        tempdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tempdir)
+        self.service.container = cache.backend(
+            cache_name=os.path.join(tempdir, 'py-deps.pickle'))
+        chain = cache.backend(cache_name=CACHE_NAME).read_data(
+            ('backup2swift', None))
+        with patch('py_deps.service.resolve_chain',
+                   return_value=(chain, False)) as _mock:
+            responses = await asyncio.gather(
+                self.service.dispatch('GET', '/resolve/backup2swift', {}),
+                self.service.dispatch('GET', '/resolve/backup2swift', {}))
+        self.assertEqual([r.status for r in responses], [200, 200])
+        _mock.assert_called_once_with('backup2swift', None)
+        self.assertEqual(self.service.metrics['resolved'], 1)
+        self.assertIsNotNone(
+            self.service.container.read_data(('backup2swift', None)))
+
+    async def test_negative_cache(self):
+        """Test failed resolution is answered without resolving again."""
+        self.service.container = cache.Memory()
+        with patch('py_deps.service.resolve_chain',
+                   side_effect=NotFound('no-such-pkg')) as _mock:
+            for _ in range(2):
+                response = await self.service.dispatch(
+                    'GET', '/resolve/no-such-pkg', {})
+                self.assertEqual(response.status, 404)
+        _mock.assert_called_once_with('no-such-pkg', None)
+        self.assertEqual(self.service.metrics['negative_hits'], 1)
+
+    async def test_handle(self):
+        """Test HTTP connection."""
+        server = await asyncio.start_server(self.service.handle,
+                                            '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+            data = await reader.read()
+            writer.close()
+        self.assertTrue(data.startswith(b'HTTP/1.1 200 OK\r\n'))
+        self.assertEqual(json.loads(data.split(b'\r\n\r\n', 1)[1])['requests'],
+                         1)
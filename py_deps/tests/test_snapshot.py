@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_snapshot module."""
+import os
+import shutil
+import tempfile
+import unittest
+from py_deps import cache
+from py_deps.snapshot import Snapshot
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+KEY = ('backup2swift', None)
+
+
+class SnapshotTests(unittest.TestCase):
+
+    """Tests of Snapshot backend."""
+
+    def setUp(self):
+        self.chain = cache.backend(cache_name=CACHE_NAME).read_data(KEY)
+        self.tempdir = tempfile.mkdtemp()
+        self.cache_name = os.path.join(self.tempdir, 'py-deps.snapshot')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def test_publish(self):
+        """Test reading published snapshot."""
+        mapping = {KEY: self.chain, ('py-deps', '1.0.1'): self.chain,
+                   ('requests', None, 'negative'): {'error': 'not found'},
+                   ('pip', None): None}
+        self.assertEqual(Snapshot.publish(mapping, self.cache_name), 3)
+        reader = Snapshot(self.cache_name)
+        self.assertEqual(reader.read_data(KEY)[0].name, 'backup2swift')
+        self.assertDictEqual(
+            reader.read_data(('requests', None, 'negative')),
+            {'error': 'not found'})
+        self.assertIsNone(reader.read_data(('pip', None)))
+        self.assertIsNone(reader.read_data(('zzz', None)))
+        self.assertListEqual(sorted(reader.list_data(), key=str),
+                             sorted(list(mapping)[:3], key=str))
+        self.assertListEqual(sorted(reader.list_keys(), key=str),
+                             sorted(list(mapping)[:3], key=str))
+        reader.store_data(('pip', None), self.chain)
+        self.assertIsNone(reader.read_data(('pip', None)))
+
+    def test_swap(self):
+        """Test readers map the snapshot replaced."""
+        reader = Snapshot(self.cache_name, check_interval=0)
+        self.assertIsNone(reader.read_data(KEY))
+        Snapshot.publish({KEY: self.chain}, self.cache_name)
+        self.assertEqual(reader.read_data(KEY)[0].name, 'backup2swift')
+        Snapshot.publish({}, self.cache_name)
+        self.assertIsNone(reader.read_data(KEY))
+        self.assertDictEqual(reader.list_data(), {})
+
+    def test_not_snapshot(self):
+        """Test reading a file of other format."""
+        with open(self.cache_name, 'wb') as fobj:
+            fobj.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            Snapshot(self.cache_name).read_data(KEY)
+
+    def test_backend(self):
+        """Test snapshot backend."""
+        Snapshot.publish({KEY: self.chain}, self.cache_name)
+        container = cache.backend(snapshot=self.cache_name)
+        self.assertListEqual(container.names, ['Snapshot', 'Memory'])
+        self.assertEqual(container.read_data(KEY)[0].name, 'backup2swift')
+        self.assertIsNone(container.tiers[1].read_data(KEY))
+        container.store_data(('py-deps', None), self.chain)
+        self.assertIsNotNone(container.read_data(('py-deps', None)))
+        self.assertDictEqual(container.hits,
+                             dict(Snapshot=1, Memory=1, miss=0))
+        pickle_name = os.path.join(self.tempdir, 'py-deps.pickle')
+        tiered = cache.backend(snapshot=self.cache_name,
+                               cache_name=pickle_name, tiered=True)
+        self.assertListEqual(tiered.names, ['Memory', 'Snapshot', 'Pickle'])
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_wheelhouse module."""
+import fcntl
+import os
+import shutil
+import tempfile
+import unittest
+from mock import patch
+from py_deps import deps
+from py_deps.wheelhouse import Wheelhouse, digest
+
+CACHE_NAME = 'py_deps/tests/data/py-deps.pickle'
+
+
+def write(path, data):
+    """Write a file."""
+    with open(path, 'wb') as fobj:
+        fobj.write(data)
+    return path
+
+
+class WheelhouseTests(unittest.TestCase):
+
+    """Tests of Wheelhouse class."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.downloads = os.path.join(self.tempdir, 'downloads')
+        os.makedirs(self.downloads)
+        self.wheelhouse = Wheelhouse(os.path.join(self.tempdir, 'wheels'),
+                                     max_bytes=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_add(self):
+        """Test files are stored by digest and linked by name."""
+        path = write(os.path.join(self.downloads, 'a-1.0-py3-none-any.whl'),
+                     b'aaaa')
+        self.assertEqual(self.wheelhouse.add(path), digest(path))
+        self.wheelhouse.add(path)
+        link = os.path.join(self.wheelhouse.links, 'a-1.0-py3-none-any.whl')
+        self.assertTrue(os.path.samefile(
+            link, os.path.join(self.wheelhouse.objects, digest(path))))
+        self.assertEqual(self.wheelhouse.files(), ['a-1.0-py3-none-any.whl'])
+        self.assertEqual(self.wheelhouse.size(), 4)
+
+    def test_add_same_content(self):
+        """Test files of same content share the object."""
+        write(os.path.join(self.downloads, 'a-1.0.tar.gz'), b'same')
+        write(os.path.join(self.downloads, 'b-1.0.tar.gz'), b'same')
+        self.assertEqual(len(set(
+            self.wheelhouse.add_directory(self.downloads))), 1)
+        self.assertEqual(self.wheelhouse.files(),
+                         ['a-1.0.tar.gz', 'b-1.0.tar.gz'])
+        self.assertEqual(self.wheelhouse.size(), 4)
+
+    def test_evict(self):
+        """Test least recently used files are evicted over max_bytes."""
+        for num, name in enumerate(('a', 'b', 'c')):
+            path = write(os.path.join(self.downloads, f'{name}-1.0.tar.gz'),
+                         name.encode() * 4)
+            self.wheelhouse.add(path)
+            link = os.path.join(self.wheelhouse.links, f'{name}-1.0.tar.gz')
+            os.utime(link, (num, num))
+        self.assertEqual(self.wheelhouse.evict(), ['a-1.0.tar.gz'])
+        self.assertEqual(self.wheelhouse.files(),
+                         ['b-1.0.tar.gz', 'c-1.0.tar.gz'])
+        self.assertEqual(self.wheelhouse.size(), 8)
+
+    def test_touch_installed(self):
+        """Test the files installed are used recently."""
+        for filename in ('My_Pkg-1.0-py3-none-any.whl', 'b-1.0.tar.gz'):
+            self.wheelhouse.add(write(os.path.join(self.downloads, filename),
+                                      filename[:8].encode()))
+            os.utime(os.path.join(self.wheelhouse.links, filename), (0, 0))
+        target = os.path.join(self.tempdir, 'target')
+        os.makedirs(os.path.join(target, 'my_pkg-1.0.dist-info'))
+        self.assertEqual(self.wheelhouse.touch_installed(target),
+                         ['My_Pkg-1.0-py3-none-any.whl'])
+        self.assertEqual(self.wheelhouse.evict(), ['b-1.0.tar.gz'])
+
+
+def assert_locked(wheelhouse):
+    """Assert the wheelhouse is locked by a reader."""
+    with open(os.path.join(wheelhouse.path, '.lock'), 'a',
+              encoding='utf-8') as fobj:
+        try:
+            fcntl.flock(fobj, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return
+    raise AssertionError('wheelhouse is not locked')
+
+
+@patch('py_deps.deps.subprocess.run')
+class InstallTests(unittest.TestCase):
+
+    """Tests of Package.install with the wheelhouse."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.pkg = deps.Package('backup2swift', cache_name=CACHE_NAME,
+                                wheelhouse=self.tempdir,
+                                envpool=self.tempdir)
+        self.pkg.tempdir = os.path.join(self.tempdir, 'target')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_install(self, _mock):
+        """Test built wheels are stored and installed without index."""
+        def run(cmdline, check, **_kwargs):
+            assert_locked(self.pkg.wheelhouse)
+            if cmdline[1] == 'wheel':
+                wheel_dir = cmdline[cmdline.index('-w') + 1]
+                write(os.path.join(wheel_dir,
+                                   'backup2swift-0.8-py3-none-any.whl'),
+                      b'wheel')
+        _mock.side_effect = run
+        self.pkg.install()
+        self.assertEqual(self.pkg.wheelhouse.files(),
+                         ['backup2swift-0.8-py3-none-any.whl'])
+        cmdline = _mock.call_args_list[-1][0][0]
+        self.assertEqual(cmdline[:4],
+                         ['pip', 'install', '--isolated', '--no-index'])
+        self.assertIn(self.pkg.wheelhouse.links, cmdline)
+
+    def test_install_offline(self, _mock):
+        """Test offline install does not build wheels."""
+        self.pkg.offline = True
+        self.pkg.install()
+        self.assertEqual(_mock.call_count, 1)
+        self.assertIn('--no-index', _mock.call_args[0][0])
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""py_deps.tests.test_workqueue module."""
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from mock import patch
+from py_deps import cache, cli, workqueue
+from py_deps.tests.test_pool import stand_in_resolve
+
+
+class SQLiteBrokerTests(unittest.TestCase):
+
+    """Tests of SQLiteBroker class."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.broker = workqueue.SQLiteBroker(
+            os.path.join(self.tempdir, 'queue.db'), max_attempts=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_put(self):
+        """Test putting the same jobs is idempotent."""
+        self.assertEqual(self.broker.put([('a', None), ('b', '1.0')]), 2)
+        self.assertEqual(self.broker.put([('a', None), ('c', None)]), 1)
+        self.assertEqual(self.broker.progress(),
+                         dict(pending=3, running=0, done=0, failed=0))
+
+    def test_lease(self):
+        """Test expired leases are leased again."""
+        self.broker.put([('a', None)])
+        job = self.broker.lease('worker1', 60)
+        self.assertEqual((job.name, job.version, job.attempts),
+                         ('a', None, 1))
+        self.assertIsNone(self.broker.lease('worker2', 60))
+        with patch('py_deps.workqueue.time.time', return_value=1e12):
+            job = self.broker.lease('worker2', 60)
+        self.assertEqual(job.attempts, 2)
+        self.broker.complete(job, 'worker2')
+        self.assertEqual(self.broker.progress()['done'], 1)
+
+    def test_lease_expired_attempts(self):
+        """Test jobs whose leases expired max_attempts times fail."""
+        self.broker.put([('a', None)])
+        self.assertIsNotNone(self.broker.lease('worker', 60))
+        with patch('py_deps.workqueue.time.time', return_value=1e12):
+            self.assertIsNotNone(self.broker.lease('worker', 60))
+        with patch('py_deps.workqueue.time.time', return_value=1e13):
+            self.assertIsNone(self.broker.lease('worker', 60))
+        self.assertEqual(self.broker.progress()['failed'], 1)
+        self.assertEqual(self.broker.failures(),
+                         [('a', None, 'lease expired')])
+
+    def test_fail(self):
+        """Test failed jobs are retried up to max_attempts."""
+        self.broker.put([('a', None)])
+        self.broker.fail(self.broker.lease('worker', 60), 'worker', 'error')
+        self.assertEqual(self.broker.progress()['pending'], 1)
+        self.broker.fail(self.broker.lease('worker', 60), 'worker', 'error')
+        self.assertEqual(self.broker.progress()['failed'], 1)
+        self.assertEqual(self.broker.failures(), [('a', None, 'error')])
+
+
+class WorkerTests(unittest.TestCase):
+
+    """Tests of Worker class."""
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.database = os.path.join(self.tempdir, 'queue.db')
+        self.cache_name = os.path.join(self.tempdir, 'py-deps.pickle')
+        self.broker = workqueue.SQLiteBroker(self.database, max_attempts=1)
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir, ignore_errors=True)
+
+    def test_run(self):
+        """Test workers share the queue and the cache."""
+        self.broker.put([('backup2swift', None), ('backup2swift', '0.8'),
+                         ('broken', None)])
+        container = cache.Memory()
+        workers = [workqueue.Worker(self.broker, name=f'worker{num}',
+                                    func=stand_in_resolve,
+                                    container=container)
+                   for num in range(2)]
+        threads = [threading.Thread(target=worker.run)
+                   for worker in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.broker.progress(),
+                         dict(pending=0, running=0, done=2, failed=1))
+        self.assertEqual(container.read_data(('backup2swift', '0.8'))[0].name,
+                         'backup2swift')
+        self.assertEqual(self.broker.failures()[0][2],
+                         'failed: RuntimeError: broken sdist')
+
+    def test_run_duplicate(self):
+        """Test a job leased again before its result is processed."""
+        job = workqueue.Job('id', 'backup2swift', None, 1)
+        leases = iter([job, job._replace(attempts=2)])
+        processed = []
+        worker = workqueue.Worker(self.broker, workers=2,
+                                  func=stand_in_resolve,
+                                  container=cache.Memory())
+        with patch.object(self.broker, 'lease',
+                          side_effect=lambda *args: next(leases, None)), \
+                patch.object(self.broker, 'complete') as complete:
+            self.assertEqual(worker.run(callback=lambda job, _: processed
+                                        .append(job.attempts)), 2)
+        self.assertEqual(sorted(processed), [1, 2])
+        self.assertEqual(complete.call_count, 2)
+
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_cli(self, _stdout):
+        """Test queue command."""
+        self.assertEqual(cli.main(['queue', self.database,
+                                   'put', 'backup2swift', 'pip==20.1']), 0)
+        self.assertEqual(cli.main(['queue', self.database, 'progress']), 0)
+        self.assertIn('"pending": 2', _stdout.getvalue())
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""py_deps.wheelhouse module.
+
+The wheelhouse keeps the wheels and sdists downloaded or built by pip
+among :meth:`py_deps.deps.Package.install` calls.
+
+The files are stored by the SHA-256 digest of their content in
+``objects``, and hard linked by file name in ``links`` to pass to
+``pip --find-links``. Files are added with atomic renames under an
+exclusive lock, and pip reads ``links`` under a shared lock, so that
+eviction never removes files while building or installing.
+
+The modification time of a link is its last use, updated when the file
+is added or built again, and when the package is installed from it.
+The least recently used files are evicted first.
+"""
+import fcntl
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from py_deps.metadata import canonical_name
+
+
+def release_of(filename):
+    """Return name and version of a wheel or sdist file name.
+
+    :rtype: tuple
+    :return: canonical name and version, or ``None`` when unknown
+    :param str filename: file name
+    """
+    if filename.endswith('.whl'):
+        parts = filename.split('-')
+    else:
+        for ext in ('.tar.gz', '.tar.bz2', '.zip'):
+            if filename.endswith(ext):
+                parts = filename[:-len(ext)].rsplit('-', 1)
+                break
+        else:
+            return None
+    if len(parts) < 2:
+        return None
+    return canonical_name(parts[0]), parts[1]
+
+
+def digest(path):
+    """Return SHA-256 digest of file.
+
+    :rtype: str
+    :param str path: file path
+    """
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as fobj:
+        for chunk in iter(lambda: fobj.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class Wheelhouse:
+    """Wheelhouse class."""
+
+    def __init__(self, path, max_bytes=None):
+        """Initialize.
+
+        :param str path: wheelhouse directory
+        :param int max_bytes: total size of files, ``None`` is unbounded
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        #: files by digest
+        self.objects = os.path.join(path, 'objects')
+        #: hard links by file name, for ``pip --find-links``
+        self.links = os.path.join(path, 'links')
+        os.makedirs(self.objects, exist_ok=True)
+        os.makedirs(self.links, exist_ok=True)
+
+    @contextmanager
+    def lock(self, exclusive=False):
+        """Lock the wheelhouse.
+
+        :param bool exclusive: exclusive lock for writers,
+                               or shared lock for readers
+        """
+        with open(os.path.join(self.path, '.lock'), 'a') as fobj:
+            fcntl.flock(fobj, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(fobj, fcntl.LOCK_UN)
+
+    def add(self, path):
+        """Add a file.
+
+        :rtype: str
+        :return: digest of the file
+
+        :param str path: wheel or sdist file
+        """
+        file_digest = digest(path)
+        filename = os.path.basename(path)
+        obj = os.path.join(self.objects, file_digest)
+        link = os.path.join(self.links, filename)
+        with self.lock(exclusive=True):
+            if not os.path.isfile(obj):
+                fd, tempname = tempfile.mkstemp(dir=self.objects)
+                os.close(fd)
+                shutil.copyfile(path, tempname)
+                os.replace(tempname, obj)
+            if not (os.path.isfile(link) and os.path.samefile(obj, link)):
+                tempname = os.path.join(self.links, f'.{filename}.tmp')
+                if os.path.lexists(tempname):
+                    os.remove(tempname)
+                os.link(obj, tempname)
+                os.replace(tempname, link)
+            os.utime(link)
+        return file_digest
+
+    def add_directory(self, path):
+        """Add files of a directory.
+
+        :rtype: list
+        :return: digests of the files
+        """
+        return [self.add(os.path.join(path, filename))
+                for filename in sorted(os.listdir(path))
+                if os.path.isfile(os.path.join(path, filename))]
+
+    def files(self):
+        """Return file names.
+
+        :rtype: list
+        """
+        return sorted(filename for filename in os.listdir(self.links)
+                      if not filename.startswith('.'))
+
+    def size(self):
+        """Return total size of files in bytes.
+
+        :rtype: int
+        """
+        return sum(os.path.getsize(os.path.join(self.objects, obj))
+                   for obj in os.listdir(self.objects))
+
+    def touch_installed(self, target):
+        """Update the last use of the files installed to the directory.
+
+        Call it under the lock.
+
+        :rtype: list
+        :return: file names used
+        :param str target: directory pip installed to
+        """
+        installed = set()
+        for path in glob.glob(os.path.join(target, '*.dist-info')):
+            name, _, version = os.path.basename(path)[
+                :-len('.dist-info')].partition('-')
+            installed.add((canonical_name(name), version))
+        used = []
+        for filename in self.files():
+            if release_of(filename) in installed:
+                try:
+                    os.utime(os.path.join(self.links, filename))
+                except FileNotFoundError:
+                    continue
+                used.append(filename)
+        return used
+
+    def evict(self):
+        """Remove least recently used files over max_bytes.
+
+        :rtype: list
+        :return: removed file names
+        """
+        removed = []
+        if self.max_bytes is None:
+            return removed
+        with self.lock(exclusive=True):
+            total = self.size()
+            links = sorted(
+                (os.path.join(self.links, filename)
+                 for filename in self.files()),
+                key=os.path.getmtime)
+            for link in links:
+                if total <= self.max_bytes:
+                    break
+                size = os.path.getsize(link)
+                os.remove(link)
+                removed.append(os.path.basename(link))
+                total -= size
+            for obj in os.listdir(self.objects):
+                path = os.path.join(self.objects, obj)
+                if os.stat(path).st_nlink == 1:
+                    os.remove(path)
+        return removed
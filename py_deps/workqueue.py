@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""py_deps.workqueue module.
+
+Distributed resolution with a work queue.
+
+The coordinator puts ``(name, version)`` jobs to the broker, and the
+workers lease the jobs, resolve them with
+:class:`py_deps.pool.ResolverPool`, and write the traced chains to the
+shared cache backend, such as Redis or Memcached.
+
+Jobs are identified by the name and version, so that putting the same
+jobs again is idempotent. A leased job not completed within the lease
+is leased again by another worker, and a failed or expired job is
+retried up to ``max_attempts`` times. Jobs already in the cache complete
+without resolving. A worker leases a job whenever one of its resolver
+processes is free.
+
+:class:`SQLiteBroker` is a database file in WAL mode, which is not safe
+on network file systems. Its workers run on one host, on a local file,
+as many worker processes as needed.::
+
+    $ py-deps queue queue.db put py-deps requests==2.28.1
+    $ py-deps --redis-url redis://cache:6379/0 queue queue.db work --workers 8
+    $ py-deps queue queue.db progress
+"""
+import json
+import os
+import socket
+import sqlite3
+import time
+from collections import namedtuple
+from contextlib import closing
+from py_deps import pool
+
+#: waiting a worker
+PENDING = 'pending'
+#: leased by a worker
+RUNNING = 'running'
+#: resolved or cached
+DONE = 'done'
+#: failed max_attempts times
+FAILED = 'failed'
+#: job states
+STATES = (PENDING, RUNNING, DONE, FAILED)
+
+#: leased job
+Job = namedtuple('Job', ['id', 'name', 'version', 'attempts'])
+
+
+def job_id(name, version):
+    """Return job identifier.
+
+    :rtype: str
+    """
+    return json.dumps([name, version])
+
+
+class Broker:
+    """Broker abstract class."""
+
+    def put(self, jobs):
+        """Put jobs, ignoring the jobs already put.
+
+        :rtype: int
+        :return: number of jobs added
+
+        :param jobs: iterable of ``(name, version)``
+        """
+        raise NotImplementedError
+
+    def lease(self, worker, seconds):
+        """Lease a pending job, or a job whose lease expired.
+
+        :rtype: :class:`Job`
+        :return: leased job, or ``None`` when no job is available
+
+        :param str worker: worker name
+        :param float seconds: lease period
+        """
+        raise NotImplementedError
+
+    def complete(self, job, worker):
+        """Complete the leased job.
+
+        :param job: leased job
+        :type job: :class:`Job`
+        :param str worker: worker name
+        """
+        raise NotImplementedError
+
+    def fail(self, job, worker, error):
+        """Fail the leased job, to retry it or give up.
+
+        :param job: leased job
+        :type job: :class:`Job`
+        :param str worker: worker name
+        :param str error: error message
+        """
+        raise NotImplementedError
+
+    def progress(self):
+        """Return number of jobs by state.
+
+        :rtype: dict
+        """
+        raise NotImplementedError
+
+    def failures(self):
+        """Return failed jobs.
+
+        :rtype: list
+        :return: list of ``(name, version, error)``
+        """
+        raise NotImplementedError
+
+
+class SQLiteBroker(Broker):
+    """Broker on SQLite database file.
+
+    Every operation opens a connection, so that the broker is shared
+    among the threads and processes.
+    """
+
+    def __init__(self, path, max_attempts=3):
+        """Initialize.
+
+        :param str path: database file
+        :param int max_attempts: attempts of a job before giving up
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        with self.connect() as conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS jobs ('
+                         'id TEXT PRIMARY KEY, name TEXT, version TEXT, '
+                         'state TEXT, attempts INTEGER, worker TEXT, '
+                         'lease_until REAL, error TEXT)')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_state '
+                         'ON jobs (state, lease_until)')
+
+    def connect(self):
+        """Open a connection.
+
+        :rtype: :class:`sqlite3.Connection`
+        """
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return closing(conn)
+
+    def put(self, jobs):
+        """Put jobs, ignoring the jobs already put."""
+        with self.connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO jobs VALUES (?, ?, ?, ?, 0, NULL, '
+                'NULL, NULL)',
+                [(job_id(name, version), name, version, PENDING)
+                 for name, version in jobs])
+            conn.execute('COMMIT')
+            return conn.total_changes - before
+
+    def lease(self, worker, seconds):
+        """Lease a pending job, or a job whose lease expired.
+
+        Jobs whose leases expired ``max_attempts`` times, such as the jobs
+        killing their workers, fail instead.
+        """
+        now = time.time()
+        with self.connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('UPDATE jobs SET state = ?, error = ? '
+                         'WHERE state = ? AND lease_until < ? '
+                         'AND attempts >= ?',
+                         (FAILED, 'lease expired', RUNNING, now,
+                          self.max_attempts))
+            row = conn.execute(
+                'SELECT id, name, version, attempts FROM jobs '
+                'WHERE state = ? OR (state = ? AND lease_until < ?) '
+                'ORDER BY rowid LIMIT 1',
+                (PENDING, RUNNING, now)).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute('UPDATE jobs SET state = ?, worker = ?, '
+                         'lease_until = ?, attempts = attempts + 1 '
+                         'WHERE id = ?',
+                         (RUNNING, worker, now + seconds, row[0]))
+            conn.execute('COMMIT')
+        return Job(row[0], row[1], row[2], row[3] + 1)
+
+    def complete(self, job, worker):
+        """Complete the leased job."""
+        with self.connect() as conn:
+            conn.execute('UPDATE jobs SET state = ?, error = NULL '
+                         'WHERE id = ? AND worker = ?',
+                         (DONE, job.id, worker))
+
+    def fail(self, job, worker, error):
+        """Fail the leased job, to retry it or give up."""
+        state = FAILED if job.attempts >= self.max_attempts else PENDING
+        with self.connect() as conn:
+            conn.execute('UPDATE jobs SET state = ?, error = ? '
+                         'WHERE id = ? AND worker = ? AND state = ?',
+                         (state, error, job.id, worker, RUNNING))
+
+    def progress(self):
+        """Return number of jobs by state."""
+        result = dict.fromkeys(STATES, 0)
+        with self.connect() as conn:
+            result.update(conn.execute(
+                'SELECT state, COUNT(*) FROM jobs GROUP BY state'))
+        return result
+
+    def failures(self):
+        """Return failed jobs."""
+        with self.connect() as conn:
+            return conn.execute('SELECT name, version, error FROM jobs '
+                                'WHERE state = ? ORDER BY rowid',
+                                (FAILED,)).fetchall()
+
+
+class Worker:
+    """Worker resolving the jobs of the broker."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, broker, workers=1, timeout=None, lease=None,
+                 name=None, **kwargs):
+        """Initialize.
+
+        :param broker: work queue
+        :type broker: :class:`Broker`
+        :param int workers: number of concurrent resolver processes
+        :param float timeout: seconds per job
+        :param float lease: lease period in seconds
+                            (default: timeout and a minute)
+        :param str name: worker name (default: host name and process ID)
+        :param kwargs: parameters of :class:`py_deps.pool.ResolverPool`
+        """
+        self.broker = broker
+        self.pool = pool.ResolverPool(workers=workers, timeout=timeout,
+                                      **kwargs)
+        if lease is None:
+            lease = (timeout or 3600) + 60
+        self.lease = lease
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+
+    def run(self, wait=False, interval=5.0, callback=None):
+        """Resolve the jobs until the queue is empty.
+
+        :rtype: int
+        :return: number of jobs processed
+
+        :param bool wait: wait new jobs instead of returning
+        :param float interval: seconds to poll the queue
+        :param callback: called as ``callback(job, result)``
+        """
+        count = 0
+        while True:
+            leased = {}
+            before = count
+            for result in self.pool.run(self._lease_jobs(leased)):
+                jobs = leased[(result.name, result.version)]
+                job = jobs.pop(0)
+                if not jobs:
+                    del leased[(result.name, result.version)]
+                if result.status in (pool.OK, pool.CACHED):
+                    self.broker.complete(job, self.name)
+                else:
+                    self.broker.fail(job, self.name,
+                                     f'{result.status}: {result.error}')
+                if callback is not None:
+                    callback(job, result)
+                count += 1
+            if count == before:
+                if not wait:
+                    return count
+                time.sleep(interval)
+
+    def _lease_jobs(self, leased):
+        """Lease jobs one by one, until the queue is empty.
+
+        :rtype: generator
+        :return: ``(name, version)`` of the jobs
+        :param dict leased: lists of the jobs leased, by ``(name, version)``;
+                            a job leased again after its lease expired
+                            is queued behind the first lease
+        """
+        while True:
+            job = self.broker.lease(self.name, self.lease)
+            if job is None:
+                return
+            leased.setdefault((job.name, job.version), []).append(job)
+            yield job.name, job.version
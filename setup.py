@@ -72,7 +72,9 @@ requires = ['setuptools>=46.1',
             'networkx==2.4']
 extras_require = {
     'reST': ['Sphinx'],
-    'memcache': ['pylibmc']
+    'memcache': ['pylibmc'],
+    'redis': ['redis'],
+    'matrix': ['numpy']
 }
 
 if os.environ.get('READTHEDOCS', None):
@@ -93,5 +95,8 @@ setup(name='py-deps',
       install_requires=requires,
       include_package_data=True,
       extras_require=extras_require,
+      entry_points={
+          'console_scripts': ['py-deps = py_deps.cli:main'],
+      },
       tests_require=['tox'],
       cmdclass={'test': Tox},)